@@ -1,17 +1,71 @@
 """Agent orchestrator implementing the reasoning loop and guardrails."""
 from __future__ import annotations
 
+import asyncio
+import functools
+import threading
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from app.guardrails.policy import GuardrailEngine
-from app.logging.audit import AuditLogger
-from app.tools.base import Tool
+from app.guardrails.registry import UnknownTenant
+from app.guardrails.stream import StreamingInspector
+from app.guardrails.walker import PayloadHit
+from app.logging.audit import AuditLogger, AuditRecord
+from app.logging.tracing import NULL_TRACE, TaskProfiler, TaskTrace, Tracer
+from app.tools.base import AsyncTool, StreamingTool, Tool
+from app.tools.cache import ToolResultCache, cache_key
 from app.evaluation.metrics import EvaluationTracker
 from app.agent.reasoning import HeuristicPlanner
 from app.agent.types import AgentResponse, StepResult, Task
 from app.utils.config import EnvironmentConfig
 
+# The reasoning loop yields the tool calls it needs (with the step's time
+# limit and, for streamed output, the callable that replaces ``tool.run``) and
+# receives their outputs, so the sync and async entry points share every
+# guardrail and audit decision.
+ToolCall = Tuple[Tool, Dict[str, Any], Optional[float], Optional[Callable[[], Dict[str, Any]]]]
+TaskLoop = Generator[ToolCall, Dict[str, Any], AgentResponse]
+
+# Threads are created on demand and reused, so a generous cap is cheap; it only
+# bounds how many abandoned (timed-out) tool calls can pile up.
+_WATCHDOG_THREADS = 256
+# With an output sink, streamed text is forwarded as it is screened and only
+# this much of it is kept in the step result.
+_STREAM_PREVIEW_CHARS = 4096
+# Appended to the rationale of a step whose tool output was blocked; the
+# output itself is not kept.
+OUTPUT_DISCARDED = "Tool output violated policy; discarding it."
+
+
+class StepTimeout(Exception):
+    """Raised into the reasoning loop when a tool call outlives its deadline."""
+
+
+class _CachedCall:
+    """Runs a cacheable tool through the result cache, noting whether the output was shared."""
+
+    def __init__(self, cache: ToolResultCache, key: Tuple[str, str], tool: Tool, tool_input: Dict[str, Any]) -> None:
+        self.cache = cache
+        self.key = key
+        self.tool = tool
+        self.tool_input = tool_input
+        self.shared = False
+
+    def __call__(self) -> Dict[str, Any]:
+        output, self.shared = self.cache.call(
+            self.key, functools.partial(self.tool.run, self.tool_input), self.tool.cache_ttl
+        )
+        return output
+
+    async def acall(self) -> Dict[str, Any]:
+        output, self.shared = await self.cache.acall(
+            self.key, functools.partial(self.tool.arun, self.tool_input), self.tool.cache_ttl  # type: ignore[attr-defined]
+        )
+        return output
+
 
 class AgentOrchestrator:
     """Coordinates the reasoning loop, tool calls, and guardrails."""
@@ -23,6 +77,11 @@ class AgentOrchestrator:
         audit_logger: AuditLogger,
         evaluation_tracker: EvaluationTracker,
         config: Optional[EnvironmentConfig] = None,
+        tool_executor: Optional[Executor] = None,
+        output_sink: Optional[Callable[[str, str, str], None]] = None,
+        tool_cache: Optional[ToolResultCache] = None,
+        tracer: Optional[Tracer] = None,
+        profiler: Optional[TaskProfiler] = None,
     ) -> None:
         self.tools = tools
         self.guardrail_engine = guardrail_engine
@@ -30,29 +89,243 @@ class AgentOrchestrator:
         self.evaluation_tracker = evaluation_tracker
         self.config = config or EnvironmentConfig.from_env()
         self.planner = HeuristicPlanner()
+        # Executor for synchronous tools on the async path and for watchdog
+        # runs on the sync path; None uses a default.
+        self.tool_executor = tool_executor
+        self._watchdog_pool: Optional[ThreadPoolExecutor] = None
+        # Receives (task_id, tool_name, chunk) for screened output of
+        # streaming tools, from whichever thread runs the tool.
+        self.output_sink = output_sink
+        # Shared by every task; serves and coalesces calls to cacheable tools.
+        self.tool_cache = tool_cache
+        # Samples tasks for per-phase spans (StepResult.spans and export).
+        self.tracer = tracer
+        # Opt-in cProfile/tracemalloc reports for a sample of run_task calls.
+        self.profiler = profiler
 
     def run_task(self, task: Task) -> AgentResponse:
-        self.audit_logger.start_task(task)
+        if self.profiler is not None:
+            with self.profiler.profile(task.task_id):
+                return self._drive(task)
+        return self._drive(task)
+
+    def _drive(self, task: Task) -> AgentResponse:
+        loop = self._task_loop(task)
+        try:
+            tool, tool_input, timeout, call = next(loop)
+            while True:
+                try:
+                    tool_output = self._run_tool(tool, tool_input, timeout, call)
+                except Exception as exc:
+                    tool, tool_input, timeout, call = loop.throw(exc)
+                else:
+                    tool, tool_input, timeout, call = loop.send(tool_output)
+        except StopIteration as done:
+            return done.value
+
+    async def arun_task(self, task: Task) -> AgentResponse:
+        """Async counterpart of ``run_task`` with identical guardrail and audit behavior.
+
+        ``AsyncTool`` instances are awaited directly; synchronous tools run on
+        ``tool_executor`` so they never block the event loop.
+        """
+        loop = self._task_loop(task)
+        try:
+            tool, tool_input, timeout, call = next(loop)
+            while True:
+                try:
+                    tool_output = await self._arun_tool(tool, tool_input, timeout, call)
+                except Exception as exc:
+                    tool, tool_input, timeout, call = loop.throw(exc)
+                else:
+                    tool, tool_input, timeout, call = loop.send(tool_output)
+        except StopIteration as done:
+            return done.value
+
+    def _run_tool(
+        self,
+        tool: Tool,
+        tool_input: Dict[str, Any],
+        timeout: Optional[float],
+        call: Optional[Callable[[], Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        call = call or functools.partial(tool.run, tool_input)
+        if timeout is None:
+            return call()
+        if timeout <= 0:
+            raise StepTimeout(f"no time left to run {tool.name}")
+        if tool.inline:
+            # Opted out of the thread handoff; a call that overran its limit
+            # is failed once it returns (streamed calls stop at the next chunk).
+            started = time.monotonic()
+            output = call()
+            if time.monotonic() - started > timeout:
+                raise StepTimeout(f"{tool.name} exceeded {timeout:.3f}s")
+            return output
+        # Threads cannot be interrupted: a tool still running at the deadline
+        # is abandoned and its eventual result discarded.
+        future = self._watchdog().submit(call)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if future.done():
+                raise  # the tool itself raised TimeoutError
+            future.cancel()
+            raise StepTimeout(f"{tool.name} exceeded {timeout:.3f}s") from None
+
+    def _watchdog(self) -> Executor:
+        if self.tool_executor is not None:
+            return self.tool_executor
+        if self._watchdog_pool is None:
+            self._watchdog_pool = ThreadPoolExecutor(
+                max_workers=_WATCHDOG_THREADS, thread_name_prefix="tool-watchdog"
+            )
+        return self._watchdog_pool
+
+    async def _arun_tool(
+        self,
+        tool: Tool,
+        tool_input: Dict[str, Any],
+        timeout: Optional[float] = None,
+        call: Optional[Callable[[], Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        if timeout is not None and timeout <= 0:
+            raise StepTimeout(f"no time left to run {tool.name}")
+        try:
+            async with asyncio.timeout(timeout) as scope:
+                if isinstance(tool, AsyncTool):
+                    if call is None:
+                        return await tool.arun(tool_input)
+                    if isinstance(call, _CachedCall):
+                        return await call.acall()
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.tool_executor, call or functools.partial(tool.run, tool_input)
+                )
+        except TimeoutError:
+            if not scope.expired():
+                raise  # the tool itself raised TimeoutError
+            raise StepTimeout(f"{tool.name} exceeded {timeout:.3f}s") from None
+
+    def _stream_tool(
+        self,
+        task: Task,
+        tool: StreamingTool,
+        tool_input: Dict[str, Any],
+        inspector: StreamingInspector,
+        cancelled: threading.Event,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Runs a streaming tool through ``inspector``, forwarding screened chunks to the sink.
+
+        Chunks are screened one at a time either way. Without a sink the
+        screened chunks make up the returned text; with one they are forwarded
+        and only a preview is kept. Once ``cancelled`` is set (the step timed
+        out and this call was abandoned) nothing more is read from the tool or
+        forwarded. Past ``deadline`` (``time.monotonic()``) the next chunk
+        raises ``StepTimeout``.
+        """
+        source = _guarded_stream(tool.stream(tool_input), cancelled, deadline, tool.name)
+        chunks = inspector.inspect(source)
+        sink = self.output_sink
+        limit = _STREAM_PREVIEW_CHARS if sink is not None else None
+        kept: List[str] = []
+        held = streamed = 0
+        try:
+            for chunk in chunks:
+                if cancelled.is_set():
+                    break
+                streamed += len(chunk)
+                if sink is not None:
+                    sink(task.task_id, tool.name, chunk)
+                if limit is None:
+                    kept.append(chunk)
+                elif held < limit:
+                    kept.append(chunk[:limit - held])
+                    held += len(kept[-1])
+        finally:
+            chunks.close()
+        if sink is None:
+            return tool.result("".join(kept))
+        return tool.result("".join(kept), streamed_chars=streamed)
+
+    def _step_timeout(self, task_deadline: Optional[float]) -> Tuple[Optional[float], bool]:
+        """Returns the time limit for the next step and whether the task budget sets it."""
+        step_limit = float(self.config.step_timeout_seconds) if self.config.step_timeout_seconds > 0 else None
+        if task_deadline is None:
+            return step_limit, False
+        remaining = max(0.0, task_deadline - time.monotonic())
+        if step_limit is None or remaining < step_limit:
+            return remaining, True
+        return step_limit, False
+
+    def _task_loop(self, task: Task) -> TaskLoop:
+        clock = time.perf_counter_ns
+        trace = self.tracer.start(task.task_id) if self.tracer is not None else NULL_TRACE
+        # Pin one policy snapshot so a concurrent reload never splits a task
+        # across two policies.
+        try:
+            snapshot = self.guardrail_engine.task_snapshot(task)
+        except UnknownTenant as exc:
+            trace.finish(status="rejected")
+            return self.audit_logger.log_rejection(
+                task, "unknown_tenant", f"No policy is loaded for tenant {exc.args[0]!r}.", source="policy"
+            )
+        checks = self.guardrail_engine.route(task, None, snapshot).checks
+        record = self.audit_logger.start_task(task, policy=snapshot.describe())
         step_results: List[StepResult] = []
-        self.guardrail_engine.assert_task_safe(task)
+        began = clock()
+        try:
+            self.guardrail_engine.assert_task_safe(task, snapshot=snapshot)
+        except Exception as exc:
+            trace.add("guardrails.task", began, clock(), **{"guardrail.checks": checks, "error": type(exc).__name__})
+            trace.finish(status="rejected")
+            raise
+        trace.add("guardrails.task", began, clock(), **{"guardrail.checks": checks})
+        task_deadline = (
+            time.monotonic() + self.config.task_timeout_seconds
+            if self.config.task_timeout_seconds > 0
+            else None
+        )
 
         for step in range(1, self.config.max_steps + 1):
+            start_ns = clock()
             planned = self.planner.plan(task, step_results)
-            start_time = time.time()
+            mark = clock()
+            trace.add("planner", start_ns, mark, step)
 
             if planned.should_terminate:
-                self.audit_logger.log_reasoning(step, planned.rationale)
+                self.audit_logger.log_reasoning(step, planned.rationale, record=record)
+                trace.add("audit.write", mark, clock(), step)
                 break
 
             tool_name = planned.tool_name
             tool_input = planned.tool_input or {}
             rationale = planned.rationale
 
-            blocked, violation_reason = self.guardrail_engine.inspect_tool_request(
-                task, tool_name, tool_input
+            # The check plan for this role, model and tool, precompiled in the snapshot.
+            plan = self.guardrail_engine.route(task, tool_name, snapshot)
+            if plan.denied is not None:
+                trace.add("guardrails.request", mark, clock(), step, **{"guardrail.denied": plan.denied})
+                step_result = StepResult(
+                    step=step,
+                    rationale=f"{rationale} Not permitted by policy.",
+                    tool_used=tool_name,
+                    tool_input=tool_input,
+                    tool_output=None,
+                    latency_ms=(clock() - start_ns) / 1e6,
+                    blocked=True,
+                    violation=plan.denied,
+                )
+                step_results.append(step_result)
+                self._log_step(step_result, record, trace)
+                break
+            step_snapshot = plan.snapshot
+            blocked, violation_reason, request_hits = self.guardrail_engine.screen_tool_request(
+                tool_input, snapshot=step_snapshot
             )
+            trace.add("guardrails.request", mark, clock(), step, **_check_attributes(plan.checks, request_hits))
             if blocked:
-                latency_ms = (time.time() - start_time) * 1000
+                latency_ms = (clock() - start_ns) / 1e6
                 step_result = StepResult(
                     step=step,
                     rationale=rationale,
@@ -62,16 +335,20 @@ class AgentOrchestrator:
                     latency_ms=latency_ms,
                     blocked=True,
                     violation=violation_reason,
+                    findings=_findings(request_hits, "input"),
                 )
                 step_results.append(step_result)
-                self.audit_logger.log_step(step_result)
+                self._log_step(step_result, record, trace)
                 break
 
             tool = self.tools.get(tool_name) if tool_name else None
             tool_output = None
+            output_violation = None
+            output_hits: List[PayloadHit] = []
+            from_cache = False
 
             if tool is None and tool_name is not None:
-                latency_ms = (time.time() - start_time) * 1000
+                latency_ms = (clock() - start_ns) / 1e6
                 step_result = StepResult(
                     step=step,
                     rationale="Requested tool not registered; aborting.",
@@ -83,15 +360,81 @@ class AgentOrchestrator:
                     violation="unknown_tool",
                 )
                 step_results.append(step_result)
-                self.audit_logger.log_step(step_result)
+                self._log_step(step_result, record, trace)
                 break
 
             if tool:
+                mark = clock()
                 tool.validate_input(tool_input)
-                tool_output = tool.run(tool_input)
+                trace.add("validate.input", mark, clock(), step, tool=tool.name)
+                timeout, budget_bound = self._step_timeout(task_deadline)
+                inspector = call = cached = cancelled = None
+                if isinstance(tool, StreamingTool):
+                    inspector = self.guardrail_engine.output_inspector(step_snapshot)
+                    cancelled = threading.Event()
+                    deadline = time.monotonic() + timeout if timeout is not None else None
+                    call = functools.partial(
+                        self._stream_tool, task, tool, tool_input, inspector, cancelled, deadline
+                    )
+                elif tool.cacheable and self.tool_cache is not None:
+                    key = cache_key(tool.name, tool_input)
+                    if key is not None:
+                        cached = self.tool_cache.get(key)
+                        call = _CachedCall(self.tool_cache, key, tool, tool_input)
+                mark = clock()
+                if cached is not None:
+                    tool_output = cached
+                else:
+                    try:
+                        tool_output = yield tool, tool_input, timeout, call
+                    except StepTimeout as exc:
+                        if cancelled is not None:
+                            cancelled.set()
+                        now = clock()
+                        trace.add("tool.run", mark, now, step, tool=tool.name, error="StepTimeout")
+                        latency_ms = (now - start_ns) / 1e6
+                        step_result = StepResult(
+                            step=step,
+                            rationale=f"{rationale} Step deadline exceeded: {exc}.",
+                            tool_used=tool_name,
+                            tool_input=tool_input,
+                            tool_output=None,
+                            latency_ms=latency_ms,
+                            blocked=True,
+                            violation="task_deadline_exceeded" if budget_bound else "step_timeout",
+                        )
+                        step_results.append(step_result)
+                        self._log_step(step_result, record, trace)
+                        break
+                from_cache = cached is not None or (isinstance(call, _CachedCall) and call.shared)
+                now = clock()
+                trace.add("tool.run", mark, now, step, tool=tool.name, cached=from_cache)
                 tool.validate_output(tool_output)
+                mark = clock()
+                trace.add("validate.output", now, mark, step, tool=tool.name)
+                tool_output, output_blocked, output_violation, output_hits = (
+                    self.guardrail_engine.screen_tool_output(tool_output, snapshot=step_snapshot, inspector=inspector)
+                )
+                trace.add("guardrails.output", mark, clock(), step, **_check_attributes(plan.checks, output_hits))
+                if output_blocked:
+                    latency_ms = (clock() - start_ns) / 1e6
+                    step_result = StepResult(
+                        step=step,
+                        rationale=f"{rationale} {OUTPUT_DISCARDED}",
+                        tool_used=tool_name,
+                        tool_input=tool_input,
+                        tool_output=None,
+                        latency_ms=latency_ms,
+                        blocked=True,
+                        violation=output_violation,
+                        findings=_findings(output_hits, "output"),
+                        cached=from_cache,
+                    )
+                    step_results.append(step_result)
+                    self._log_step(step_result, record, trace)
+                    break
 
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (clock() - start_ns) / 1e6
             step_result = StepResult(
                 step=step,
                 rationale=rationale,
@@ -99,14 +442,20 @@ class AgentOrchestrator:
                 tool_input=tool_input,
                 tool_output=tool_output,
                 latency_ms=latency_ms,
+                violation=output_violation,
+                findings=_findings(output_hits, "output"),
+                cached=from_cache,
             )
             step_results.append(step_result)
-            self.audit_logger.log_step(step_result)
+            self._log_step(step_result, record, trace)
 
             if tool_output and tool_output.get("complete"):
                 break
 
+        mark = clock()
         metrics = self.evaluation_tracker.summarize(task, step_results)
+        now = clock()
+        trace.add("evaluation", mark, now)
         safety_score = metrics.get("safety_score", 1.0)
         response = AgentResponse(
             task_id=task.task_id,
@@ -116,5 +465,94 @@ class AgentOrchestrator:
             metrics=metrics,
             safety_score=safety_score,
         )
-        self.audit_logger.end_task(response)
+        self.audit_logger.end_task(response, record=record)
+        trace.add("audit.end_task", now, clock())
+        if trace is not NULL_TRACE:
+            for step_result in step_results:
+                step_result.spans = trace.step_spans(step_result.step)
+        trace.finish(status=response.status, role=task.role)
         return response
+
+    def _log_step(self, step_result: StepResult, record: AuditRecord, trace: TaskTrace) -> None:
+        mark = time.perf_counter_ns()
+        self.audit_logger.log_step(step_result, record=record)
+        trace.add("audit.write", mark, time.perf_counter_ns(), step_result.step)
+
+    def run_batch(self, tasks: Iterable[Task], max_workers: Optional[int] = None) -> List[AgentResponse]:
+        """Runs tasks concurrently and returns their responses in input order.
+
+        Like ``Executor.map``, an exception raised by any task (for example a
+        ``GuardrailViolation`` from the task pre-check) is re-raised here.
+        """
+        batch = list(tasks)
+        responses: List[Optional[AgentResponse]] = [None] * len(batch)
+        for index, response in self.stream_batch(batch, max_workers=max_workers):
+            responses[index] = response
+        return responses  # type: ignore[return-value]
+
+    def stream_batch(
+        self, tasks: Iterable[Task], max_workers: Optional[int] = None
+    ) -> Iterator[Tuple[int, AgentResponse]]:
+        """Runs tasks on a thread pool, yielding ``(input_index, response)`` as each finishes."""
+        batch: Sequence[Task] = list(tasks)
+        if not batch:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-task") as pool:
+            futures: Dict[Future, int] = {
+                pool.submit(self.run_task, task): index for index, task in enumerate(batch)
+            }
+            try:
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    async def arun_batch(
+        self, tasks: Iterable[Task], max_concurrency: Optional[int] = None
+    ) -> List[AgentResponse]:
+        """Runs tasks on the current event loop and returns responses in input order."""
+        if max_concurrency is None:
+            return list(await asyncio.gather(*(self.arun_task(task) for task in tasks)))
+
+        limit = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(task: Task) -> AgentResponse:
+            async with limit:
+                return await self.arun_task(task)
+
+        return list(await asyncio.gather(*(bounded(task) for task in tasks)))
+
+
+def _guarded_stream(
+    chunks: Iterable[str], cancelled: threading.Event, deadline: Optional[float], name: str
+) -> Iterator[str]:
+    """Yields ``chunks`` until ``cancelled`` is set or ``deadline`` passes, then closes the source."""
+    source = iter(chunks)
+    try:
+        while not cancelled.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                raise StepTimeout(f"{name} passed its deadline while streaming")
+            try:
+                chunk = next(source)
+            except StopIteration:
+                return
+            yield chunk
+    finally:
+        close = getattr(source, "close", None)
+        if close is not None:
+            close()
+
+
+def _findings(hits: List[PayloadHit], where: str) -> List[Dict[str, Any]]:
+    return [{"check": hit.check, "path": hit.path, "in": where} for hit in hits]
+
+
+def _check_attributes(checks: Sequence[str], hits: List[PayloadHit]) -> Dict[str, Any]:
+    # The checks run as one combined scan, so they share a span; hits are
+    # counted per check.
+    attributes: Dict[str, Any] = {"guardrail.checks": checks}
+    for hit in hits:
+        key = f"guardrail.hits.{hit.check}"
+        attributes[key] = attributes.get(key, 0) + 1
+    return attributes
@@ -0,0 +1,327 @@
+"""Admission control and priority scheduling in front of the orchestrator.
+
+``TaskScheduler`` decides how much work the system accepts. Each submitted
+task must get a token from its role's bucket (``Task.role`` is the tenancy
+key) and from the bucket of the tool it will start with; it then waits in a
+bounded priority queue for one of a fixed set of workers. Work is shed
+rather than queued without limit:
+
+* ``rate_limited`` / ``tool_rate_limited`` - the role or tool bucket is empty;
+* ``queue_full`` - the queue is at ``max_queue``;
+* ``overloaded`` - the estimated queue wait already exceeds the latency target;
+* ``queue_timeout`` - the task's deadline passed before a worker was free.
+
+Every rejection is written to the audit log with status ``rejected`` and the
+violation ``admission:<reason>``.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from app.agent.orchestrator import AgentOrchestrator
+from app.agent.types import AgentResponse, Task
+from app.evaluation.sketch import DDSketch
+
+REJECTION_REASONS = ("rate_limited", "tool_rate_limited", "queue_full", "overloaded", "queue_timeout")
+# Weight of the newest observation in the service-time moving average.
+_EWMA_ALPHA = 0.1
+
+
+class AdmissionRejected(Exception):
+    """Raised (or set on the task's future) when admission control sheds a task."""
+
+    def __init__(self, task: Task, reason: str, detail: str) -> None:
+        super().__init__(f"Task {task.task_id} rejected ({reason}): {detail}")
+        self.task = task
+        self.reason = reason
+        self.detail = detail
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def refund(self, tokens: float = 1.0) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + tokens)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parses ``"analyst=50/100,admin=5"`` into ``{name: (rate, burst)}``.
+
+    The burst defaults to the rate (one second's worth of tokens).
+    """
+    limits: Dict[str, Tuple[float, float]] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        rate, _, burst = value.partition("/")
+        limits[name.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+@dataclass(order=True)
+class _Entry:
+    sort_key: Tuple[int, int]
+    task: Task = field(compare=False)
+    future: "Future[AgentResponse]" = field(compare=False)
+    enqueued: float = field(compare=False)
+    deadline: float = field(compare=False)
+    priority: int = field(compare=False)
+
+
+class TaskScheduler:
+    """Bounded, prioritized, rate-limited front door for ``AgentOrchestrator.run_task``.
+
+    ``submit`` raises ``AdmissionRejected`` for tasks refused on arrival and
+    otherwise returns a future for the task's ``AgentResponse``; a task shed
+    later (its deadline passed while queued) fails that future with
+    ``AdmissionRejected``. Higher ``priority`` runs first; equal priorities
+    run in arrival order.
+    """
+
+    def __init__(
+        self,
+        orchestrator: AgentOrchestrator,
+        workers: int = 4,
+        max_queue: int = 1000,
+        latency_target_ms: float = 2000.0,
+        role_limits: Optional[Mapping[str, Tuple[float, float]]] = None,
+        default_role_limit: Optional[Tuple[float, float]] = None,
+        tool_limits: Optional[Mapping[str, Tuple[float, float]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        max_role_buckets: int = 10_000,
+    ) -> None:
+        self.orchestrator = orchestrator
+        self.max_queue = max_queue
+        self.latency_target = latency_target_ms / 1000
+        self.clock = clock
+        self._role_limits = dict(role_limits or {})
+        self._default_role_limit = default_role_limit
+        # Buckets of recently seen rate-limited roles, least recently used first.
+        self.max_role_buckets = max_role_buckets
+        self._role_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._tool_buckets = {
+            name: TokenBucket(rate, burst, clock) for name, (rate, burst) in (tool_limits or {}).items()
+        }
+        self._heap: List[_Entry] = []
+        # Queued tasks per priority, for estimating how long a new arrival waits.
+        self._depth: Dict[int, int] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._service_time: Optional[float] = None
+        self.admitted = 0
+        self.completed = 0
+        self.rejected: Dict[str, int] = {reason: 0 for reason in REJECTION_REASONS}
+        self.queue_wait_ms = DDSketch()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"task-scheduler-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, task: Task, priority: int = 0, deadline_seconds: Optional[float] = None) -> "Future[AgentResponse]":
+        """Admits ``task`` or raises ``AdmissionRejected``.
+
+        ``deadline_seconds`` bounds how long the task may wait in the queue
+        (default: the latency target).
+        """
+        now = self.clock()
+        expired: List[_Entry] = []
+        try:
+            return self._admit(task, priority, deadline_seconds, now, expired)
+        finally:
+            for entry in expired:
+                self._expire(entry, now)
+
+    def _admit(
+        self, task: Task, priority: int, deadline_seconds: Optional[float], now: float, expired: List[_Entry]
+    ) -> "Future[AgentResponse]":
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("scheduler is closed")
+            if len(self._heap) >= self.max_queue or self._estimated_wait(priority) > self.latency_target:
+                # Tasks past their deadline must not hold places in the queue.
+                expired.extend(self._purge_expired(now))
+            queued = len(self._heap)
+            if queued >= self.max_queue:
+                reason, detail = "queue_full", f"{queued} tasks queued"
+            else:
+                wait = self._estimated_wait(priority)
+                if wait > self.latency_target:
+                    reason, detail = "overloaded", f"estimated queue wait {wait * 1000:.0f} ms"
+                else:
+                    reason, detail = self._take_tokens(task)
+            if reason is None:
+                entry = _Entry(
+                    sort_key=(-priority, next(self._sequence)),
+                    task=task,
+                    future=Future(),
+                    enqueued=now,
+                    deadline=now + (self.latency_target if deadline_seconds is None else deadline_seconds),
+                    priority=priority,
+                )
+                heapq.heappush(self._heap, entry)
+                self._depth[priority] = self._depth.get(priority, 0) + 1
+                self.admitted += 1
+                self._condition.notify()
+                return entry.future
+        raise self._reject(task, reason, detail)
+
+    def _purge_expired(self, now: float) -> List[_Entry]:
+        """Removes queued entries whose deadline has passed; the caller rejects them."""
+        expired = [entry for entry in self._heap if entry.deadline < now]
+        if expired:
+            self._heap = [entry for entry in self._heap if entry.deadline >= now]
+            heapq.heapify(self._heap)
+            for entry in expired:
+                self._depth[entry.priority] -= 1
+        return expired
+
+    def _expire(self, entry: _Entry, now: float) -> None:
+        if entry.future.set_running_or_notify_cancel():
+            waited = (now - entry.enqueued) * 1000
+            entry.future.set_exception(self._reject(entry.task, "queue_timeout", f"waited {waited:.0f} ms"))
+
+    def _estimated_wait(self, priority: int) -> float:
+        if self._service_time is None:
+            return 0.0
+        ahead = sum(count for level, count in self._depth.items() if level >= priority)
+        return ahead * self._service_time / max(1, len(self._workers))
+
+    def _take_tokens(self, task: Task) -> Tuple[Optional[str], str]:
+        role_bucket = self._role_bucket(task.role)
+        if role_bucket is not None and not role_bucket.try_acquire():
+            return "rate_limited", f"role {task.role!r} is over its rate limit"
+        tool = self._first_tool(task)
+        tool_bucket = self._tool_buckets.get(tool) if tool else None
+        if tool_bucket is not None and not tool_bucket.try_acquire():
+            if role_bucket is not None:
+                role_bucket.refund()
+            return "tool_rate_limited", f"tool {tool!r} is over its rate limit"
+        return None, ""
+
+    def _role_bucket(self, role: str) -> Optional[TokenBucket]:
+        bucket = self._role_buckets.get(role)
+        if bucket is not None:
+            self._role_buckets.move_to_end(role)
+            return bucket
+        limit = self._role_limits.get(role, self._default_role_limit)
+        if not limit:
+            return None
+        if len(self._role_buckets) >= self.max_role_buckets:
+            self._evict_role_buckets()
+        bucket = self._role_buckets[role] = TokenBucket(*limit, clock=self.clock)
+        return bucket
+
+    def _evict_role_buckets(self) -> None:
+        # A full bucket behaves exactly like a new one, so dropping it loses
+        # nothing; if that is not enough, the least recently used go.
+        for role in [role for role, bucket in self._role_buckets.items() if bucket.available() >= bucket.burst]:
+            del self._role_buckets[role]
+        while len(self._role_buckets) > self.max_role_buckets * 3 // 4:
+            self._role_buckets.popitem(last=False)
+
+    def _first_tool(self, task: Task) -> Optional[str]:
+        # The planner is deterministic, so its first step names the tool the
+        # task will start with.
+        return self.orchestrator.planner.plan(task, []).tool_name
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._heap and not self._closed:
+                    self._condition.wait()
+                if not self._heap:
+                    return
+                entry = heapq.heappop(self._heap)
+                self._depth[entry.priority] -= 1
+                started = self.clock()
+                self.queue_wait_ms.add((started - entry.enqueued) * 1000)
+            if not entry.future.set_running_or_notify_cancel():
+                continue
+            if started > entry.deadline:
+                waited = (started - entry.enqueued) * 1000
+                entry.future.set_exception(self._reject(entry.task, "queue_timeout", f"waited {waited:.0f} ms"))
+                continue
+            try:
+                response = self.orchestrator.run_task(entry.task)
+            except BaseException as exc:
+                entry.future.set_exception(exc)
+            else:
+                entry.future.set_result(response)
+            self._observe(self.clock() - started)
+
+    def _observe(self, service_time: float) -> None:
+        with self._condition:
+            self.completed += 1
+            if self._service_time is None:
+                self._service_time = service_time
+            else:
+                self._service_time += _EWMA_ALPHA * (service_time - self._service_time)
+
+    def _reject(self, task: Task, reason: str, detail: str) -> AdmissionRejected:
+        with self._condition:
+            self.rejected[reason] += 1
+        self.orchestrator.audit_logger.log_rejection(task, reason, detail)
+        return AdmissionRejected(task, reason, detail)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "admitted": self.admitted,
+                "completed": self.completed,
+                "rejected": dict(self.rejected),
+                "queue_depth": len(self._heap),
+                "service_time_ms": None if self._service_time is None else self._service_time * 1000,
+                "queue_wait_ms_p50": self.queue_wait_ms.quantile(0.5),
+                "queue_wait_ms_p99": self.queue_wait_ms.quantile(0.99),
+            }
+
+    def close(self, wait: bool = True) -> None:
+        """Stops accepting tasks; queued tasks still run unless ``wait`` is False."""
+        with self._condition:
+            self._closed = True
+            if not wait:
+                for entry in self._heap:
+                    entry.future.cancel()
+                self._heap.clear()
+                self._depth.clear()
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
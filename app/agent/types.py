@@ -1,4 +1,8 @@
-"""Type definitions for agent tasks and results."""
+"""Type definitions for agent tasks and results.
+
+The types are slotted: one of each is created per task or step, and
+``app.logging.encoding`` serializes them without going through ``vars()``.
+"""
 from __future__ import annotations
 
 from dataclasses import dataclass, field
@@ -6,7 +10,7 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """Represents a unit of work for the agent."""
 
@@ -15,9 +19,28 @@ class Task:
     role: str
     parameters: Dict[str, Any] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.utcnow)
+    # Selects the tenant's policy when guardrails run on a PolicyRegistry.
+    tenant: Optional[str] = None
+    # Model the task runs on, checked against the policy's allowed_models.
+    model: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Span:
+    """One timed phase (see ``app.logging.tracing``); ``step`` is None for task-level spans."""
+
+    name: str
+    start_ns: int
+    end_ns: int
+    step: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
 
 
-@dataclass
+@dataclass(slots=True)
 class StepResult:
     """Outcome of a single reasoning step."""
 
@@ -29,9 +52,16 @@ class StepResult:
     latency_ms: float
     blocked: bool = False
     violation: Optional[str] = None
+    # Where guardrail checks matched: {"check", "path", "in": "input"|"output"}.
+    findings: List[Dict[str, Any]] = field(default_factory=list)
+    # True when the output was reused from the tool result cache (or a
+    # concurrent identical call) instead of running the tool.
+    cached: bool = False
+    # Per-phase timings when the task was sampled for tracing.
+    spans: List[Span] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResponse:
     """Structured output returned to the caller."""
 
@@ -0,0 +1,432 @@
+"""Backtesting a candidate policy against historical audit logs.
+
+Every record in ``AUDIT_LOG_PATH`` (rotated and gzipped segments included)
+is re-checked with a candidate policy file or tenant directory: the task
+description, then each recorded tool call's input and output, resolved
+through the candidate's check plans exactly as the orchestrator would. Only
+verdicts that differ from the recorded ones are written, one JSON line each::
+
+    {"segment": "audit.jsonl.20261012T...", "offset": 81234, "task_id": "t1",
+     "item": "step", "step": 2, "tool": "data_lookup", "change": "blocked",
+     "recorded": {"blocked": false, "violation": null},
+     "candidate": {"blocked": true, "violation": "Policy violation: pii detected"}}
+
+``change`` is ``blocked`` (now blocked), ``allowed`` (no longer blocked) or
+``changed`` (same outcome, different violation). Like the orchestrator, a
+record stops at its first step the candidate blocks. Some recorded verdicts
+cannot be re-derived: outputs that were blocked are not logged, and redacted
+ones are logged after redaction. Those steps are re-checked on their input
+only and counted as ``unverified`` when the input passes.
+
+Segments are cut into ``--chunk-mb`` byte ranges (a gzipped segment is one
+range) that a process pool evaluates in parallel, each streaming its lines,
+so worker memory does not depend on the size of the log. Each range writes a
+part file with its own checkpoint; finished parts are appended to the output
+in log order and recorded in ``<output>.ckpt``, so ``--resume`` continues an
+interrupted run without losing or repeating differences.
+
+    python -m app.backtest --policy candidate.yaml --output diff.jsonl --processes 8
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.agent.orchestrator import OUTPUT_DISCARDED
+from app.agent.types import Task
+from app.guardrails.cache import VerdictCache
+from app.guardrails.policy import GuardrailEngine, GuardrailViolation
+from app.guardrails.registry import UnknownTenant
+from app.ingest import DEFAULT_ROLE, read_lines, split_ranges
+from app.logging.writer import list_segments
+from app.main import load_policies
+from app.utils.config import EnvironmentConfig
+
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+# Steps of tasks refused before any guardrail ran (``AuditLogger.log_rejection``).
+REJECTION_EVENTS = frozenset({"admission", "policy"})
+# Violations the orchestrator records for reasons other than policy; the
+# step's input had passed the policy.
+OPERATIONAL_VIOLATIONS = frozenset({"unknown_tool", "step_timeout", "task_deadline_exceeded"})
+
+Verdict = Tuple[bool, Optional[str]]
+_ALLOWED: Verdict = (False, None)
+
+# One engine per worker process, built by ``_init_worker``.
+_engine: Optional[GuardrailEngine] = None
+
+
+@dataclass
+class BacktestStats:
+    """Counts for a backtest; ``resumed_bytes`` were evaluated by an earlier run."""
+
+    records: int = 0
+    items: int = 0
+    diffs: int = 0
+    blocked: int = 0
+    allowed: int = 0
+    changed: int = 0
+    unverified: int = 0
+    skipped: int = 0
+    errors: int = 0
+    bytes: int = 0
+    resumed_bytes: int = 0
+    seconds: float = 0.0
+    # Candidate violation -> items it newly blocks.
+    violations: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def gb_per_second(self) -> float:
+        return (self.bytes - self.resumed_bytes) / self.seconds / 1e9 if self.seconds else 0.0
+
+    def merge(self, other: "BacktestStats") -> None:
+        for name in ("records", "items", "diffs", "blocked", "allowed", "changed", "unverified",
+                     "skipped", "errors", "bytes", "resumed_bytes"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for violation, count in other.violations.items():
+            self.violations[violation] = self.violations.get(violation, 0) + count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "gb_per_second": round(self.gb_per_second, 3)}
+
+
+@dataclass
+class RangeCheckpoint:
+    """Resume point of one byte range's part file."""
+
+    input_offset: int = 0
+    output_offset: int = 0
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RangeCheckpoint"]:
+        return _load(cls, path)
+
+    def save(self, path: str) -> None:
+        _save(self, path)
+
+
+@dataclass
+class BacktestCheckpoint:
+    """Resume point of a whole run: its ranges and how many are merged into the output."""
+
+    policy: str = ""
+    # [segment, start, end]; end is None for gzipped segments.
+    ranges: List[List[Any]] = field(default_factory=list)
+    merged: int = 0
+    output_offset: int = 0
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BacktestCheckpoint"]:
+        return _load(cls, path)
+
+    def save(self, path: str) -> None:
+        _save(self, path)
+
+
+def _load(cls: Any, path: str) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return cls(**json.load(handle))
+    except FileNotFoundError:
+        return None
+
+
+def _save(checkpoint: Any, path: str) -> None:
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as handle:
+        json.dump(asdict(checkpoint), handle)
+    os.replace(temp, path)
+
+
+def _stats(data: Dict[str, Any]) -> BacktestStats:
+    stats = BacktestStats(**data)
+    stats.resumed_bytes = stats.bytes
+    stats.seconds = 0.0
+    return stats
+
+
+def plan_ranges(log_path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[List[Any]]:
+    """``[segment, start, end]`` ranges covering every segment of ``log_path``, oldest first."""
+    ranges: List[List[Any]] = []
+    for segment in list_segments(log_path):
+        if segment.endswith(".gz"):
+            ranges.append([segment, 0, None])
+            continue
+        size = os.path.getsize(segment)
+        if size:
+            parts = -(-size // chunk_bytes)
+            ranges.extend([segment, start, end] for start, end in split_ranges(segment, parts))
+    return ranges
+
+
+def record_task(record: Dict[str, Any]) -> Task:
+    """The ``Task`` an audit record was started for, as far as guardrails need it."""
+    return Task(
+        task_id=str(record.get("task_id", "")),
+        description=str(record.get("description") or ""),
+        role=str(record.get("role") or DEFAULT_ROLE),
+        parameters=record.get("parameters") or {},
+        tenant=record.get("tenant") or (record.get("policy") or {}).get("tenant"),
+        model=record.get("model"),
+    )
+
+
+def compare_record(engine: GuardrailEngine, record: Dict[str, Any], stats: BacktestStats) -> List[Dict[str, Any]]:
+    """Re-checks one audit record against ``engine``; returns the verdicts that differ."""
+    steps = record.get("steps") or ()
+    if any(step.get("event") in REJECTION_EVENTS for step in steps):
+        stats.skipped += 1  # refused before any guardrail ran
+        return []
+    stats.records += 1
+    task = record_task(record)
+    found: List[Dict[str, Any]] = []
+
+    def compare(item: str, step: Optional[int], tool: Optional[str], recorded: Verdict, candidate: Verdict) -> None:
+        stats.items += 1
+        if candidate == recorded:
+            return
+        if candidate[0] and not recorded[0]:
+            change = "blocked"
+            stats.violations[str(candidate[1])] = stats.violations.get(str(candidate[1]), 0) + 1
+        elif recorded[0] and not candidate[0]:
+            change = "allowed"
+        else:
+            change = "changed"
+        setattr(stats, change, getattr(stats, change) + 1)
+        stats.diffs += 1
+        found.append({
+            "item": item, "step": step, "tool": tool, "change": change,
+            "recorded": {"blocked": recorded[0], "violation": recorded[1]},
+            "candidate": {"blocked": candidate[0], "violation": candidate[1]},
+        })
+
+    # Recorded tasks all passed the task-level checks: rejected ones are not logged.
+    try:
+        snapshot = engine.task_snapshot(task)
+    except UnknownTenant as exc:
+        compare("task", None, None, _ALLOWED, (True, f"policy:unknown_tenant ({exc.args[0]})"))
+        return found
+    try:
+        engine.assert_task_safe(task, snapshot)
+    except GuardrailViolation as exc:
+        compare("task", None, None, _ALLOWED, (True, str(exc)))
+        return found
+    compare("task", None, None, _ALLOWED, _ALLOWED)
+
+    for step in steps:
+        if "event" in step:
+            continue  # planner notes carry no verdict
+        tool = step.get("tool")
+        recorded: Verdict = (bool(step.get("blocked")), step.get("violation"))
+        if recorded[1] in OPERATIONAL_VIOLATIONS:
+            recorded = _ALLOWED
+        output_unknown = (recorded[0] and str(step.get("rationale", "")).endswith(OUTPUT_DISCARDED)) or (
+            not recorded[0] and str(recorded[1] or "").endswith(" (redacted)")
+        )
+        plan = engine.route(task, tool, snapshot)
+        if plan.denied is not None:
+            candidate: Verdict = (True, plan.denied)
+        else:
+            blocked, reason, _hits = engine.screen_tool_request(step.get("tool_input") or {}, plan.snapshot)
+            if blocked:
+                candidate = (True, reason)
+            elif output_unknown:
+                stats.unverified += 1
+                continue
+            elif step.get("tool_output") is not None:
+                _output, blocked, reason, _hits = engine.screen_tool_output(step["tool_output"], plan.snapshot)
+                candidate = (blocked, reason)
+            else:
+                candidate = _ALLOWED
+        compare("step", step.get("step"), tool, recorded, candidate)
+        if candidate[0]:
+            break
+    return found
+
+
+def _init_worker(policy_path: str, cache_bytes: int) -> None:
+    global _engine
+    config = EnvironmentConfig.from_env()
+    _engine = GuardrailEngine(
+        policy_manager=load_policies(policy_path),
+        verdict_cache=VerdictCache(cache_bytes) if cache_bytes > 0 else None,
+        max_payload_depth=config.guardrail_max_payload_depth,
+        max_payload_chars=config.guardrail_max_payload_chars,
+    )
+
+
+def backtest_range(
+    segment: str,
+    start: int,
+    end: Optional[int],
+    output_path: str,
+    resume: bool = False,
+    checkpoint_every: int = 1000,
+    engine: Optional[GuardrailEngine] = None,
+) -> BacktestStats:
+    """Compares every record starting in ``[start, end)`` of ``segment``; writes differences to ``output_path``."""
+    engine = engine or _engine
+    if engine is None:
+        raise RuntimeError("backtest_range needs an engine outside a backtest worker")
+    checkpoint_path = f"{output_path}.ckpt"
+    checkpoint = RangeCheckpoint.load(checkpoint_path) if resume else None
+    if checkpoint is not None:
+        stats = _stats(checkpoint.stats)
+        output = open(output_path, "r+b" if os.path.exists(output_path) else "w+b")
+        output.truncate(checkpoint.output_offset)
+        output.seek(checkpoint.output_offset)
+    else:
+        stats = BacktestStats()
+        checkpoint = RangeCheckpoint(input_offset=start)
+        output = open(output_path, "wb")
+    resume_from = max(start, checkpoint.input_offset)
+    since_checkpoint = 0
+    began = time.perf_counter()
+
+    def save() -> None:
+        output.flush()
+        checkpoint.output_offset = output.tell()
+        checkpoint.stats = asdict(stats)
+        checkpoint.save(checkpoint_path)
+
+    try:
+        opener = gzip.open if segment.endswith(".gz") else open
+        with opener(segment, "rb") as source:
+            for offset, next_offset, line in read_lines(source, resume_from, end, align=resume_from == start and start > 0):
+                stats.bytes += next_offset - offset
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError(f"expected an object, got {type(record).__name__}")
+                    found = compare_record(engine, record, stats)
+                except Exception as exc:
+                    stats.errors += 1
+                    found = [{"error": f"{type(exc).__name__}: {exc}"}]
+                    record = {}
+                for diff in found:
+                    entry = {"segment": segment, "offset": offset, "task_id": record.get("task_id"), **diff}
+                    output.write((json.dumps(entry, default=str) + "\n").encode("utf-8"))
+                checkpoint.input_offset = next_offset
+                since_checkpoint += 1
+                if since_checkpoint >= checkpoint_every:
+                    save()
+                    since_checkpoint = 0
+        save()
+    finally:
+        output.close()
+    stats.seconds = time.perf_counter() - began
+    return stats
+
+
+def backtest(
+    log_path: str,
+    policy_path: str,
+    output_path: str,
+    processes: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    resume: bool = False,
+    checkpoint_every: int = 1000,
+    cache_bytes: int = DEFAULT_CACHE_BYTES,
+) -> BacktestStats:
+    """Backtests ``policy_path`` over every segment of ``log_path`` with ``processes`` workers.
+
+    The ranges are fixed when a run starts (the live file up to its size
+    then); ``resume=True`` continues that run.
+    """
+    load_policies(policy_path)  # fail here rather than in every worker
+    checkpoint_path = f"{output_path}.ckpt"
+    state = BacktestCheckpoint.load(checkpoint_path) if resume else None
+    # Part checkpoints only belong to the run being resumed.
+    resume = state is not None
+    if state is not None:
+        if state.policy != policy_path:
+            raise ValueError(f"{checkpoint_path} belongs to a backtest of {state.policy}, not {policy_path}")
+        totals = _stats(state.stats)
+        output = open(output_path, "r+b" if os.path.exists(output_path) else "w+b")
+        output.truncate(state.output_offset)
+        output.seek(state.output_offset)
+    else:
+        state = BacktestCheckpoint(policy=policy_path, ranges=plan_ranges(log_path, chunk_bytes))
+        totals = BacktestStats()
+        output = open(output_path, "wb")
+    ranges = state.ranges
+    # Finished parts wait on disk until every earlier one is merged; the
+    # window bounds how many can pile up.
+    window = max(1, processes) * 4
+    began = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(policy_path, cache_bytes))
+    try:
+        running: Dict["Future[BacktestStats]", int] = {}
+        finished: Dict[int, BacktestStats] = {}
+        submitted = state.merged
+        while state.merged < len(ranges):
+            while submitted < len(ranges) and submitted - state.merged < window:
+                segment, start, end = ranges[submitted]
+                future = pool.submit(
+                    backtest_range, segment, start, end, f"{output_path}.part{submitted}", resume, checkpoint_every
+                )
+                running[future] = submitted
+                submitted += 1
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[running.pop(future)] = future.result()
+            while state.merged in finished:
+                part_path = f"{output_path}.part{state.merged}"
+                with open(part_path, "rb") as part:
+                    shutil.copyfileobj(part, output)
+                output.flush()
+                totals.merge(finished.pop(state.merged))
+                state.merged += 1
+                state.output_offset = output.tell()
+                state.stats = asdict(totals)
+                state.save(checkpoint_path)
+                os.remove(part_path)
+                os.remove(f"{part_path}.ckpt")
+    finally:
+        # Ranges not started yet are dropped; running ones checkpoint as they go.
+        pool.shutdown(wait=True, cancel_futures=True)
+        output.close()
+    totals.seconds = time.perf_counter() - began
+    return totals
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Backtest a candidate policy against the audit log.")
+    parser.add_argument("--log", default=os.getenv("AUDIT_LOG_PATH"), help="Audit log path (default: $AUDIT_LOG_PATH)")
+    parser.add_argument("--policy", required=True, help="Candidate policy file, or a directory of per-tenant policies")
+    parser.add_argument("--output", required=True, help="Where to write verdict differences (JSON lines)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_BYTES >> 20, help="Byte range per work unit")
+    parser.add_argument("--resume", action="store_true", help="Continue from the output's checkpoint")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Records between range checkpoints")
+    parser.add_argument("--cache-bytes", type=int, default=DEFAULT_CACHE_BYTES, help="Verdict cache per worker (0: off)")
+    args = parser.parse_args(argv)
+    if not args.log:
+        parser.error("--log is required when AUDIT_LOG_PATH is not set")
+
+    stats = backtest(
+        args.log,
+        args.policy,
+        args.output,
+        processes=args.processes,
+        chunk_bytes=args.chunk_mb << 20,
+        resume=args.resume,
+        checkpoint_every=args.checkpoint_every,
+        cache_bytes=args.cache_bytes,
+    )
+    print(json.dumps(stats.to_dict()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Fleet-level streaming metrics built from per-task evaluations.
+
+``MetricsAggregator`` keeps rolling statistics per tool, role and violation in
+constant memory (quantile sketches and time-windowed counters), so latency
+percentiles and block rates never require reprocessing logs. Workers exchange
+``snapshot()`` dicts and ``merge`` them cheaply; ``render_prometheus`` provides
+the text for a scrape endpoint.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.agent.types import StepResult, Task
+from app.evaluation.sketch import DDSketch, WindowedCounter
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Stats:
+    """Count, block count, latency sketch and windowed rates for one key."""
+
+    __slots__ = ("count", "blocked", "latency", "recent", "recent_blocked")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.blocked = 0
+        self.latency = DDSketch()
+        self.recent = WindowedCounter()
+        self.recent_blocked = WindowedCounter()
+
+    def observe(self, latency_ms: float, blocked: bool, now: Optional[float]) -> None:
+        self.count += 1
+        self.latency.add(latency_ms)
+        self.recent.add(1, now)
+        if blocked:
+            self.blocked += 1
+            self.recent_blocked.add(1, now)
+
+    def merge(self, other: "_Stats") -> None:
+        self.count += other.count
+        self.blocked += other.blocked
+        self.latency.merge(other.latency)
+        self.recent.merge(other.recent)
+        self.recent_blocked.merge(other.recent_blocked)
+
+    def summary(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "count": self.count,
+            "blocked": self.blocked,
+            "block_rate": self.blocked / self.count if self.count else 0.0,
+            "count_last_5m": self.recent.total(300),
+            "blocked_last_5m": self.recent_blocked.total(300),
+        }
+        for q in QUANTILES:
+            result[f"latency_ms_p{int(q * 100)}"] = self.latency.quantile(q)
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "blocked": self.blocked,
+            "latency": self.latency.to_dict(),
+            "recent": self.recent.to_dict(),
+            "recent_blocked": self.recent_blocked.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_Stats":
+        stats = cls()
+        stats.count = data["count"]
+        stats.blocked = data["blocked"]
+        stats.latency = DDSketch.from_dict(data["latency"])
+        stats.recent = WindowedCounter.from_dict(data["recent"])
+        stats.recent_blocked = WindowedCounter.from_dict(data["recent_blocked"])
+        return stats
+
+
+class MetricsAggregator:
+    """Thread-safe rolling statistics across every task a worker processes.
+
+    ``violation`` statistics are keyed by guardrail check (from the step's
+    findings) or by violation code (e.g. ``step_timeout``), not by the
+    free-text message. Each dimension keeps at most ``max_keys`` keys; later
+    ones (e.g. roles from user input) are folded into ``OTHER``, so memory
+    stays bounded whatever the traffic.
+    """
+
+    DIMENSIONS = ("task", "tool", "role", "violation")
+    OTHER = "other"
+
+    def __init__(self, max_keys: int = 64) -> None:
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _Stats] = {}
+        self._key_counts: Dict[str, int] = {}
+
+    def _get(self, dimension: str, key: str) -> _Stats:
+        stats = self._stats.get((dimension, key))
+        if stats is None:
+            if self._key_counts.get(dimension, 0) >= self.max_keys:
+                key = self.OTHER
+                stats = self._stats.get((dimension, key))
+            if stats is None:
+                stats = self._stats[(dimension, key)] = _Stats()
+                if key != self.OTHER:
+                    self._key_counts[dimension] = self._key_counts.get(dimension, 0) + 1
+        return stats
+
+    def observe(self, task: Task, steps: Iterable[StepResult], now: Optional[float] = None) -> None:
+        """Folds one finished task into the rolling statistics."""
+        steps = list(steps)
+        total_latency = sum(s.latency_ms for s in steps)
+        blocked = any(s.blocked for s in steps)
+        with self._lock:
+            self._get("task", "all").observe(total_latency, blocked, now)
+            self._get("role", task.role).observe(total_latency, blocked, now)
+            for step in steps:
+                if step.tool_used:
+                    self._get("tool", step.tool_used).observe(step.latency_ms, step.blocked, now)
+                if step.violation:
+                    for check in violation_keys(step):
+                        self._get("violation", check).observe(step.latency_ms, step.blocked, now)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Per-dimension summaries, e.g. ``summary()["tool"]["data_lookup"]["latency_ms_p99"]``."""
+        with self._lock:
+            items = [(key, stats.summary()) for key, stats in self._stats.items()]
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {d: {} for d in self.DIMENSIONS}
+        for (dimension, key), summary in items:
+            result[dimension][key] = summary
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable, mergeable state for shipping to another worker."""
+        with self._lock:
+            return {
+                "stats": [
+                    {"dimension": dimension, "key": key, **stats.to_dict()}
+                    for (dimension, key), stats in self._stats.items()
+                ]
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Adds another worker's ``snapshot()`` into this aggregator."""
+        incoming = [
+            ((entry["dimension"], entry["key"]), _Stats.from_dict(entry)) for entry in snapshot["stats"]
+        ]
+        with self._lock:
+            for key, stats in incoming:
+                self._get(*key).merge(stats)
+
+    def render_prometheus(self, prefix: str = "agent") -> str:
+        """Prometheus text exposition of the current statistics."""
+        lines: List[str] = [
+            f"# TYPE {prefix}_events_total counter",
+            f"# TYPE {prefix}_blocked_total counter",
+            f"# TYPE {prefix}_latency_ms summary",
+        ]
+        for dimension, keys in self.summary().items():
+            for key, summary in sorted(keys.items()):
+                label = '{dimension="%s",key="%s"}' % (dimension, _escape(key))
+                lines.append(f"{prefix}_events_total{label} {summary['count']}")
+                lines.append(f"{prefix}_blocked_total{label} {summary['blocked']}")
+                for q in QUANTILES:
+                    value = summary[f"latency_ms_p{int(q * 100)}"]
+                    if value is not None:
+                        quantile_label = label[:-1] + f',quantile="{q}"}}'
+                        lines.append(f"{prefix}_latency_ms{quantile_label} {value:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+def violation_keys(step: StepResult) -> List[str]:
+    """The checks behind a step's violation, or its violation code when no finding names one."""
+    checks = list(dict.fromkeys(finding["check"] for finding in step.findings if finding.get("check")))
+    return checks or [violation_code(step.violation or "")]
+
+
+def violation_code(violation: str) -> str:
+    """``"pii"`` for ``"Policy violation: pii detected"``, ``"pii (redacted)"`` or ``"pii violation"``."""
+    match = _VIOLATION_MESSAGE.fullmatch(violation)
+    if match is None:
+        return violation
+    return match.group("detected") or match.group("named")
+
+
+# The messages GuardrailEngine builds around a check name; codes such as
+# ``step_timeout`` or ``admission:queue_full`` are used as they are.
+_VIOLATION_MESSAGE = re.compile(
+    r"(?:Policy violation: (?P<detected>\S+) detected)|(?P<named>\S+) (?:violation|\(redacted\)|\(redaction required\))"
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,21 +1,36 @@
 """Evaluation and safety scoring for agent tasks."""
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from app.agent.types import StepResult, Task
+from app.evaluation.aggregator import MetricsAggregator
+
+
+# Violations recorded by the orchestrator when a step runs out of time.
+TIMEOUT_VIOLATIONS = ("step_timeout", "task_deadline_exceeded")
 
 
 class EvaluationTracker:
-    """Produces lightweight metrics for each task."""
+    """Produces lightweight metrics for each task.
+
+    When an ``aggregator`` is supplied every summarized task is also folded
+    into its fleet-level rolling statistics.
+    """
+
+    def __init__(self, aggregator: Optional[MetricsAggregator] = None) -> None:
+        self.aggregator = aggregator
 
     def summarize(self, task: Task, steps: List[StepResult]) -> Dict[str, float]:
         blocked_steps = [s for s in steps if s.blocked]
+        timed_out_steps = [s for s in steps if s.violation in TIMEOUT_VIOLATIONS]
         total_latency = sum(s.latency_ms for s in steps)
         status = "ok" if not blocked_steps else "blocked"
         safety_score = 1.0
         if blocked_steps:
             safety_score = max(0.1, 1 - 0.1 * len(blocked_steps))
+        if self.aggregator is not None:
+            self.aggregator.observe(task, steps)
 
         return {
             "task_id": task.task_id,
@@ -23,6 +38,8 @@ class EvaluationTracker:
             "step_count": len(steps),
             "blocked_steps": len(blocked_steps),
             "latency_ms_total": total_latency,
+            "timed_out_steps": len(timed_out_steps),
+            "timeout_latency_ms": sum(s.latency_ms for s in timed_out_steps),
             "safety_score": safety_score,
             "summary": self._build_summary(task, status, steps),
         }
@@ -31,6 +48,8 @@ class EvaluationTracker:
         if status == "blocked":
             violations = [s.violation for s in steps if s.violation]
             violation = violations[-1] if violations else "unknown"
+            if violation in TIMEOUT_VIOLATIONS:
+                return f"Task stopped after exceeding its time limit: {violation}."
             return f"Task blocked due to guardrail violation: {violation}."
         if steps and steps[-1].tool_output:
             return f"Task completed using {steps[-1].tool_used}."
@@ -0,0 +1,151 @@
+"""Mergeable, constant-memory summaries for streaming metrics."""
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+
+class DDSketch:
+    """Quantile sketch with relative-error guarantees (DDSketch).
+
+    Values land in logarithmic buckets so any quantile is within
+    ``relative_accuracy`` of the true value. Sketches with the same accuracy
+    merge by adding bucket counts, and ``max_bins`` caps memory by collapsing
+    the lowest buckets, which only affects the smallest quantiles.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zero_count += 1  # latencies and sizes are never negative
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        keys = sorted(self.bins)
+        overflow = keys[: len(keys) - self.max_bins + 1]
+        target = keys[len(overflow)]
+        self.bins[target] += sum(self.bins.pop(key) for key in overflow)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def merge(self, other: "DDSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(key): count for key, count in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_bins: int = 2048) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], max_bins=max_bins)
+        sketch.bins = {int(key): count for key, count in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if data["count"]:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+class WindowedCounter:
+    """Counts events in a ring of fixed-width time windows.
+
+    Memory is fixed at ``windows`` slots; ``total(seconds)`` sums the windows
+    overlapping the most recent ``seconds``.
+    """
+
+    def __init__(self, window_seconds: float = 60.0, windows: int = 60) -> None:
+        self.window_seconds = window_seconds
+        self.windows = windows
+        self._ids: List[int] = [-1] * windows
+        self._counts: List[int] = [0] * windows
+
+    def _slot(self, window_id: int) -> int:
+        slot = window_id % self.windows
+        if self._ids[slot] != window_id:
+            self._ids[slot] = window_id
+            self._counts[slot] = 0
+        return slot
+
+    def add(self, amount: int = 1, now: Optional[float] = None) -> None:
+        window_id = int((time.time() if now is None else now) // self.window_seconds)
+        self._counts[self._slot(window_id)] += amount
+
+    def total(self, seconds: Optional[float] = None, now: Optional[float] = None) -> int:
+        current = int((time.time() if now is None else now) // self.window_seconds)
+        span = self.windows if seconds is None else min(self.windows, math.ceil(seconds / self.window_seconds))
+        oldest = current - span + 1
+        return sum(c for i, c in zip(self._ids, self._counts) if oldest <= i <= current)
+
+    def merge(self, other: "WindowedCounter") -> None:
+        for window_id, count in zip(other._ids, other._counts):
+            if window_id < 0:
+                continue
+            slot = window_id % self.windows
+            if self._ids[slot] > window_id:
+                continue  # ours is newer; theirs has aged out
+            self._counts[self._slot(window_id)] += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window_seconds": self.window_seconds,
+            "windows": {str(i): c for i, c in zip(self._ids, self._counts) if i >= 0 and c},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], windows: int = 60) -> "WindowedCounter":
+        counter = cls(data["window_seconds"], windows)
+        for window_id, count in data["windows"].items():
+            counter._counts[counter._slot(int(window_id))] += count
+        return counter
@@ -0,0 +1,90 @@
+"""Bounded memoization of guardrail scan verdicts.
+
+Traffic repeats the same descriptions and tool inputs many times, so the
+result of scanning a string is cached under (scanner id, check set, content
+key). Short strings are their own key; longer ones are keyed by
+a 128-bit BLAKE2 digest so the cache never holds large payloads.
+"""
+from __future__ import annotations
+
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Strings up to this length are cheaper to keep than to hash.
+INLINE_KEY_CHARS = 256
+# Rough per-entry bookkeeping cost (OrderedDict node, key tuple, verdict tuple).
+_ENTRY_OVERHEAD = 200
+
+CacheKey = Tuple[int, Tuple[str, ...], object]
+
+
+class VerdictCache:
+    """Thread-safe LRU cache of scan verdicts, bounded in bytes and entries.
+
+    Keys start with the ``CompiledScanner.cache_id`` that produced the
+    verdict. A reload that changes the checks compiles a new scanner, so stale
+    verdicts are never served, while tenants and snapshots sharing a scanner
+    share its entries. Entries of retired scanners age out of the LRU.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entries: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[Tuple[str, ...], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_key(text: str) -> object:
+        if len(text) <= INLINE_KEY_CHARS:
+            return text
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def get(self, key: CacheKey) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: CacheKey, verdict: Tuple[str, ...]) -> None:
+        size = sys.getsizeof(key[2]) + _ENTRY_OVERHEAD
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (verdict, size)
+            self._bytes += size
+            while self._entries and (
+                self._bytes > self.max_bytes
+                or (self.max_entries is not None and len(self._entries) > self.max_entries)
+            ):
+                _key, (_verdict, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,304 @@
+"""Dictionary checks: large term lists matched with an Aho-Corasick automaton.
+
+A policy declares term lists under ``dictionaries`` and enables them through
+``checks`` like any other check::
+
+    policy:
+      checks: [pii, blocked_tickers]
+      dictionaries:
+        blocked_tickers:
+          path: dictionaries/tickers.txt   # one term per line, relative to the policy
+          case_sensitive: true             # default false (case-folded)
+        toxic_terms:
+          terms: ["some phrase", "another"]
+          whole_words: false               # default true
+
+Terms are compiled into one automaton per matching mode, so scanning is a
+single pass whose cost depends on the input, not the number of terms. With
+``whole_words`` (the default) the automaton runs over word tokens (``\\w+``):
+a term matches only as whole words, and the words of a multi-word term may be
+separated by any non-word characters. Otherwise it runs over characters and
+matches terms anywhere, folding case per character.
+
+Building an automaton for tens of thousands of terms takes a while, so
+``build_matchers`` reuses automata from the previous snapshot and from an
+on-disk cache keyed by the terms' digest.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import marshal
+import os
+import re
+import sys
+from collections import deque
+from itertools import compress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+# Bump when the cached layout changes; marshal data is also interpreter-specific.
+_CACHE_FORMAT = f"aho-corasick-1-py{sys.version_info[0]}{sys.version_info[1]}"
+_NO_CHILDREN: Dict[str, int] = {}
+
+
+class DictionaryError(ValueError):
+    """Raised when a dictionary definition in a policy is invalid."""
+
+
+@dataclass(frozen=True)
+class DictionarySpec:
+    """One term list as declared in a policy."""
+
+    name: str
+    terms: Tuple[str, ...]
+    case_sensitive: bool = False
+    whole_words: bool = True
+
+    @property
+    def mode(self) -> Tuple[bool, bool]:
+        return self.case_sensitive, self.whole_words
+
+
+def load_spec(name: str, options: Mapping[str, Any], base_dir: Path) -> DictionarySpec:
+    """Reads a ``dictionaries`` entry; ``path`` is resolved against ``base_dir``."""
+    if not isinstance(options, Mapping):
+        raise DictionaryError(f"dictionary '{name}' must be a mapping")
+    terms: List[str] = [str(term) for term in options.get("terms") or ()]
+    path = options.get("path")
+    if path:
+        with open(base_dir / path, "r", encoding="utf-8") as handle:
+            terms.extend(map(str.strip, handle.read().splitlines()))
+    terms = [term for term in terms if term and term[0] != "#"]
+    if not terms:
+        raise DictionaryError(f"dictionary '{name}' has no terms")
+    return DictionarySpec(
+        name=name,
+        terms=tuple(terms),
+        case_sensitive=bool(options.get("case_sensitive", False)),
+        whole_words=bool(options.get("whole_words", True)),
+    )
+
+
+class DictionaryMatcher:
+    """Aho-Corasick automaton over the terms of every dictionary sharing one mode.
+
+    States are list indices; ``_goto[state]`` maps a symbol (a word or a
+    character) to the next state, ``_fail`` holds failure links and
+    ``_out[state]`` the ``(check index, length in symbols)`` of every term
+    ending there, including those reached through failure links.
+    """
+
+    def __init__(
+        self,
+        checks: Tuple[str, ...],
+        case_sensitive: bool,
+        whole_words: bool,
+        goto: List[Dict[str, int]],
+        fail: List[int],
+        out: List[Tuple[Tuple[int, int], ...]],
+        digest: str,
+    ) -> None:
+        self.checks = checks
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        self.digest = digest
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        # Symbols that can start a term.
+        self._first = frozenset(goto[0])
+
+    @classmethod
+    def build(cls, specs: Sequence[DictionarySpec], digest: str = "") -> "DictionaryMatcher":
+        case_sensitive, whole_words = specs[0].mode
+        checks = tuple(spec.name for spec in specs)
+        goto: List[Dict[str, int]] = [{}]
+        terminal: Dict[int, Set[Tuple[int, int]]] = {}
+        for index, spec in enumerate(specs):
+            for term in spec.terms:
+                symbols = _symbols(term, case_sensitive, whole_words)
+                if not symbols:
+                    continue
+                state = 0
+                for symbol in symbols:
+                    children = goto[state]
+                    following = children.get(symbol)
+                    if following is None:
+                        following = children[symbol] = len(goto)
+                        goto.append({})
+                    state = following
+                terminal.setdefault(state, set()).add((index, len(symbols)))
+
+        fail = [0] * len(goto)
+        out: List[Tuple[Tuple[int, int], ...]] = [()] * len(goto)
+        queue = deque(goto[0].values())
+        for state in queue:
+            out[state] = tuple(sorted(terminal.get(state, ())))
+        while queue:
+            state = queue.popleft()
+            for symbol, child in goto[state].items():
+                link = fail[state]
+                while link and symbol not in goto[link]:
+                    link = fail[link]
+                target = goto[link].get(symbol, 0)
+                fail[child] = target if target != child else 0
+                out[child] = tuple(sorted(terminal.get(child, set()) | set(out[fail[child]])))
+                queue.append(child)
+        goto = [children or _NO_CHILDREN for children in goto]
+        return cls(checks, case_sensitive, whole_words, goto, fail, out, digest)
+
+    def _symbols(self, text: str, pos: int) -> List[str]:
+        """The (folded) symbols of ``text[pos:]``, without their offsets."""
+        fold = not self.case_sensitive
+        if self.whole_words:
+            if not fold:
+                symbols = _WORD.findall(text, pos)
+            elif text.isascii():
+                # ASCII lower-casing keeps word boundaries, so fold the whole text at once.
+                symbols = _WORD.findall(text.lower(), pos)
+            else:
+                symbols = [word.casefold() for word in _WORD.findall(text, pos)]
+            if self._partial_word(text, pos) and symbols:
+                del symbols[0]
+            return symbols
+        if not fold:
+            return list(text[pos:])
+        if text.isascii():
+            return list(text[pos:].lower())
+        return [char.casefold() for char in text[pos:]]
+
+    def _offsets(self, text: str, pos: int) -> List[Tuple[int, int]]:
+        """``(start, end)`` of each symbol returned by ``_symbols``."""
+        if not self.whole_words:
+            return [(index, index + 1) for index in range(pos, len(text))]
+        offsets = [match.span() for match in _WORD.finditer(text, pos)]
+        if self._partial_word(text, pos) and offsets:
+            del offsets[0]
+        return offsets
+
+    def _partial_word(self, text: str, pos: int) -> bool:
+        # Text before ``pos`` is context: a word running into it is not whole.
+        return pos > 0 and self.whole_words and bool(_WORD.match(text, pos - 1)) and bool(_WORD.match(text, pos))
+
+    def _run(self, symbols: List[str]) -> List[Tuple[int, int, int]]:
+        """``(first symbol, last symbol, check index)`` of every term occurrence."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: List[Tuple[int, int, int]] = []
+        count = len(symbols)
+        index = 0
+        # At the root state only a symbol that starts a term moves the
+        # automaton, so jump between those (found at C speed) and step
+        # symbol by symbol only until it falls back to the root.
+        for start in compress(range(count), map(self._first.__contains__, symbols)):
+            if start < index:
+                continue
+            index = start
+            state = 0
+            while index < count:
+                symbol = symbols[index]
+                while state and symbol not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(symbol, 0)
+                if out[state]:
+                    for check, length in out[state]:
+                        found.append((index - length + 1, index, check))
+                index += 1
+                if not state:
+                    break
+        return found
+
+    def matches(self, text: str, pos: int = 0) -> List[Tuple[int, int, str]]:
+        """``(start, end, check)`` of every term occurrence starting at or after ``pos``.
+
+        Overlapping and nested occurrences are all reported, sorted by position.
+        """
+        found = self._run(self._symbols(text, pos))
+        if not found:
+            return []
+        offsets = self._offsets(text, pos)
+        return sorted((offsets[first][0], offsets[last][1], self.checks[check]) for first, last, check in found)
+
+    def found_checks(self, text: str) -> Set[str]:
+        return {self.checks[check] for _first, _last, check in self._run(self._symbols(text, 0))}
+
+    def to_bytes(self) -> bytes:
+        return marshal.dumps(
+            (_CACHE_FORMAT, self.checks, self.case_sensitive, self.whole_words, self._goto, self._fail, self._out)
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes, digest: str) -> "DictionaryMatcher":
+        fmt, checks, case_sensitive, whole_words, goto, fail, out = marshal.loads(data)
+        if fmt != _CACHE_FORMAT:
+            raise ValueError(f"cache format {fmt!r}")
+        return cls(checks, case_sensitive, whole_words, goto, fail, out, digest)
+
+
+def _symbols(term: str, case_sensitive: bool, whole_words: bool) -> Tuple[str, ...]:
+    if whole_words:
+        words = _WORD.findall(term)
+        return tuple(words if case_sensitive else (word.casefold() for word in words))
+    return tuple(term if case_sensitive else (char.casefold() for char in term))
+
+
+def digest_specs(specs: Sequence[DictionarySpec]) -> str:
+    hasher = hashlib.sha256(_CACHE_FORMAT.encode())
+    for spec in specs:
+        hasher.update(repr((spec.name, spec.case_sensitive, spec.whole_words, len(spec.terms))).encode())
+        hasher.update("\x00".join(spec.terms).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def build_matchers(
+    specs: Iterable[DictionarySpec],
+    cache_dir: Optional[str] = None,
+    memo: Optional[MutableMapping[str, DictionaryMatcher]] = None,
+) -> Tuple[DictionaryMatcher, ...]:
+    """One matcher per matching mode, reused from ``memo`` or ``cache_dir`` when the terms are unchanged.
+
+    ``memo`` (digest -> matcher) receives every returned matcher; a
+    ``weakref.WeakValueDictionary`` keeps just the ones still in use.
+    """
+    by_mode: Dict[Tuple[bool, bool], List[DictionarySpec]] = {}
+    for spec in specs:
+        by_mode.setdefault(spec.mode, []).append(spec)
+    matchers = []
+    for group in by_mode.values():
+        digest = digest_specs(group)
+        matcher = memo.get(digest) if memo is not None else None
+        if matcher is None:
+            matcher = _load_cached(cache_dir, digest) if cache_dir else None
+        if matcher is None:
+            matcher = DictionaryMatcher.build(group, digest)
+            if cache_dir:
+                _store_cached(cache_dir, matcher)
+        if memo is not None:
+            memo[digest] = matcher
+        matchers.append(matcher)
+    return tuple(matchers)
+
+
+def _load_cached(cache_dir: str, digest: str) -> Optional[DictionaryMatcher]:
+    path = os.path.join(cache_dir, f"{digest}.ac")
+    try:
+        with open(path, "rb") as handle:
+            return DictionaryMatcher.from_bytes(handle.read(), digest)
+    except FileNotFoundError:
+        return None
+    except (ValueError, EOFError, TypeError) as exc:
+        logger.warning("Ignoring unreadable dictionary cache %s: %s", path, exc)
+        return None
+
+
+def _store_cached(cache_dir: str, matcher: DictionaryMatcher) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{matcher.digest}.ac")
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as handle:
+        handle.write(matcher.to_bytes())
+    os.replace(temp, path)
@@ -1,16 +1,111 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
 import yaml
 from pathlib import Path
-from app.guardrails.models import PolicyConfig, PolicyDefinition
+from app.guardrails.dictionary import DictionaryMatcher, build_matchers, load_spec
+from app.guardrails.models import PolicyConfig, PolicyDefinition, PolicySnapshot
+from app.guardrails.routing import compile_routes, plan_checks
+from app.guardrails.scanner import DEFAULT_PATTERNS, CompiledScanner
+from app.utils.config import EnvironmentConfig
+
+logger = logging.getLogger(__name__)
+# libyaml's loader when PyYAML was built with it; registries parse many files.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class CompiledPool:
+    """Scanners and dictionary automata shared by the policies that use them.
+
+    Entries are held weakly: one lives as long as some published snapshot
+    (or check plan) references it, so identical check sets across tenants and
+    across reloads compile once without the pool growing forever.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.matchers: "weakref.WeakValueDictionary[str, DictionaryMatcher]" = weakref.WeakValueDictionary()
+        self._scanners: "weakref.WeakValueDictionary[tuple, CompiledScanner]" = weakref.WeakValueDictionary()
+
+    def scanner(
+        self, patterns: Dict[str, str], checks: Sequence[str], matchers: Sequence[DictionaryMatcher] = ()
+    ) -> CompiledScanner:
+        listed = {check for matcher in matchers for check in matcher.checks}
+        used = tuple(matcher for matcher in matchers if listed.intersection(checks))
+        key = (
+            tuple(checks),
+            tuple((check, patterns[check]) for check in checks if check in patterns and check not in listed),
+            tuple(matcher.digest for matcher in used),
+        )
+        with self.lock:
+            scanner = self._scanners.get(key)
+            if scanner is None:
+                scanner = self._scanners[key] = CompiledScanner(patterns, checks, used)
+            return scanner
+
+    def __len__(self) -> int:
+        return len(self._scanners)
+
 
 class PolicyManager:
-    def __init__(self, policy_path: str):
+    """Loads the policy file and publishes immutable, precompiled snapshots.
+
+    Reloads (manual or from the file watcher) read, parse and compile off the
+    request path, then swap the published snapshot in one assignment. Readers
+    call ``snapshot()`` and never wait on disk I/O or YAML parsing.
+
+    Dictionary automata are reused across reloads while their terms are
+    unchanged, and cached under ``dictionary_cache_dir`` (default
+    ``GUARDRAIL_DICTIONARY_CACHE_DIR``) so new processes skip the build.
+    Every snapshot carries a ``RoutingTable`` of per-(role, tool, model)
+    check plans; managers given the same ``pool`` share compiled scanners.
+    """
+
+    def __init__(
+        self,
+        policy_path: str,
+        patterns: Optional[Dict[str, str]] = None,
+        watch: bool = False,
+        poll_interval: float = 1.0,
+        dictionary_cache_dir: Optional[str] = None,
+        tenant: Optional[str] = None,
+        pool: Optional[CompiledPool] = None,
+    ):
         self.policy_path = Path(policy_path)
-        self.current_policy: PolicyConfig = self.load_policy()
+        self.tenant = tenant
+        self.pool = pool if pool is not None else CompiledPool()
+        self.patterns: Dict[str, str] = dict(patterns or DEFAULT_PATTERNS)
+        self.dictionary_cache_dir = dictionary_cache_dir or EnvironmentConfig.from_env().guardrail_dictionary_cache_dir
+        self.last_error: Optional[Exception] = None
+        self._version = 0
+        self._reload_lock = threading.Lock()
+        # (mtime_ns, size) of the policy file, then of each dictionary file it references.
+        self._file_state: Tuple[Tuple[int, int], ...] = ()
+        self._dictionary_paths: Tuple[Path, ...] = ()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._snapshot: PolicySnapshot = self._build_snapshot(time.perf_counter())
+        if watch:
+            self.start_watching(poll_interval)
+
+    @property
+    def current_policy(self) -> PolicyConfig:
+        return self._snapshot.config
 
     def load_policy(self) -> PolicyConfig:
-        with open(self.policy_path, "r") as f:
-            data = yaml.safe_load(f)
-        
+        with open(self.policy_path, "rb") as f:
+            return self._parse(f.read())
+
+    def _parse(self, raw: bytes) -> PolicyConfig:
+        data = yaml.load(raw, Loader=_YAML_LOADER) or {}
+
         # Manually unpack to support dataclasses
         policy_data = data.get("policy", {})
         policy_def = PolicyDefinition(
@@ -18,14 +113,114 @@ class PolicyManager:
             version=policy_data.get("version", "1.0.0"),
             allowed_models=policy_data.get("allowed_models", []),
             checks=policy_data.get("checks", []),
-            fail_action=policy_data.get("fail_action", "block")
+            fail_action=policy_data.get("fail_action", "block"),
+            dictionaries=policy_data.get("dictionaries") or {},
+            roles=policy_data.get("roles") or {},
+            tools=policy_data.get("tools") or {},
         )
         return PolicyConfig(policy=policy_def)
 
-    def reload(self):
-        """Reloads the policy from disk."""
-        print(f"Reloading policy from {self.policy_path}...")
-        self.current_policy = self.load_policy()
+    def _build_snapshot(self, started: float, raw: Optional[bytes] = None) -> PolicySnapshot:
+        policy_stat = os.stat(self.policy_path)
+        if raw is None:
+            with open(self.policy_path, "rb") as f:
+                raw = f.read()
+        config = self._parse(raw)
+        checks = tuple(config.policy.checks)
+        # Only dictionaries some check plan enables are compiled.
+        enabled_checks = set(plan_checks(config.policy))
+        enabled = {name: options for name, options in config.policy.dictionaries.items() if name in enabled_checks}
+        paths = tuple(
+            self.policy_path.parent / options["path"]
+            for options in enabled.values()
+            if isinstance(options, Mapping) and options.get("path")
+        )
+        file_state = (self._stat(self.policy_path, policy_stat),) + tuple(self._stat(path) for path in paths)
+        specs = [load_spec(name, options, self.policy_path.parent) for name, options in enabled.items()]
+        with self.pool.lock:
+            matchers = build_matchers(specs, cache_dir=self.dictionary_cache_dir, memo=self.pool.matchers)
+
+        def scanner_for(plan: Tuple[str, ...]) -> CompiledScanner:
+            return self.pool.scanner(self.patterns, plan, matchers)
+
+        self._version += 1
+        snapshot = PolicySnapshot(
+            config=config,
+            version=self._version,
+            checks=checks,
+            scanner=scanner_for(checks),
+            content_hash=hashlib.sha256(raw).hexdigest(),
+            loaded_at=datetime.utcnow().isoformat(),
+            reload_latency_ms=0.0,
+            dictionary_digests=tuple(matcher.digest for matcher in matchers),
+            tenant=self.tenant,
+        )
+        routes = compile_routes(snapshot, scanner_for)
+        self._file_state = file_state
+        self._dictionary_paths = paths
+        return replace(snapshot, routes=routes, reload_latency_ms=(time.perf_counter() - started) * 1000)
+
+    @staticmethod
+    def _stat(path: Path, stat: Optional[os.stat_result] = None) -> Tuple[int, int]:
+        stat = stat or os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> PolicySnapshot:
+        """Reloads the policy from disk and publishes a new snapshot."""
+        started = time.perf_counter()
+        with self._reload_lock:
+            snapshot = self._build_snapshot(started)
+            self._snapshot = snapshot
+        logger.info("Reloaded policy %s (snapshot %d) in %.2f ms", self.policy_path, snapshot.version, snapshot.reload_latency_ms)
+        return snapshot
+
+    def snapshot(self) -> PolicySnapshot:
+        """The currently published snapshot; hold on to it for a consistent view."""
+        return self._snapshot
 
     def get_policy(self) -> PolicyConfig:
-        return self.current_policy
+        return self._snapshot.config
+
+    def start_watching(self, poll_interval: float = 1.0) -> None:
+        """Polls the policy and dictionary files' mtime/size and reloads when they change."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(poll_interval,), name="policy-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _watch(self, poll_interval: float) -> None:
+        while not self._stop.wait(poll_interval):
+            try:
+                self.poll()
+            except Exception as exc:  # keep serving the last good snapshot
+                self.last_error = exc
+                logger.warning("Policy reload from %s failed: %s", self.policy_path, exc)
+
+    def poll(self) -> Optional[PolicySnapshot]:
+        """Reloads if the file changed since the last load; returns the new snapshot if any."""
+        file_state = tuple(self._stat(path) for path in (self.policy_path, *self._dictionary_paths))
+        if file_state == self._file_state:
+            return None
+        dictionaries_changed = file_state[1:] != self._file_state[1:]
+        # Remember this state even if parsing fails, so a broken file is
+        # reported once rather than on every poll.
+        self._file_state = file_state
+        started = time.perf_counter()
+        with open(self.policy_path, "rb") as f:
+            raw = f.read()
+        if not dictionaries_changed and hashlib.sha256(raw).hexdigest() == self._snapshot.content_hash:
+            return None  # touched, not changed
+        with self._reload_lock:
+            snapshot = self._build_snapshot(started, raw)
+            self._snapshot = snapshot
+        self.last_error = None
+        logger.info("Policy file changed; published snapshot %d in %.2f ms", snapshot.version, snapshot.reload_latency_ms)
+        return snapshot
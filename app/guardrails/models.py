@@ -1,14 +1,76 @@
 from dataclasses import dataclass, field
-from typing import List
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Sequence, Tuple
 
-@dataclass
+from app.guardrails.scanner import CompiledScanner
+
+if TYPE_CHECKING:
+    from app.guardrails.routing import RoutingTable
+
+
+def freeze(value: Any) -> Any:
+    """Read-only deep copy of parsed YAML: mappings become proxies, lists tuples."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
 class PolicyDefinition:
+    """One parsed policy; its containers are frozen so snapshots can be shared across threads."""
+
     name: str
-    allowed_models: List[str]
-    checks: List[str]
+    allowed_models: Sequence[str]
+    checks: Sequence[str]
     fail_action: str
     version: str = "1.0.0"
+    # Term lists for dictionary checks, as written under ``dictionaries``.
+    dictionaries: Mapping[str, Mapping[str, Any]] = field(default_factory=dict)
+    # Per-role tool permissions and check overrides: {role: {"tools", "checks"}}.
+    roles: Mapping[str, Mapping[str, Any]] = field(default_factory=dict)
+    # Extra checks applied to one tool's requests and output: {tool: {"checks"}}.
+    tools: Mapping[str, Mapping[str, Any]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for name in ("allowed_models", "checks", "dictionaries", "roles", "tools"):
+            object.__setattr__(self, name, freeze(getattr(self, name)))
 
-@dataclass
+@dataclass(frozen=True)
 class PolicyConfig:
     policy: PolicyDefinition
+
+@dataclass(frozen=True)
+class PolicySnapshot:
+    """Immutable, fully precompiled view of one loaded policy.
+
+    ``PolicyManager`` publishes a new snapshot with a single reference swap,
+    so a caller holding one never observes a half-applied reload. The policy
+    it carries is frozen too (see ``PolicyDefinition``).
+    """
+    config: PolicyConfig
+    version: int
+    checks: Tuple[str, ...]
+    scanner: CompiledScanner
+    content_hash: str
+    loaded_at: str
+    reload_latency_ms: float
+    # Digest of each compiled dictionary automaton, covering the term files.
+    dictionary_digests: Tuple[str, ...] = ()
+    # Set when the policy was loaded by a ``PolicyRegistry``.
+    tenant: Optional[str] = None
+    # Precompiled (role, tool, model) -> CheckPlan resolution; see app.guardrails.routing.
+    routes: Optional["RoutingTable"] = None
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary recorded in audit logs."""
+        return {
+            **({"tenant": self.tenant} if self.tenant is not None else {}),
+            "name": self.config.policy.name,
+            "policy_version": self.config.policy.version,
+            "snapshot_version": self.version,
+            "content_hash": self.content_hash,
+            "reload_latency_ms": self.reload_latency_ms,
+            **({"dictionary_digests": list(self.dictionary_digests)} if self.dictionary_digests else {}),
+        }
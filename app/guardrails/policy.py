@@ -1,7 +1,24 @@
-import re
-from typing import Dict, Optional, Tuple
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple, Union
 from app.agent.types import Task
+from app.guardrails.cache import VerdictCache
 from app.guardrails.manager import PolicyManager
+from app.guardrails.models import PolicySnapshot
+from app.guardrails.registry import PolicyRegistry
+from app.guardrails.routing import CheckPlan
+from app.guardrails.scanner import CompiledScanner
+from app.guardrails.stream import DEFAULT_OVERLAP, StreamingInspector, redact
+from app.guardrails.walker import (
+    DEFAULT_MAX_CHARS,
+    DEFAULT_MAX_DEPTH,
+    FlatPayload,
+    PayloadHit,
+    PayloadLimitExceeded,
+    flatten,
+)
+
+# Violation reported for payloads too deep or too large to inspect.
+PAYLOAD_LIMIT_VIOLATION = "payload_limit_exceeded"
 
 
 class GuardrailViolation(Exception):
@@ -9,57 +26,195 @@ class GuardrailViolation(Exception):
 
 
 class GuardrailEngine:
-    """Evaluates constraints based on active policy configuration."""
+    """Evaluates constraints based on active policy configuration.
+
+    Every check reads one ``PolicySnapshot``. Callers that need several checks
+    to agree on a policy (e.g. the orchestrator for one task) pass the same
+    ``snapshot`` to each call; otherwise the currently published one is used.
+
+    With a ``PolicyRegistry`` as ``policy_manager`` each task is checked
+    against its tenant's policy (``task_snapshot``). Per tool call,
+    ``route`` picks the precompiled check plan for the task's role and model
+    and the tool; pass ``plan.snapshot`` on to the check methods.
 
-    def __init__(self, policy_manager: PolicyManager):
+    An optional ``verdict_cache`` memoizes scan results per compiled scanner
+    and content, so repeated strings are not rescanned.
+
+    Tool inputs and outputs are walked in full (nested dicts and lists
+    included) and scanned in one pass; payloads deeper than
+    ``max_payload_depth`` or longer than ``max_payload_chars`` are refused.
+    Streaming tools go through an ``output_inspector`` whose overlap is
+    ``stream_overlap``.
+    """
+
+    def __init__(
+        self,
+        policy_manager: Union[PolicyManager, PolicyRegistry],
+        verdict_cache: Optional[VerdictCache] = None,
+        stream_overlap: int = DEFAULT_OVERLAP,
+        max_payload_depth: int = DEFAULT_MAX_DEPTH,
+        max_payload_chars: int = DEFAULT_MAX_CHARS,
+    ):
         self.policy_manager = policy_manager
+        self.verdict_cache = verdict_cache
+        self.stream_overlap = stream_overlap
+        self.max_payload_depth = max_payload_depth
+        self.max_payload_chars = max_payload_chars
         
-        # Hardcoded patterns for demonstration of specific checks
-        self.patterns = {
-            "pii": r"\b\d{3}-\d{2}-\d{4}\b",  # Simple SSN regex
-            "hallucination": r"(?i)confidence: low", # Placeholder for hallucination marker
-            "tone": r"(?i)shutup|idiot", # Simple toxicity check
-        }
-
-    def assert_task_safe(self, task: Task) -> None:
+        # Check patterns are owned by the manager, which precompiles them into
+        # every snapshot; call policy_manager.reload() after changing them.
+        self.patterns = policy_manager.patterns
+
+    def scanner(self, snapshot: Optional[PolicySnapshot] = None) -> CompiledScanner:
+        """Returns the precompiled scanner for the given (or current) policy snapshot."""
+        return (snapshot or self.policy_manager.snapshot()).scanner
+
+    def scan(self, text: str, snapshot: Optional[PolicySnapshot] = None) -> Tuple[str, ...]:
+        """Returns the enabled checks matching ``text``, consulting the verdict cache."""
+        snapshot = snapshot or self.policy_manager.snapshot()
+        if self.verdict_cache is None:
+            return snapshot.scanner.scan(text)
+        key = (snapshot.scanner.cache_id, snapshot.scanner.checks, VerdictCache.content_key(text))
+        verdict = self.verdict_cache.get(key)
+        if verdict is None:
+            verdict = snapshot.scanner.scan(text)
+            self.verdict_cache.put(key, verdict)
+        return verdict
+
+    def task_snapshot(self, task: Task) -> PolicySnapshot:
+        """The snapshot to pin for ``task``: its tenant's when serving a registry."""
+        if isinstance(self.policy_manager, PolicyRegistry):
+            return self.policy_manager.snapshot(task.tenant)
+        return self.policy_manager.snapshot()
+
+    def route(self, task: Task, tool_name: Optional[str], snapshot: Optional[PolicySnapshot] = None) -> CheckPlan:
+        """The check plan for ``task`` calling ``tool_name`` (None: the task itself)."""
+        snapshot = snapshot or self.task_snapshot(task)
+        return snapshot.routes.resolve(task.role, tool_name, task.model)
+
+    def assert_task_safe(self, task: Task, snapshot: Optional[PolicySnapshot] = None) -> None:
         """Checks if task is allowed by policy."""
-        # For now, we don't have task-level checks in the yaml, keeping existing logic if needed
-        # or assuming task level is safe if not specified.
-        # But let's check for PII in task description if 'pii' check is enabled.
-        policy = self.policy_manager.get_policy().policy
-        
-        if "pii" in policy.checks:
-            if re.search(self.patterns["pii"], task.description):
+        # Task-level checks: the role and model must be permitted, and the
+        # description must not contain PII if the role's plan checks for it.
+        plan = self.route(task, None, snapshot)
+        if plan.denied is not None:
+            raise GuardrailViolation(f"Task rejected by policy: {plan.denied}")
+        snapshot = plan.snapshot
+
+        if "pii" in snapshot.checks:
+            if "pii" in self.scan(task.description, snapshot):
                  raise GuardrailViolation("Task contains restricted PII")
 
 
-    def inspect_tool_request(self, task: Task, tool_name: Optional[str], tool_input: Dict) -> Tuple[bool, Optional[str]]:
+    def inspect_tool_request(self, task: Task, tool_name: Optional[str], tool_input: Dict, snapshot: Optional[PolicySnapshot] = None) -> Tuple[bool, Optional[str]]:
         """Inspects tool usage against policy."""
         # Existing role checks can be kept if we merge configs, 
         # but for this specific request we focus on the new yaml checks.
-        
-        policy = self.policy_manager.get_policy().policy
-        
-        # Check params for pii/tone if enabled
-        for check in policy.checks:
-            if check in self.patterns:
-                 for value in tool_input.values():
-                     if isinstance(value, str) and re.search(self.patterns[check], value):
-                         return True, f"Policy violation: {check} detected"
+        blocked, reason, _hits = self.screen_tool_request(tool_input, snapshot)
+        return blocked, reason
 
-        return False, None
+    def screen_tool_request(
+        self, tool_input: Dict[str, Any], snapshot: Optional[PolicySnapshot] = None
+    ) -> Tuple[bool, Optional[str], List[PayloadHit]]:
+        """Like ``inspect_tool_request``, also returning where each check matched."""
+        snapshot = snapshot or self.policy_manager.snapshot()
+        try:
+            flat, hits = self.inspect_payload(tool_input, snapshot)
+        except PayloadLimitExceeded:
+            return True, PAYLOAD_LIMIT_VIOLATION, []
+        check = self._first_check(hits, snapshot)
+        if check is None:
+            return False, None, []
+        return True, f"Policy violation: {check} detected", hits
+
+    def inspect_payload(
+        self, payload: Any, snapshot: Optional[PolicySnapshot] = None
+    ) -> Tuple[FlatPayload, List[PayloadHit]]:
+        """Scans every string in a nested payload at once; returns it flattened with its hits.
+
+        Raises ``PayloadLimitExceeded`` for payloads beyond the configured limits.
+        """
+        snapshot = snapshot or self.policy_manager.snapshot()
+        flat = flatten(payload, max_depth=self.max_payload_depth, max_chars=self.max_payload_chars)
+        if not flat.text:
+            return flat, []
+        # With a verdict cache, a repeated clean payload is settled by one lookup.
+        if self.verdict_cache is not None and not self.scan(flat.text, snapshot):
+            return flat, []
+        return flat, flat.scan(snapshot.scanner)
 
-    def inspect_output(self, output: str) -> Tuple[bool, Optional[str]]:
+    @staticmethod
+    def _first_check(hits: List[PayloadHit], snapshot: PolicySnapshot) -> Optional[str]:
+        found = {hit.check for hit in hits}
+        return next((check for check in snapshot.scanner.checks if check in found), None)
+
+    def inspect_output(self, output: str, snapshot: Optional[PolicySnapshot] = None) -> Tuple[bool, Optional[str]]:
         """Inspects agent output."""
-        policy = self.policy_manager.get_policy().policy
+        snapshot = snapshot or self.policy_manager.snapshot()
+        policy = snapshot.config.policy
         
-        for check in policy.checks:
-            if check in self.patterns:
-                if re.search(self.patterns[check], output):
-                    if policy.fail_action == "redact":
-                         # In a real system, we'd redact. Here we flag it.
-                         return True, f"{check} (redaction required)"
-                    else:
-                         return True, f"{check} violation"
+        matched = self.scan(output, snapshot)
+        if matched:
+            check = matched[0]
+            if policy.fail_action == "redact":
+                 # Flag only; redact_output() returns the rewritten text.
+                 return True, f"{check} (redaction required)"
+            else:
+                 return True, f"{check} violation"
                          
         return False, None
+
+    def redact_output(self, output: str, snapshot: Optional[PolicySnapshot] = None) -> Tuple[str, Tuple[str, ...]]:
+        """Rewrites every match in ``output``; returns the text and the matched checks."""
+        snapshot = snapshot or self.policy_manager.snapshot()
+        matched = self.scan(output, snapshot)
+        if not matched:
+            return output, ()
+        return redact(output, snapshot.scanner.spans(output)), matched
+
+    def output_inspector(self, snapshot: Optional[PolicySnapshot] = None) -> StreamingInspector:
+        """A streaming inspector enforcing the snapshot's fail_action chunk by chunk."""
+        snapshot = snapshot or self.policy_manager.snapshot()
+        return StreamingInspector(
+            snapshot.scanner,
+            redact=snapshot.config.policy.fail_action == "redact",
+            overlap=self.stream_overlap,
+        )
+
+    def screen_tool_output(
+        self,
+        tool_output: Dict[str, Any],
+        snapshot: Optional[PolicySnapshot] = None,
+        inspector: Optional[StreamingInspector] = None,
+    ) -> Tuple[Dict[str, Any], bool, Optional[str], List[PayloadHit]]:
+        """Applies the output policy to a tool result.
+
+        Returns ``(output, blocked, violation, hits)``. Under ``fail_action:
+        redact`` matching strings, however deeply nested, are rewritten and the
+        step continues; otherwise a match blocks it. Output that already went
+        through ``inspector`` (a streamed result) is not rescanned.
+        """
+        snapshot = snapshot or self.policy_manager.snapshot()
+        redacting = snapshot.config.policy.fail_action == "redact"
+        if inspector is not None:
+            matched = tuple(check for check in snapshot.scanner.checks if check in inspector.violations)
+            hits: List[PayloadHit] = []
+            check = matched[0] if matched else None
+        else:
+            try:
+                flat, hits = self.inspect_payload(tool_output, snapshot)
+            except PayloadLimitExceeded:
+                return tool_output, True, PAYLOAD_LIMIT_VIOLATION, []
+            check = self._first_check(hits, snapshot)
+            if check is not None and redacting:
+                tool_output = flat.replace(
+                    {
+                        leaf: redact(flat.leaf_text(leaf), [(h.start, h.end, h.check) for h in leaf_hits])
+                        for leaf, leaf_hits in groupby(hits, key=lambda hit: hit.leaf)
+                    }
+                )
+        if check is None:
+            return tool_output, False, None, []
+        if redacting:
+            return tool_output, False, f"{check} (redacted)", hits
+        return tool_output, True, f"{check} violation", hits
@@ -0,0 +1,181 @@
+"""Policies for many tenants, one file each, served from a single process.
+
+``PolicyRegistry`` loads every ``*.yaml``/``*.yml`` file in a directory into
+its own ``PolicyManager``; the tenant is the file name without extension.
+All managers compile through one ``CompiledPool``, so tenants whose check
+plans are identical share scanners and dictionary automata. The watcher
+polls each file on its own: a changed file reloads only its tenant, new files
+are picked up and deleted ones dropped.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.guardrails.manager import CompiledPool, PolicyManager
+from app.guardrails.models import PolicySnapshot
+from app.guardrails.routing import CheckPlan
+from app.guardrails.scanner import DEFAULT_PATTERNS
+
+logger = logging.getLogger(__name__)
+
+POLICY_SUFFIXES = (".yaml", ".yml")
+
+
+class UnknownTenant(KeyError):
+    """Raised when no policy is loaded for a tenant."""
+
+
+class PolicyRegistry:
+    """Tenant -> ``PolicyManager`` for a directory of policy files.
+
+    Offers the ``PolicyManager`` interface used by ``GuardrailEngine``
+    (``snapshot``, ``patterns``, ``start_watching``...); ``snapshot()``
+    without a tenant returns ``default_tenant``'s policy.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        patterns: Optional[Dict[str, str]] = None,
+        default_tenant: str = "default",
+        watch: bool = False,
+        poll_interval: float = 1.0,
+        dictionary_cache_dir: Optional[str] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.patterns: Dict[str, str] = dict(patterns or DEFAULT_PATTERNS)
+        self.default_tenant = default_tenant
+        self.dictionary_cache_dir = dictionary_cache_dir
+        self.pool = CompiledPool()
+        # Tenant -> error of its last failed load; cleared when it loads again.
+        self.errors: Dict[str, Exception] = {}
+        # (mtime_ns, size) of new files that failed to load; retried once they change.
+        self._rejected: Dict[str, Tuple[int, int]] = {}
+        self._managers: Dict[str, PolicyManager] = {}
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        if not self.directory.is_dir():
+            raise NotADirectoryError(f"policy directory not found: {self.directory}")
+        for tenant, path in self._policy_files().items():
+            self._managers[tenant] = self._manager(tenant, path)
+        if watch:
+            self.start_watching(poll_interval)
+
+    def _policy_files(self) -> Dict[str, Path]:
+        return {
+            path.stem: path
+            for path in sorted(self.directory.iterdir())
+            if path.suffix in POLICY_SUFFIXES and path.is_file()
+        }
+
+    def _manager(self, tenant: str, path: Path) -> PolicyManager:
+        return PolicyManager(
+            str(path),
+            patterns=self.patterns,
+            dictionary_cache_dir=self.dictionary_cache_dir,
+            tenant=tenant,
+            pool=self.pool,
+        )
+
+    @property
+    def tenants(self) -> List[str]:
+        return sorted(self._managers)
+
+    def manager(self, tenant: Optional[str] = None) -> PolicyManager:
+        try:
+            return self._managers[tenant or self.default_tenant]
+        except KeyError:
+            raise UnknownTenant(tenant or self.default_tenant) from None
+
+    def snapshot(self, tenant: Optional[str] = None) -> PolicySnapshot:
+        """The published snapshot of ``tenant`` (default: ``default_tenant``)."""
+        return self.manager(tenant).snapshot()
+
+    def resolve(
+        self, tenant: Optional[str], role: str, tool: Optional[str] = None, model: Optional[str] = None
+    ) -> CheckPlan:
+        """The current check plan for one call of ``tenant``."""
+        return self.snapshot(tenant).routes.resolve(role, tool, model)
+
+    def reload(self, tenant: Optional[str] = None) -> PolicySnapshot:
+        """Reloads one tenant's policy; the others are untouched."""
+        return self.manager(tenant).reload()
+
+    def poll(self) -> Dict[str, Optional[PolicySnapshot]]:
+        """Applies changes in the directory since the last poll.
+
+        Returns the affected tenants: the new snapshot of each added or
+        changed tenant and None for removed ones. A file that fails to load is
+        reported in ``errors`` and its tenant keeps its last good snapshot.
+        """
+        changed: Dict[str, Optional[PolicySnapshot]] = {}
+        files = self._policy_files()
+        with self._lock:
+            for tenant in set(self._managers) - set(files):
+                self._managers.pop(tenant)
+                self.errors.pop(tenant, None)
+                changed[tenant] = None
+            for tenant in set(self._rejected) - set(files):
+                self._rejected.pop(tenant)
+                self.errors.pop(tenant, None)
+            for tenant, path in files.items():
+                manager = self._managers.get(tenant)
+                try:
+                    if manager is not None:
+                        snapshot = manager.poll()
+                    elif self._rejected.get(tenant) == _file_state(path):
+                        continue
+                    else:
+                        manager = self._manager(tenant, path)
+                        self._managers[tenant] = manager
+                        self._rejected.pop(tenant, None)
+                        snapshot = manager.snapshot()
+                except Exception as exc:
+                    if manager is None:
+                        self._rejected[tenant] = _file_state(path)
+                    else:
+                        manager.last_error = exc
+                    self.errors[tenant] = exc
+                    logger.warning("Loading policy for tenant %s from %s failed: %s", tenant, path, exc)
+                    continue
+                if snapshot is not None:
+                    self.errors.pop(tenant, None)
+                    changed[tenant] = snapshot
+        return changed
+
+    def start_watching(self, poll_interval: float = 1.0) -> None:
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(poll_interval,), name="policy-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _watch(self, poll_interval: float) -> None:
+        while not self._stop.wait(poll_interval):
+            try:
+                self.poll()
+            except Exception as exc:  # e.g. the directory itself went away
+                logger.warning("Polling policy directory %s failed: %s", self.directory, exc)
+
+    def stats(self) -> Dict[str, int]:
+        """Tenants loaded and compiled scanners they share."""
+        return {"tenants": len(self._managers), "scanners": len(self.pool), "errors": len(self.errors)}
+
+
+def _file_state(path: Path) -> Tuple[int, int]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return (0, 0)
+    return stat.st_mtime_ns, stat.st_size
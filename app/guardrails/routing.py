@@ -0,0 +1,136 @@
+"""Precompiled (role, tool, model) routing to check plans.
+
+A policy may restrict models, restrict which tools each role may call and
+vary checks by role and tool::
+
+    policy:
+      allowed_models: [gpt-4o]          # empty: any model
+      checks: [pii, tone]               # default for every role
+      roles:
+        analyst: {tools: [data_lookup]} # omit ``tools`` to allow every tool
+        auditor: {checks: [pii]}        # replaces the default checks
+        "*": {tools: []}                # any other role (omit to deny them)
+      tools:
+        data_lookup: {checks: [blocked_tickers]}  # added for this tool
+
+Every combination the policy can distinguish is compiled into a
+``CheckPlan`` when the snapshot is built, so resolving a call is one set
+lookup and two dict lookups. Plans with the same checks share one scanner.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from app.guardrails.models import PolicyDefinition, PolicySnapshot
+from app.guardrails.scanner import CompiledScanner
+
+# Violations for calls a policy does not permit.
+ROLE_NOT_PERMITTED = "role_not_permitted"
+TOOL_NOT_PERMITTED = "tool_not_permitted"
+MODEL_NOT_PERMITTED = "model_not_permitted"
+# Wildcard role in policy files; in compiled tables also "any other tool".
+ANY = "*"
+
+
+@dataclass(frozen=True)
+class CheckPlan:
+    """What to enforce for one (role, tool, model) under one policy snapshot.
+
+    ``snapshot`` is the tenant's snapshot narrowed to this plan's checks, so
+    it can be passed to any ``GuardrailEngine`` method. ``denied`` is the
+    violation to report when the call is not permitted at all.
+    """
+
+    snapshot: PolicySnapshot
+    denied: Optional[str] = None
+
+    @property
+    def checks(self) -> Tuple[str, ...]:
+        return self.snapshot.scanner.checks
+
+
+class RoutingTable:
+    """Resolves ``(role, tool, model)`` to a ``CheckPlan`` in constant time.
+
+    ``tool`` is None for task-level checks (the task description) and
+    ``model`` is None when the task does not name one.
+    """
+
+    def __init__(
+        self,
+        plans: Dict[str, Dict[Optional[str], CheckPlan]],
+        models: Optional[FrozenSet[str]],
+        model_denied: CheckPlan,
+    ) -> None:
+        self._plans = plans
+        self._models = models
+        self._model_denied = model_denied
+
+    def resolve(self, role: str, tool: Optional[str] = None, model: Optional[str] = None) -> CheckPlan:
+        if model is not None and self._models is not None and model not in self._models:
+            return self._model_denied
+        tools = self._plans.get(role) or self._plans[ANY]
+        plan = tools.get(tool)
+        return plan if plan is not None else tools[ANY]
+
+    def plans(self) -> Iterable[CheckPlan]:
+        """Every distinct plan in the table."""
+        seen: Dict[int, CheckPlan] = {}
+        for tools in self._plans.values():
+            for plan in tools.values():
+                seen.setdefault(id(plan), plan)
+        seen.setdefault(id(self._model_denied), self._model_denied)
+        return seen.values()
+
+
+def plan_checks(policy: PolicyDefinition) -> Iterable[str]:
+    """Every check name some plan of ``policy`` can enable."""
+    yield from policy.checks
+    for options in list(policy.roles.values()) + list(policy.tools.values()):
+        yield from (options or {}).get("checks") or ()
+
+
+def compile_routes(
+    snapshot: PolicySnapshot, scanner_for: Callable[[Tuple[str, ...]], CompiledScanner]
+) -> RoutingTable:
+    """Builds the routing table of ``snapshot``'s policy.
+
+    ``scanner_for`` returns the (possibly shared) scanner for a check list.
+    """
+    policy = snapshot.config.policy
+    memo: Dict[Tuple[Tuple[str, ...], Optional[str]], CheckPlan] = {}
+
+    def plan(checks: Tuple[str, ...], denied: Optional[str] = None) -> CheckPlan:
+        checks = tuple(dict.fromkeys(checks))
+        key = (checks, denied)
+        if key not in memo:
+            if checks == snapshot.checks:
+                narrowed = snapshot
+            else:
+                narrowed = replace(snapshot, checks=checks, scanner=scanner_for(checks))
+            memo[key] = CheckPlan(narrowed, denied)
+        return memo[key]
+
+    tool_checks = {tool: tuple((options or {}).get("checks") or ()) for tool, options in policy.tools.items()}
+
+    def role_plans(options: Dict) -> Dict[Optional[str], CheckPlan]:
+        base = tuple(options["checks"]) if options.get("checks") is not None else snapshot.checks
+        allowed = options.get("tools")
+        if allowed is not None and ANY in allowed:
+            allowed = None
+        table: Dict[Optional[str], CheckPlan] = {None: plan(base)}
+        for tool in tool_checks if allowed is None else allowed:
+            table[tool] = plan(base + tool_checks.get(tool, ()))
+        table[ANY] = plan(base) if allowed is None else plan(base, TOOL_NOT_PERMITTED)
+        return table
+
+    plans = {role: role_plans(options or {}) for role, options in policy.roles.items()}
+    if ANY not in plans:
+        if policy.roles:
+            denied = plan(snapshot.checks, ROLE_NOT_PERMITTED)
+            plans[ANY] = {None: denied, ANY: denied}
+        else:
+            plans[ANY] = role_plans({})
+    models = frozenset(policy.allowed_models) if policy.allowed_models else None
+    return RoutingTable(plans, models, plan(snapshot.checks, MODEL_NOT_PERMITTED))
@@ -0,0 +1,273 @@
+"""Compiled multi-pattern scanner for guardrail checks.
+
+All enabled checks are combined into a single precompiled alternation with one
+named group per check so each string is scanned once instead of once per check.
+Patterns with capturing groups of their own cannot be embedded (group numbers
+shift and names may clash), so they are searched standalone.
+Dictionary checks (large term lists) are matched by their own automata; see
+``app.guardrails.dictionary``.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Set, Tuple
+
+from app.guardrails.dictionary import DictionaryMatcher
+
+logger = logging.getLogger(__name__)
+
+try:  # Private parser module; the scanner still works without it, just slower.
+    from re import _constants as _sre_c, _parser as _sre_parse
+except ImportError:  # pragma: no cover - older interpreters
+    _sre_c = _sre_parse = None  # type: ignore[assignment]
+
+# Built-in check patterns, keyed by the check names used in policy files.
+DEFAULT_PATTERNS: Dict[str, str] = {
+    "pii": r"\b\d{3}-\d{2}-\d{4}\b",  # Simple SSN regex
+    "hallucination": r"(?i)confidence: low",  # Placeholder for hallucination marker
+    "tone": r"(?i)shutup|idiot",  # Simple toxicity check
+}
+
+_GLOBAL_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+# Identifies each compiled scanner, e.g. in verdict cache keys.
+_SCANNER_IDS = itertools.count(1)
+_CATEGORIES = (
+    {
+        _sre_c.CATEGORY_DIGIT: r"\d",
+        _sre_c.CATEGORY_NOT_DIGIT: r"\D",
+        _sre_c.CATEGORY_SPACE: r"\s",
+        _sre_c.CATEGORY_NOT_SPACE: r"\S",
+        _sre_c.CATEGORY_WORD: r"\w",
+        _sre_c.CATEGORY_NOT_WORD: r"\W",
+    }
+    if _sre_c is not None
+    else {}
+)
+
+
+def _scoped(pattern: str) -> str:
+    """Rewrite leading global flags such as ``(?i)`` into a scoped group.
+
+    Python only accepts global inline flags at the very start of an expression,
+    so they have to be turned into ``(?i:...)`` before the pattern can be
+    embedded in a larger alternation. Every flag is kept, including ``a`` and
+    ``u``, which Python also accepts on a group.
+    """
+    flags = ""
+    body = pattern
+    match = _GLOBAL_FLAGS.match(body)
+    while match:
+        flags += match.group(1)
+        body = body[match.end():]
+        match = _GLOBAL_FLAGS.match(body)
+    # Under (?x) a trailing comment would swallow the closing parenthesis.
+    end = "\n)" if "x" in flags else ")"
+    return f"(?{''.join(dict.fromkeys(flags))}:{body}{end}" if flags else f"(?:{body})"
+
+
+def _class_atoms(items: List) -> Optional[Set[str]]:
+    atoms: Set[str] = set()
+    for op, av in items:
+        if op is _sre_c.LITERAL:
+            atoms.add(re.escape(chr(av)))
+        elif op is _sre_c.CATEGORY and av in _CATEGORIES:
+            atoms.add(_CATEGORIES[av])
+        elif op is _sre_c.RANGE:
+            atoms.add(f"{re.escape(chr(av[0]))}-{re.escape(chr(av[1]))}")
+        else:
+            return None
+    return atoms
+
+
+def _first_atoms(items: List, ignorecase: bool) -> Tuple[Optional[Set[str]], bool]:
+    """Character-class atoms one of which must start any match of ``items``.
+
+    Also reports whether the atoms have to be matched case-insensitively.
+    Returns ``None`` atoms when the set cannot be bounded (e.g. an optional
+    prefix).
+    """
+    for op, av in items:
+        if op is _sre_c.AT:
+            continue  # zero-width anchors such as \b do not consume input
+        if op is _sre_c.LITERAL:
+            return _class_atoms([(op, av)]), ignorecase
+        if op is _sre_c.IN:
+            return _class_atoms(av), ignorecase
+        if op is _sre_c.SUBPATTERN:
+            _group, add_flags, del_flags, sub = av
+            if add_flags & re.IGNORECASE:
+                ignorecase = True
+            if del_flags & re.IGNORECASE:
+                ignorecase = False
+            return _first_atoms(list(sub), ignorecase)
+        if op is _sre_c.BRANCH:
+            atoms: Set[str] = set()
+            for alternative in av[1]:
+                sub_atoms, sub_ignorecase = _first_atoms(list(alternative), ignorecase)
+                if sub_atoms is None:
+                    return None, ignorecase
+                atoms |= sub_atoms
+                ignorecase = ignorecase or sub_ignorecase
+            return atoms, ignorecase
+        if op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT) and av[0] >= 1:
+            return _first_atoms(list(av[2]), ignorecase)
+        return None, ignorecase
+    return None, ignorecase
+
+
+def _prefilter(patterns: Iterable[str]) -> str:
+    """Builds a cheap lookahead rejecting positions where no check can start.
+
+    The class only ever over-approximates, so it never hides a real match.
+    """
+    if _sre_parse is None:
+        logger.info("re._parser is unavailable; scanning without a prefilter")
+        return ""
+    atoms: Set[str] = set()
+    ignorecase = False
+    for pattern in patterns:
+        try:
+            parsed = _sre_parse.parse(pattern)
+            found, folded = _first_atoms(list(parsed), bool(parsed.state.flags & re.IGNORECASE))
+        except Exception as exc:
+            # The parser is private and may change shape between releases.
+            logger.info("Cannot analyse check pattern %r (%s); scanning without a prefilter", pattern, exc)
+            return ""
+        if not found:
+            logger.debug("Check pattern %r can start with any character; scanning without a prefilter", pattern)
+            return ""
+        atoms |= found
+        ignorecase = ignorecase or folded
+    char_class = f"[{''.join(sorted(atoms))}]"
+    if ignorecase:
+        char_class = f"(?i:{char_class})"
+    return f"(?={char_class})"
+
+
+class CompiledScanner:
+    """Scans text for every enabled check with a single regex pass.
+
+    Checks provided by ``dictionaries`` take one automaton pass per matcher
+    instead; a check name defined both ways uses the dictionary. Patterns with
+    capturing groups are searched on their own after the combined pass.
+    """
+
+    def __init__(
+        self,
+        patterns: Dict[str, str],
+        checks: Iterable[str],
+        dictionaries: Sequence[DictionaryMatcher] = (),
+    ) -> None:
+        self.cache_id = next(_SCANNER_IDS)
+        self._dictionaries: Tuple[DictionaryMatcher, ...] = tuple(dictionaries)
+        listed = {check for matcher in self._dictionaries for check in matcher.checks}
+        # Preserve policy order; it decides which violation is reported first.
+        self.checks: Tuple[str, ...] = tuple(
+            dict.fromkeys(check for check in checks if check in patterns or check in listed)
+        )
+        # A matcher shared with other check sets may report checks not enabled here.
+        self._dictionary_filter: Optional[Set[str]] = set(self.checks) if not listed <= set(self.checks) else None
+        self._group_to_check: Dict[str, str] = {}
+        self._singles: Dict[str, Pattern[str]] = {}
+        # Checks that cannot join the alternation: backreferences such as \1
+        # would point at another check's group there.
+        self._fallbacks: Dict[str, Pattern[str]] = {}
+        alternatives = []
+        embedded = []
+        for check in self.checks:
+            if check in listed:
+                continue
+            single = self._singles[check] = re.compile(patterns[check])
+            if single.groups:
+                logger.debug("Check pattern %r has capturing groups; searching it standalone", patterns[check])
+                self._fallbacks[check] = single
+                continue
+            group = f"c{len(embedded)}"
+            self._group_to_check[group] = check
+            alternatives.append(f"(?P<{group}>{_scoped(patterns[check])})")
+            embedded.append(patterns[check])
+        # The lookahead lets the engine discard most positions with a single
+        # character-class test instead of trying every alternative.
+        guard = _prefilter(embedded) if embedded else ""
+        self._combined: Optional[Pattern[str]] = (
+            re.compile(f"{guard}(?:{'|'.join(alternatives)})") if alternatives else None
+        )
+
+    def scan(self, text: str) -> Tuple[str, ...]:
+        """Returns every check matching ``text``, in policy order."""
+        found: Set[str] = set()
+        for matcher in self._dictionaries:
+            found |= matcher.found_checks(text)
+        if self._dictionary_filter is not None:
+            found &= self._dictionary_filter
+        if self._combined is not None:
+            regex_found = {self._group_to_check[m.lastgroup] for m in self._combined.finditer(text)}
+            if regex_found:
+                # A leftmost match can hide an overlapping match of another check.
+                # That only matters once something already matched, so confirm the
+                # remaining checks individually on this (rare) path.
+                for check, pattern in self._singles.items():
+                    if check not in regex_found and check not in self._fallbacks and pattern.search(text):
+                        regex_found.add(check)
+                found |= regex_found
+        for check, pattern in self._fallbacks.items():
+            if pattern.search(text):
+                found.add(check)
+        if not found:
+            return ()
+        return tuple(check for check in self.checks if check in found)
+
+    def first_matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """``(start, end, check)`` of the leftmost non-overlapping matches, from one pass.
+
+        A match overlapped by an earlier one is not reported; ``spans`` finds
+        those too. Dictionary and standalone matches are merged in as found, so
+        they may overlap other matches.
+        """
+        found = []
+        if self._combined is not None:
+            found = [
+                (match.start(), match.end(), self._group_to_check[match.lastgroup])
+                for match in self._combined.finditer(text)
+                if match.end() > match.start()
+            ]
+        if self._dictionaries or self._fallbacks:
+            for matcher in self._dictionaries:
+                found.extend(self._enabled(matcher.matches(text)))
+            found.extend(
+                (match.start(), match.end(), check)
+                for check, pattern in self._fallbacks.items()
+                for match in pattern.finditer(text)
+                if match.end() > match.start()
+            )
+            found.sort()
+        return found
+
+    def spans(self, text: str, pos: int = 0) -> List[Tuple[int, int, str]]:
+        """Returns ``(start, end, check)`` for every match starting at or after ``pos``.
+
+        Unlike ``scan`` this reports overlapping matches of different checks,
+        sorted by position, so callers can redact all of them. Text before
+        ``pos`` is only used as context (e.g. for ``\\b``).
+        """
+        found: List[Tuple[int, int, str]] = []
+        for matcher in self._dictionaries:
+            found.extend(self._enabled(matcher.matches(text, pos)))
+        combined_hit = self._combined is not None and self._combined.search(text, pos) is not None
+        if combined_hit or self._fallbacks:
+            found.extend(
+                (match.start(), match.end(), check)
+                for check, pattern in self._singles.items()
+                if combined_hit or check in self._fallbacks
+                for match in pattern.finditer(text, pos)
+                if match.end() > match.start()
+            )
+        found.sort()
+        return found
+
+    def _enabled(self, matches: List[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+        if self._dictionary_filter is None or not matches:
+            return matches
+        return [match for match in matches if match[2] in self._dictionary_filter]
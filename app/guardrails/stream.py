@@ -0,0 +1,135 @@
+"""Incremental inspection and redaction of tool output.
+
+``StreamingInspector`` consumes output chunk by chunk and emits text that has
+already been checked, so large or incrementally produced outputs never need
+to be held in full. It keeps ``overlap`` characters unreleased between chunks:
+a match that spans a chunk boundary is still caught as long as it is no
+longer than ``overlap`` characters.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from app.guardrails.scanner import CompiledScanner
+
+# Comfortably longer than any built-in pattern's matches.
+DEFAULT_OVERLAP = 256
+REPLACEMENT = "[REDACTED:{check}]"
+
+Span = Tuple[int, int, str]
+
+
+def redact(text: str, spans: Sequence[Span], replacement: str = REPLACEMENT, offset: int = 0) -> str:
+    """Replaces each span (merged with any it overlaps) of ``text``.
+
+    Span positions are relative to ``offset`` within the original string.
+    """
+    if not spans:
+        return text
+    parts: List[str] = []
+    position = 0
+    index = 0
+    while index < len(spans):
+        start, end, check = spans[index]
+        index += 1
+        while index < len(spans) and spans[index][0] < end:
+            end = max(end, spans[index][1])
+            index += 1
+        parts.append(text[position:start - offset])
+        parts.append(replacement.format(check=check))
+        position = end - offset
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+class StreamingInspector:
+    """Checks a stream of text chunks against one policy's scanner.
+
+    With ``redact=True`` every match is rewritten before it is emitted. With
+    ``redact=False`` (a blocking policy) the inspector stops at the first
+    match and emits nothing further, so no violating text is ever released.
+    ``violations`` lists the matched checks in the order they were found.
+    """
+
+    def __init__(
+        self,
+        scanner: CompiledScanner,
+        redact: bool = True,
+        overlap: int = DEFAULT_OVERLAP,
+        replacement: str = REPLACEMENT,
+    ) -> None:
+        if overlap < 1:
+            raise ValueError("overlap must be positive")
+        self.scanner = scanner
+        self.redact = redact
+        self.overlap = overlap
+        self.replacement = replacement
+        self.violations: List[str] = []
+        self.redactions = 0
+        self.stopped = False
+        # Already released text, kept only as match context for the next scan.
+        self._context = ""
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        """Adds a chunk and returns the text that is now safe to release."""
+        if self.stopped:
+            return ""
+        self._pending += chunk
+        if len(self._pending) <= self.overlap:
+            return ""
+        return self._release(final=False)
+
+    def close(self) -> str:
+        """Releases whatever is still held back once the stream has ended."""
+        if self.stopped or not self._pending:
+            return ""
+        return self._release(final=True)
+
+    def inspect(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Filters a whole stream, closing the source early if it gets blocked."""
+        source = iter(chunks)
+        try:
+            for chunk in source:
+                released = self.feed(chunk)
+                if released:
+                    yield released
+                if self.stopped:
+                    return
+            released = self.close()
+            if released:
+                yield released
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    def _release(self, final: bool) -> str:
+        start = len(self._context)
+        buffer = self._context + self._pending
+        spans = self.scanner.spans(buffer, start)
+        cut = len(buffer) if final else len(buffer) - self.overlap
+        # Hold back matches that reach past the cut; more input may extend them.
+        # A match already longer than ``overlap`` is redacted piecewise instead.
+        while True:
+            held = [s for s, e, _ in spans if s < cut < e and cut - s <= self.overlap]
+            if not held:
+                break
+            cut = min(held)
+        released_spans = [(s, min(e, cut), check) for s, e, check in spans if s < cut]
+
+        self._note(released_spans)
+        if released_spans and not self.redact:
+            self.stopped = True
+            self._pending = ""
+            return ""
+        self.redactions += len(released_spans)
+        released = redact(buffer[start:cut], released_spans, self.replacement, offset=start)
+        self._context = buffer[max(0, cut - self.overlap):cut]
+        self._pending = buffer[cut:]
+        return released
+
+    def _note(self, spans: Sequence[Span]) -> None:
+        for _start, _end, check in spans:
+            if check not in self.violations:
+                self.violations.append(check)
@@ -0,0 +1,174 @@
+"""Flattening of nested tool payloads for single-pass guardrail scanning.
+
+``flatten`` walks dicts, lists and tuples iteratively (no recursion, so deep
+documents cannot exhaust the stack) and joins every string leaf into one
+buffer with an offset map. The buffer is scanned once; hits are mapped back to
+the leaf they fall in and reported with its JSON path, e.g.
+``$.customers[3].notes``. Dict keys are structure, not content, and are not
+scanned.
+"""
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, List, Set, Tuple
+
+from app.guardrails.scanner import CompiledScanner
+
+# Separates leaves in the buffer. Matches that run across it only cost a
+# rescan of the leaves involved.
+_SEPARATOR = "\x00"
+_PLAIN_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+DEFAULT_MAX_DEPTH = 64
+DEFAULT_MAX_CHARS = 16 * 1024 * 1024
+DEFAULT_MAX_NODES = 1_000_000
+
+
+class PayloadLimitExceeded(Exception):
+    """Raised when a payload is too deep or too large to inspect."""
+
+
+@dataclass(frozen=True)
+class PayloadHit:
+    """One check matching inside one string leaf (``start``/``end`` are within the leaf)."""
+
+    path: str
+    check: str
+    start: int
+    end: int
+    leaf: int
+
+
+class FlatPayload:
+    """String leaves of a payload joined into ``text``, with a map back to the tree."""
+
+    def __init__(self, payload: Any) -> None:
+        self.payload = payload
+        self.text = ""
+        # Per node (every container and leaf): parent node, key within the
+        # parent and the value itself. Node 0 is the root.
+        self.parents = array("i", [-1])
+        self.keys: List[Any] = [None]
+        self.values: List[Any] = [payload]
+        # Per string leaf: its node and where it starts in ``text``.
+        self.leaf_nodes = array("I")
+        self.leaf_starts = array("Q")
+
+    def __len__(self) -> int:
+        return len(self.leaf_nodes)
+
+    def leaf_text(self, leaf: int) -> str:
+        return self.values[self.leaf_nodes[leaf]]
+
+    def path(self, node: int) -> str:
+        parts: List[str] = []
+        while node > 0:
+            key = self.keys[node]
+            if isinstance(key, int):
+                parts.append(f"[{key}]")
+            elif isinstance(key, str) and _PLAIN_KEY.match(key):
+                parts.append(f".{key}")
+            else:
+                parts.append(f"[{str(key)!r}]")
+            node = self.parents[node]
+        return "$" + "".join(reversed(parts))
+
+    def scan(self, scanner: CompiledScanner) -> List[PayloadHit]:
+        """Every match in every leaf, in document order.
+
+        One pass over the buffer finds the leaves with any match; only those
+        are scanned again for every (possibly overlapping) match. A match the
+        single pass hides always overlaps one it reports, so it lies in a leaf
+        that is rescanned.
+        """
+        starts = self.leaf_starts
+        candidates: Set[int] = set()
+        for start, end, _check in scanner.first_matches(self.text):
+            first = bisect_right(starts, start) - 1
+            last = bisect_right(starts, end - 1) - 1
+            candidates.update(range(first, last + 1))
+        return [
+            PayloadHit(self.path(self.leaf_nodes[leaf]), check, start, end, leaf)
+            for leaf in sorted(candidates)
+            for start, end, check in scanner.spans(self.leaf_text(leaf))
+        ]
+
+    def replace(self, leaves: Dict[int, str]) -> Any:
+        """A copy of the payload with the given leaves replaced.
+
+        Only containers on the way to a replaced leaf are copied; everything
+        else is shared with the original.
+        """
+        copies: Dict[int, Any] = {}
+        for leaf, value in leaves.items():
+            node = self.leaf_nodes[leaf]
+            if node == 0:
+                return value  # the payload itself is the string
+            while True:
+                parent = self.parents[node]
+                container = copies.get(parent)
+                if container is not None:
+                    container[self.keys[node]] = value
+                    break
+                original = self.values[parent]
+                container = copies[parent] = dict(original) if isinstance(original, dict) else list(original)
+                container[self.keys[node]] = value
+                if parent == 0:
+                    break
+                node, value = parent, container
+        # Tuples were edited as lists. Children always have higher node ids
+        # than their parents, so converting deepest first lets each tuple be
+        # re-linked into its parent's copy before that parent is converted.
+        for node in sorted(copies, reverse=True):
+            if isinstance(self.values[node], tuple):
+                copies[node] = tuple(copies[node])
+                if node > 0:
+                    copies[self.parents[node]][self.keys[node]] = copies[node]
+        return copies.get(0, self.payload)
+
+
+def flatten(
+    payload: Any,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    max_nodes: int = DEFAULT_MAX_NODES,
+) -> FlatPayload:
+    """Collects the string leaves of ``payload`` in document order."""
+    flat = FlatPayload(payload)
+    parts: List[str] = []
+    chars = 0
+    stack: List[Tuple[Any, int, int]] = [(payload, 0, 0)]
+    parents, keys, values = flat.parents, flat.keys, flat.values
+    while stack:
+        value, node, depth = stack.pop()
+        if isinstance(value, str):
+            flat.leaf_nodes.append(node)
+            flat.leaf_starts.append(chars)
+            parts.append(value)
+            chars += len(value) + 1
+            if chars > max_chars:
+                raise PayloadLimitExceeded(f"payload exceeds {max_chars} characters")
+            continue
+        if isinstance(value, dict):
+            children = list(value.items())
+        elif isinstance(value, (list, tuple)):
+            children = list(enumerate(value))
+        else:
+            continue
+        if depth >= max_depth:
+            raise PayloadLimitExceeded(f"payload nested deeper than {max_depth} levels")
+        first = len(values)
+        if first + len(children) > max_nodes:
+            raise PayloadLimitExceeded(f"payload has more than {max_nodes} elements")
+        for key, child in children:
+            parents.append(node)
+            keys.append(key)
+            values.append(child)
+        # Reversed so that popping visits children in document order.
+        for index in range(len(children) - 1, -1, -1):
+            stack.append((children[index][1], first + index, depth + 1))
+    flat.text = _SEPARATOR.join(parts)
+    return flat
@@ -0,0 +1,373 @@
+"""Batch ingestion of JSON-lines task feeds.
+
+Each input line is one task object::
+
+    {"task_id": "t1", "description": "lookup customer 7", "role": "analyst",
+     "parameters": {"tool": "data_lookup", "query": "customer 7"}}
+
+``request_id`` is accepted for ``task_id`` and ``title``/``body`` for
+``description``, so ``requests.jsonl``-style feeds can be replayed as-is.
+Input is streamed line by line from a file or stdin and run through the
+orchestrator on a bounded thread pool; one response line is written per task,
+in input order (default) or as tasks finish (``--unordered``).
+
+Every ``--checkpoint-every`` tasks the output is flushed and a checkpoint
+(``<output>.ckpt``) records the input byte offset below which every line has
+been answered, the output size at that point and which later lines are
+already answered. ``--resume`` truncates the output back to that size and
+continues from there, so an interrupted run neither loses nor repeats
+responses. ``--processes N`` splits a file into N byte ranges on line
+boundaries, ingests them in separate processes and concatenates the parts.
+
+    python -m app.ingest tasks.jsonl --output responses.jsonl --workers 16
+    cat tasks.jsonl | python -m app.ingest - --output responses.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.agent.orchestrator import AgentOrchestrator
+from app.agent.types import Task
+from app.guardrails.policy import GuardrailViolation
+from app.logging.encoding import encode_response
+from app.main import build_orchestrator, load_policies
+
+DEFAULT_POLICY = "policies/default.yaml"
+DEFAULT_ROLE = "analyst"
+
+
+class InvalidTaskLine(ValueError):
+    """Raised when an input line does not describe a task."""
+
+
+def parse_task(line: bytes, default_role: str = DEFAULT_ROLE) -> Task:
+    try:
+        data = json.loads(line)
+    except ValueError as exc:
+        raise InvalidTaskLine(f"not JSON: {exc}") from None
+    if not isinstance(data, dict):
+        raise InvalidTaskLine(f"expected an object, got {type(data).__name__}")
+    task_id = data.get("task_id", data.get("request_id"))
+    description = data.get("description")
+    if description is None:
+        description = "\n\n".join(str(data[key]) for key in ("title", "body") if data.get(key))
+    if not task_id or not description:
+        raise InvalidTaskLine("task_id and description are required")
+    parameters = data.get("parameters") or {}
+    if not isinstance(parameters, dict):
+        raise InvalidTaskLine("parameters must be an object")
+    return Task(
+        task_id=str(task_id),
+        description=str(description),
+        role=str(data.get("role") or default_role),
+        parameters=parameters,
+        tenant=str(data["tenant"]) if data.get("tenant") else None,
+        model=str(data["model"]) if data.get("model") else None,
+    )
+
+
+def read_lines(
+    stream: IO[bytes], start: int = 0, end: Optional[int] = None, align: bool = False
+) -> Iterator[Tuple[int, int, bytes]]:
+    """Yields ``(offset, next_offset, line)`` for non-blank lines starting in ``[start, end)``.
+
+    With ``align`` ``start`` may fall inside a line, which then belongs to the
+    previous range. Unseekable streams are read through up to ``start``.
+    """
+    offset = 0
+    if start and stream.seekable():
+        if align:
+            stream.seek(start - 1)
+            offset = start - 1 + len(stream.readline())
+        else:
+            stream.seek(start)
+            offset = start
+    for line in stream:
+        line_start, offset = offset, offset + len(line)
+        if line_start < start:
+            continue
+        if end is not None and line_start >= end:
+            break
+        if line.strip():
+            yield line_start, offset, line
+
+
+@dataclass
+class Checkpoint:
+    """Resume point of one ingestion output."""
+
+    input_offset: int = 0
+    output_offset: int = 0
+    tasks: int = 0
+    errors: int = 0
+    # Lines past ``input_offset`` whose responses are already in the output
+    # (only with --unordered); at most the in-flight window.
+    done_after: List[int] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Checkpoint"]:
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                return cls(**json.load(handle))
+        except FileNotFoundError:
+            return None
+
+    def save(self, path: str) -> None:
+        temp = f"{path}.tmp"
+        with open(temp, "w", encoding="utf-8") as handle:
+            json.dump(asdict(self), handle)
+        os.replace(temp, path)
+
+
+@dataclass
+class IngestStats:
+    """Counts for one ingestion run (``resumed`` tasks were answered by an earlier run)."""
+
+    tasks: int = 0
+    errors: int = 0
+    resumed: int = 0
+    seconds: float = 0.0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def tasks_per_second(self) -> float:
+        return self.tasks / self.seconds if self.seconds else 0.0
+
+    def merge(self, other: "IngestStats") -> None:
+        self.tasks += other.tasks
+        self.errors += other.errors
+        self.resumed += other.resumed
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "tasks_per_second": round(self.tasks_per_second, 1)}
+
+
+def _answer(orchestrator: AgentOrchestrator, offset: int, line: bytes, default_role: str) -> Tuple[bytes, str]:
+    """Runs one input line; returns the serialized output line and its status."""
+    try:
+        task = parse_task(line, default_role)
+    except InvalidTaskLine as exc:
+        record: Dict[str, Any] = {"input_offset": offset, "status": "invalid", "error": str(exc)}
+    else:
+        try:
+            response = orchestrator.run_task(task)
+        except GuardrailViolation as exc:
+            # A task refused by policy is an answer, not a failure: same
+            # status as the orchestrator's own rejections.
+            record = {"task_id": task.task_id, "status": "rejected", "violation": str(exc)}
+        except Exception as exc:
+            record = {"task_id": task.task_id, "status": "error", "error": f"{type(exc).__name__}: {exc}"}
+        else:
+            return encode_response(response), response.status
+    return (json.dumps(record, default=str) + "\n").encode("utf-8"), record["status"]
+
+
+class _Pending:
+    __slots__ = ("offset", "next_offset", "future", "written")
+
+    def __init__(self, offset: int, next_offset: int, future: "Optional[Future[Tuple[bytes, str]]]") -> None:
+        self.offset = offset
+        self.next_offset = next_offset
+        self.future = future
+        self.written = False
+
+
+def ingest(
+    orchestrator: AgentOrchestrator,
+    source: IO[bytes],
+    output_path: str,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = False,
+    workers: int = 8,
+    ordered: bool = True,
+    checkpoint_every: int = 100,
+    default_role: str = DEFAULT_ROLE,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> IngestStats:
+    """Answers every task line of ``source`` in ``[start, end)`` into ``output_path``."""
+    checkpoint_path = checkpoint_path or f"{output_path}.ckpt"
+    checkpoint = Checkpoint.load(checkpoint_path) if resume else None
+    stats = IngestStats()
+    if checkpoint is not None:
+        output = open(output_path, "r+b" if os.path.exists(output_path) else "w+b")
+        output.truncate(checkpoint.output_offset)
+        output.seek(checkpoint.output_offset)
+    else:
+        checkpoint = Checkpoint(input_offset=start)
+        output = open(output_path, "wb")
+    stats.resumed = checkpoint.tasks
+    resumed_errors = checkpoint.errors
+    skip = set(checkpoint.done_after)
+    resume_from = max(start, checkpoint.input_offset)
+    # A range start may fall mid-line; checkpointed offsets are line starts.
+    lines = read_lines(source, resume_from, end, align=resume_from == start and start > 0)
+
+    pending: Deque[_Pending] = deque()
+    window = max(1, workers) * 4
+    since_checkpoint = 0
+    began = time.perf_counter()
+
+    def write(entry: _Pending) -> None:
+        nonlocal since_checkpoint
+        data, status = entry.future.result()
+        output.write(data)
+        entry.written = True
+        stats.tasks += 1
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        if status in ("invalid", "error"):
+            stats.errors += 1
+        since_checkpoint += 1
+
+    def save() -> None:
+        output.flush()
+        checkpoint.output_offset = output.tell()
+        checkpoint.tasks = stats.resumed + stats.tasks
+        checkpoint.errors = resumed_errors + stats.errors
+        checkpoint.done_after = [entry.offset for entry in pending if entry.written]
+        checkpoint.save(checkpoint_path)
+
+    def drain(limit: int) -> None:
+        nonlocal since_checkpoint
+        while len(pending) > limit:
+            if ordered:
+                if not pending[0].written:
+                    write(pending[0])
+            else:
+                waiting = {entry.future: entry for entry in pending if not entry.written}
+                if waiting:
+                    done, _ = wait(waiting, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(waiting[future])
+            while pending and pending[0].written:
+                checkpoint.input_offset = pending.popleft().next_offset
+            if since_checkpoint >= checkpoint_every:
+                save()
+                since_checkpoint = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+            for offset, next_offset, line in lines:
+                entry = _Pending(offset, next_offset, None)
+                if offset in skip:
+                    entry.written = True  # answered before the interruption
+                else:
+                    entry.future = pool.submit(_answer, orchestrator, offset, line, default_role)
+                pending.append(entry)
+                drain(window)
+            drain(0)
+        save()
+    finally:
+        output.close()
+    stats.seconds = time.perf_counter() - began
+    return stats
+
+
+def _close(orchestrator: AgentOrchestrator) -> None:
+    orchestrator.audit_logger.close()
+    if orchestrator.tracer is not None:
+        orchestrator.tracer.close()
+
+
+def split_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Splits a file into ``parts`` byte ranges; ``read_lines(align=True)`` snaps them to lines."""
+    size = os.path.getsize(path)
+    bounds = [size * index // parts for index in range(parts + 1)]
+    return [(bounds[index], bounds[index + 1]) for index in range(parts)]
+
+
+def _ingest_part(
+    input_path: str, output_path: str, start: int, end: int, part: int, policy_path: str, options: Dict[str, Any]
+) -> IngestStats:
+    """Worker-process entry point: one orchestrator per process, one part file per range."""
+    audit_log_path = os.getenv("AUDIT_LOG_PATH")
+    if audit_log_path:
+        # Processes must not interleave batched appends in one audit log.
+        os.environ["AUDIT_LOG_PATH"] = f"{audit_log_path}.part{part}"
+    orchestrator = build_orchestrator(load_policies(policy_path))
+    try:
+        with open(input_path, "rb") as source:
+            return ingest(orchestrator, source, f"{output_path}.part{part}", start=start, end=end, **options)
+    finally:
+        _close(orchestrator)
+
+
+def ingest_parallel(
+    input_path: str, output_path: str, processes: int, policy_path: str = DEFAULT_POLICY, **options: Any
+) -> IngestStats:
+    """Ingests ``input_path`` with ``processes`` worker processes and concatenates their outputs.
+
+    Each part keeps its own checkpoint, so ``resume=True`` resumes every part.
+    Part files are removed once merged into ``output_path``.
+    """
+    ranges = split_ranges(input_path, processes)
+    stats = IngestStats()
+    began = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(_ingest_part, input_path, output_path, start, end, part, policy_path, options)
+            for part, (start, end) in enumerate(ranges)
+        ]
+        for future in futures:
+            stats.merge(future.result())
+    with open(output_path, "wb") as output:
+        for part in range(processes):
+            part_path = f"{output_path}.part{part}"
+            with open(part_path, "rb") as handle:
+                shutil.copyfileobj(handle, output)
+            os.remove(part_path)
+            os.remove(f"{part_path}.ckpt")
+    stats.seconds = time.perf_counter() - began
+    return stats
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a JSON-lines task feed through the agent.")
+    parser.add_argument("input", help="Task feed path, or - for stdin")
+    parser.add_argument("--output", required=True, help="Response JSON-lines path")
+    parser.add_argument("--policy", default=DEFAULT_POLICY, help="Policy file, or a directory of per-tenant policies")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent tasks per process")
+    parser.add_argument("--processes", type=int, default=1, help="Split the input across this many processes")
+    parser.add_argument("--unordered", action="store_true", help="Write responses as tasks finish")
+    parser.add_argument("--resume", action="store_true", help="Continue from the output's checkpoint")
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    parser.add_argument("--role", default=DEFAULT_ROLE, help="Role for lines that do not set one")
+    args = parser.parse_args(argv)
+    options = {
+        "resume": args.resume,
+        "workers": args.workers,
+        "ordered": not args.unordered,
+        "checkpoint_every": args.checkpoint_every,
+        "default_role": args.role,
+    }
+
+    if args.processes > 1:
+        if args.input == "-":
+            parser.error("--processes needs a file input")
+        stats = ingest_parallel(args.input, args.output, args.processes, args.policy, **options)
+    else:
+        orchestrator = build_orchestrator(load_policies(args.policy))
+        try:
+            if args.input == "-":
+                stats = ingest(orchestrator, sys.stdin.buffer, args.output, **options)
+            else:
+                with open(args.input, "rb") as source:
+                    stats = ingest(orchestrator, source, args.output, **options)
+        finally:
+            _close(orchestrator)
+    print(json.dumps(stats.to_dict()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
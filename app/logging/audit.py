@@ -2,70 +2,153 @@
 from __future__ import annotations
 
 import json
-import os
-from datetime import datetime
+import time
 from typing import Any, Dict, List, Optional
 
 from app.agent.types import AgentResponse, StepResult, Task
+from app.logging.encoding import encode_audit_record, encode_audit_step, encode_planner_step, utc_isoformat
+from app.logging.store import AuditRecordStore, CompactRecord
+from app.logging.writer import AuditLogWriter
+
+# Who refused a task, by ``log_rejection`` source, for its summary.
+_REJECTED_BY = {"admission": "admission control", "policy": "policy"}
+
+
+class AuditRecord:
+    """The audit record of a running task, with each step already encoded as JSON."""
+
+    __slots__ = ("task", "policy", "started_at", "steps", "payload")
+
+    def __init__(self, task: Task, policy: Optional[Dict[str, Any]] = None) -> None:
+        self.task = task
+        self.policy = policy
+        self.started_at = utc_isoformat(time.time_ns())
+        self.steps: List[str] = []
+        # The serialized record once the task has ended.
+        self.payload: Optional[str] = None
+
+    def encode(self, response: Optional[AgentResponse] = None) -> str:
+        return encode_audit_record(self.task, self.started_at, self.steps, self.policy, response)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return json.loads(self.payload if self.payload is not None else self.encode())
 
 
 class AuditLogger:
-    """Collects auditable traces for every task."""
-
-    def __init__(self, log_path: Optional[str] = None) -> None:
-        self.log_path = log_path
-        self.records: List[Dict[str, Any]] = []
-
-    def start_task(self, task: Task) -> None:
-        entry = {
-            "task_id": task.task_id,
-            "role": task.role,
-            "description": task.description,
-            "parameters": task.parameters,
-            "started_at": datetime.utcnow().isoformat(),
-            "steps": [],
-        }
-        self.records.append(entry)
-
-    def log_reasoning(self, step: int, rationale: str) -> None:
-        if not self.records:
+    """Collects auditable traces for every task.
+
+    ``start_task`` returns the task's record; passing it back to the other
+    methods keeps traces separate when several tasks run concurrently. Without
+    it they fall back to the most recently started task.
+
+    Steps are encoded as they are logged and the record is serialized once,
+    as text, when the task ends (see ``app.logging.encoding``).
+
+    With a ``log_path`` (or an explicit ``writer``) completed records are
+    appended to a JSON-lines file by a background ``AuditLogWriter``; call
+    ``flush()`` or ``close()`` to make sure everything reached disk.
+
+    Completed records are kept in a bounded ``AuditRecordStore`` (``records``);
+    pass ``store`` to change its capacity or enable spilling to disk.
+    """
+
+    def __init__(
+        self,
+        log_path: Optional[str] = None,
+        writer: Optional[AuditLogWriter] = None,
+        store: Optional[AuditRecordStore] = None,
+    ) -> None:
+        self.log_path = writer.log_path if writer is not None else log_path
+        self.records = store if store is not None else AuditRecordStore()
+        # Most recently started record while it is in progress, for callers
+        # that do not pass one back.
+        self._current: Optional[AuditRecord] = None
+        self.writer = writer
+        if self.writer is None and log_path:
+            self.writer = AuditLogWriter(log_path)
+
+    def start_task(self, task: Task, policy: Optional[Dict[str, Any]] = None) -> AuditRecord:
+        entry = AuditRecord(task, policy)
+        self._current = entry
+        return entry
+
+    def _resolve(self, record: Optional[AuditRecord]) -> Optional[AuditRecord]:
+        return record if record is not None else self._current
+
+    def log_reasoning(self, step: int, rationale: str, record: Optional[AuditRecord] = None) -> None:
+        entry = self._resolve(record)
+        if entry is None:
             return
-        self.records[-1]["steps"].append(
-            {"step": step, "rationale": rationale, "event": "planner"}
-        )
+        entry.steps.append(encode_planner_step(step, rationale))
 
-    def log_step(self, result: StepResult) -> None:
-        if not self.records:
+    def log_step(self, result: StepResult, record: Optional[AuditRecord] = None) -> None:
+        entry = self._resolve(record)
+        if entry is None:
             return
-        self.records[-1]["steps"].append(
-            {
-                "step": result.step,
-                "rationale": result.rationale,
-                "tool": result.tool_used,
-                "tool_input": result.tool_input,
-                "tool_output": result.tool_output,
-                "latency_ms": result.latency_ms,
-                "blocked": result.blocked,
-                "violation": result.violation,
-            }
-        )
+        entry.steps.append(encode_audit_step(result))
 
-    def end_task(self, response: AgentResponse) -> None:
-        if not self.records:
+    def end_task(self, response: AgentResponse, record: Optional[AuditRecord] = None) -> None:
+        entry = self._resolve(record)
+        if entry is None:
             return
-        self.records[-1].update(
-            {
-                "completed_at": response.completed_at.isoformat(),
-                "status": response.status,
-                "summary": response.summary,
-                "safety_score": response.safety_score,
-                "metrics": response.metrics,
-            }
+        # Serialize once; the same text feeds the log file and the store.
+        payload = entry.payload = entry.encode(response)
+        self.records.add(CompactRecord(entry.task.task_id, entry.task.role, response.status, payload))
+        if self._current is entry:
+            # Ended records are served by the store; do not keep this one alive.
+            self._current = None
+        if self.writer is not None:
+            self.writer.write(payload + "\n")
+
+    def log_rejection(self, task: Task, reason: str, detail: str, source: str = "admission") -> AgentResponse:
+        """Records a task that was refused before it ran and returns its response.
+
+        ``source`` is ``admission`` (admission control) or ``policy`` (e.g. no
+        policy is loaded for the task's tenant). The record has status
+        ``rejected`` and a single blocked step whose violation is
+        ``<source>:<reason>``, so it is indexed and queried like any other
+        violation.
+        """
+        entry = self.start_task(task)
+        entry.steps.append(
+            json.dumps(
+                {
+                    "step": 0,
+                    "rationale": detail,
+                    "event": source,
+                    "blocked": True,
+                    "violation": f"{source}:{reason}",
+                }
+            )
+        )
+        response = AgentResponse(
+            task_id=task.task_id,
+            status="rejected",
+            summary=f"Task rejected by {_REJECTED_BY.get(source, source)} ({reason}).",
+            steps=[],
+            metrics={"rejection_reason": reason},
+            safety_score=1.0,
         )
-        if self.log_path:
-            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
-            with open(self.log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(self.records[-1]) + "\n")
+        self.end_task(response, record=entry)
+        return response
+
+    def flush(self) -> None:
+        """Blocks until every completed record has been written to the log file."""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self) -> None:
+        """Flushes and stops the background writer and closes the store."""
+        if self.writer is not None:
+            self.writer.close()
+        self.records.close()
 
     def latest_record(self) -> Optional[Dict[str, Any]]:
-        return self.records[-1] if self.records else None
+        """Returns the in-progress record if a task is running, else the latest completed one."""
+        if self._current is not None:
+            return self._current.to_dict()
+        return self.records.latest()
+
+    def get_record(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the most recent completed record for ``task_id``, if any."""
+        return self.records.get(task_id)
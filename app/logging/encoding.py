@@ -0,0 +1,166 @@
+"""Direct JSON encoding of task results for audit records and responses.
+
+The audit and ingest paths used to copy every ``StepResult`` into a dict and
+run the nested record through ``json.dumps``. The encoders here write the
+known fields straight into the output text. Only free-form values (tool
+inputs and outputs, parameters, metrics) go through ``json``'s C encoder,
+which is built once instead of per call. The output is the same text
+``json.dumps`` produced for the equivalent dicts, so readers of the audit log
+and the ingest output are unaffected.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from json.encoder import c_make_encoder, encode_basestring_ascii
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.agent.types import AgentResponse, Span, StepResult, Task
+
+_SPECIAL_FLOATS = {"nan": "NaN", "inf": "Infinity", "-inf": "-Infinity"}
+
+
+def _raise_type_error(value: Any) -> Any:
+    return json.JSONEncoder().default(value)
+
+
+def _value_encoder(default: Callable[[Any], Any]) -> Callable[[Any], str]:
+    """``json.dumps`` with its default settings, minus the per-call encoder setup."""
+    if c_make_encoder is None:  # interpreter without the C accelerator
+        return json.JSONEncoder(default=default).encode
+    # No circular-reference markers: the encoder keeps no state between calls.
+    chunks = c_make_encoder(None, default, encode_basestring_ascii, None, ": ", ", ", False, False, True)
+
+    def encode(value: Any) -> str:
+        return "".join(chunks(value, 0))
+
+    return encode
+
+
+_dumps = _value_encoder(_raise_type_error)
+# Ingest output stringifies values JSON has no type for (e.g. datetimes).
+_dumps_lenient = _value_encoder(str)
+
+
+def _encoder(dumps: Callable[[Any], str]) -> Callable[[Any], str]:
+    def value(item: Any) -> str:
+        if item is None:
+            return "null"
+        if item is True:
+            return "true"
+        if item is False:
+            return "false"
+        kind = type(item)
+        if kind is str:
+            return encode_basestring_ascii(item)
+        if kind is int:
+            return int.__repr__(item)
+        if kind is float:
+            text = float.__repr__(item)
+            return _SPECIAL_FLOATS.get(text, text)
+        return dumps(item)
+
+    return value
+
+
+encode_value = _encoder(_dumps)
+_lenient = _encoder(_dumps_lenient)
+
+# (seconds since the epoch, its ISO text): consecutive records mostly share
+# the second, so only the microseconds are formatted per call.
+_second: Tuple[int, str] = (-1, "")
+
+
+def utc_isoformat(time_ns: int) -> str:
+    """``datetime.utcfromtimestamp(time_ns / 1e9).isoformat()`` without building a datetime."""
+    global _second
+    seconds, nanos = divmod(time_ns, 1_000_000_000)
+    cached = _second
+    if cached[0] != seconds:
+        cached = _second = (seconds, datetime.utcfromtimestamp(seconds).isoformat())
+    micros = nanos // 1000
+    return f"{cached[1]}.{micros:06d}" if micros else cached[1]
+
+
+def encode_audit_step(step: StepResult) -> str:
+    """The audit log's JSON for one step (``tool`` rather than ``tool_used``; findings and cached only when set)."""
+    value = encode_value
+    text = (
+        f'{{"step": {value(step.step)}, "rationale": {value(step.rationale)}, "tool": {value(step.tool_used)},'
+        f' "tool_input": {value(step.tool_input)}, "tool_output": {value(step.tool_output)},'
+        f' "latency_ms": {value(step.latency_ms)}, "blocked": {value(step.blocked)},'
+        f' "violation": {value(step.violation)}'
+    )
+    if step.findings:
+        text += f', "findings": {_dumps(step.findings)}'
+    if step.cached:
+        text += ', "cached": true'
+    return text + "}"
+
+
+def encode_planner_step(step: int, rationale: str) -> str:
+    return f'{{"step": {encode_value(step)}, "rationale": {encode_value(rationale)}, "event": "planner"}}'
+
+
+def encode_audit_record(
+    task: Task,
+    started_at: str,
+    steps: Sequence[str],
+    policy: Optional[Dict[str, Any]] = None,
+    response: Optional[AgentResponse] = None,
+) -> str:
+    """One audit record from pre-encoded ``steps``; ``response`` adds the completion fields."""
+    value = encode_value
+    parts: List[str] = [
+        f'{{"task_id": {value(task.task_id)}, "role": {value(task.role)},'
+        f' "description": {value(task.description)}, "parameters": {value(task.parameters)},'
+        f' "started_at": {value(started_at)}, "steps": [',
+        ", ".join(steps),
+        "]",
+    ]
+    if task.tenant is not None:
+        parts.append(f', "tenant": {value(task.tenant)}')
+    if task.model is not None:
+        parts.append(f', "model": {value(task.model)}')
+    if policy is not None:
+        parts.append(f', "policy": {value(policy)}')
+    if response is not None:
+        parts.append(
+            f', "completed_at": {value(response.completed_at.isoformat())}, "status": {value(response.status)},'
+            f' "summary": {value(response.summary)}, "safety_score": {value(response.safety_score)},'
+            f' "metrics": {value(response.metrics)}'
+        )
+    parts.append("}")
+    return "".join(parts)
+
+
+def _encode_span(span: Span) -> str:
+    value = _lenient
+    return (
+        f'{{"name": {value(span.name)}, "start_ns": {value(span.start_ns)}, "end_ns": {value(span.end_ns)},'
+        f' "step": {value(span.step)}, "attributes": {value(span.attributes)}}}'
+    )
+
+
+def _encode_response_step(step: StepResult) -> str:
+    value = _lenient
+    text = (
+        f'{{"step": {value(step.step)}, "rationale": {value(step.rationale)}, "tool_used": {value(step.tool_used)},'
+        f' "tool_input": {value(step.tool_input)}, "tool_output": {value(step.tool_output)},'
+        f' "latency_ms": {value(step.latency_ms)}, "blocked": {value(step.blocked)},'
+        f' "violation": {value(step.violation)}, "findings": {value(step.findings)},'
+        f' "cached": {value(step.cached)}, "spans": ['
+    )
+    return text + ", ".join(map(_encode_span, step.spans)) + "]}"
+
+
+def encode_response(response: AgentResponse) -> bytes:
+    """An ``AgentResponse`` as one JSON line (with the trailing newline), as written by ``app.ingest``."""
+    value = _lenient
+    text = (
+        f'{{"task_id": {value(response.task_id)}, "status": {value(response.status)},'
+        f' "summary": {value(response.summary)}, "safety_score": {value(response.safety_score)},'
+        f' "metrics": {value(response.metrics)}, "completed_at": {value(response.completed_at.isoformat())},'
+        f' "steps": [{", ".join(map(_encode_response_step, response.steps))}]}}\n'
+    )
+    return text.encode("ascii")
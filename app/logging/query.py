@@ -0,0 +1,411 @@
+"""Indexed queries over JSON-lines audit logs.
+
+Each log segment (see ``list_segments``) gets a sidecar index under
+``<log_path>.index/`` recording the byte offset of every line plus posting
+lists for role, status, violation, tool, hourly time bucket and task id.
+Queries intersect the posting lists and read only the matching lines through a
+memory map. Indexes are extended incrementally as new lines are appended to the
+live file, and rotated segments inherit the live file's index.
+
+An index file is a header (magic, format version, the segment's inode)
+followed by checksummed blocks. Each block is a JSON description plus the raw
+little-endian arrays of line offsets and posting lists for the lines indexed
+in one refresh, so a refresh appends only what it added. Nothing in it is
+executable: a damaged block ends the index there and the lines it covered are
+indexed again.
+
+Command line usage::
+
+    python -m app.logging.query --log audit/audit.jsonl --role analyst \\
+        --status blocked --violation pii --since 2026-10-13 --until 2026-10-14
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from app.logging.writer import list_segments
+
+INDEXED_FIELDS = ("role", "status", "violation", "tool", "hour")
+# Task ids are bucketed by hash rather than stored, keeping the index small;
+# candidates are confirmed against the raw line.
+_TASK_BUCKETS = 1 << 12
+_INDEX_MAGIC = b"AIDX"
+_INDEX_VERSION = 2
+# Magic, version, inode of the indexed segment.
+_FILE_HEADER = struct.Struct("<4sBQ")
+# JSON description length, array bytes length, CRC-32 of both.
+_BLOCK = struct.Struct("<III")
+# Past this many blocks the next save rewrites the file as one block.
+_MAX_BLOCKS = 64
+_SWAP = sys.byteorder != "little"
+
+
+def _task_bucket(task_id: str) -> int:
+    digest = hashlib.blake2b(task_id.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little") % _TASK_BUCKETS
+
+
+def _hour(timestamp: Optional[str]) -> Optional[str]:
+    # ISO timestamps sort lexically; the first 13 characters are YYYY-MM-DDTHH.
+    return timestamp[:13] if timestamp else None
+
+
+class SegmentIndex:
+    """Line offsets and posting lists (line numbers) for one log segment."""
+
+    def __init__(self, segment: str) -> None:
+        self.segment = segment
+        self.inode = 0
+        self.size = 0
+        self.offsets = array("Q")
+        self.postings: Dict[str, Dict[str, array]] = {name: {} for name in INDEXED_FIELDS}
+        self.task_buckets: Dict[int, array] = {}
+        # What the index file holds: lines, bytes and blocks.
+        self.saved_lines = 0
+        self.saved_bytes = 0
+        self.blocks = 0
+
+    @property
+    def compressed(self) -> bool:
+        return self.segment.endswith(".gz")
+
+    def _post(self, name: str, value: Optional[str], line: int) -> None:
+        if value is None:
+            return
+        postings = self.postings[name].get(value)
+        if postings is None:
+            postings = self.postings[name][value] = array("I")
+        elif postings[-1] == line:
+            return  # several steps of one record share the value
+        postings.append(line)
+
+    def extend(self, data: Any, start: int) -> None:
+        """Indexes complete lines in ``data[start:]``; a trailing partial line is left for later."""
+        position = start
+        end = len(data)
+        while position < end:
+            newline = data.find(b"\n", position)
+            if newline == -1:
+                break
+            raw = data[position:newline]
+            line = len(self.offsets)
+            self.offsets.append(position)
+            position = newline + 1
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue  # keep the offset so line numbers stay aligned
+            self._post("role", record.get("role"), line)
+            self._post("status", record.get("status"), line)
+            self._post("hour", _hour(record.get("started_at")), line)
+            for step in record.get("steps", ()):
+                self._post("violation", step.get("violation"), line)
+                self._post("tool", step.get("tool"), line)
+            bucket = _task_bucket(str(record.get("task_id", "")))
+            lines = self.task_buckets.get(bucket)
+            if lines is None:
+                lines = self.task_buckets[bucket] = array("I")
+            lines.append(line)
+        self.size = position
+
+    def line_end(self, line: int) -> int:
+        return self.offsets[line + 1] if line + 1 < len(self.offsets) else self.size
+
+    def encode_block(self, first: int) -> bytes:
+        """One index file block for lines ``first`` onwards."""
+        arrays = [self.offsets[first:]]
+        postings: Dict[str, List[List[Any]]] = {}
+        for name in INDEXED_FIELDS:
+            postings[name] = []
+            for value, lines in self.postings[name].items():
+                tail = lines[bisect_left(lines, first):]
+                if tail:
+                    postings[name].append([value, len(tail)])
+                    arrays.append(tail)
+        buckets = []
+        for bucket, lines in self.task_buckets.items():
+            tail = lines[bisect_left(lines, first):]
+            if tail:
+                buckets.append([bucket, len(tail)])
+                arrays.append(tail)
+        description = json.dumps(
+            {"size": self.size, "lines": len(self.offsets) - first, "postings": postings, "buckets": buckets}
+        ).encode("utf-8")
+        if _SWAP:
+            for item in arrays:
+                item.byteswap()
+        body = description + b"".join(item.tobytes() for item in arrays)
+        return _BLOCK.pack(len(description), len(body) - len(description), zlib.crc32(body)) + body
+
+    def load_block(self, description: Dict[str, Any], data: memoryview) -> None:
+        position = 0
+
+        def take(typecode: str, count: int) -> array:
+            nonlocal position
+            item = array(typecode)
+            end = position + count * item.itemsize
+            if count < 0 or end > len(data):
+                raise ValueError("index block is shorter than its description")
+            item.frombytes(data[position:end])
+            position = end
+            if _SWAP:
+                item.byteswap()
+            return item
+
+        self.offsets.extend(take("Q", description["lines"]))
+        for name in INDEXED_FIELDS:
+            for value, count in description["postings"][name]:
+                self.postings[name].setdefault(str(value), array("I")).extend(take("I", count))
+        for bucket, count in description["buckets"]:
+            self.task_buckets.setdefault(int(bucket), array("I")).extend(take("I", count))
+        self.size = int(description["size"])
+
+
+def read_index(path: str, segment: str) -> SegmentIndex:
+    """Loads an index file; a damaged or torn block and everything after it are ignored.
+
+    Raises ``OSError``, ``ValueError``, ``KeyError`` or ``TypeError`` when the
+    file is not a usable index.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _FILE_HEADER.size:
+        raise ValueError("index file too short")
+    magic, version, inode = _FILE_HEADER.unpack_from(data)
+    if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+        raise ValueError("not a current audit log index")
+    index = SegmentIndex(segment)
+    index.inode = inode
+    view = memoryview(data)
+    position = _FILE_HEADER.size
+    while position + _BLOCK.size <= len(data):
+        description_length, arrays_length, crc = _BLOCK.unpack_from(data, position)
+        start = position + _BLOCK.size
+        end = start + description_length + arrays_length
+        if end > len(data) or zlib.crc32(view[start:end]) != crc:
+            break
+        description = json.loads(view[start:start + description_length].tobytes())
+        index.load_block(description, view[start + description_length:end])
+        position = end
+        index.blocks += 1
+    index.saved_lines = len(index.offsets)
+    index.saved_bytes = position
+    return index
+
+
+class AuditLogIndex:
+    """Maintains sidecar indexes for every segment of an audit log and queries them."""
+
+    def __init__(self, log_path: str, index_dir: Optional[str] = None) -> None:
+        self.log_path = log_path
+        self.index_dir = index_dir or f"{log_path}.index"
+        self._indexes: Dict[str, SegmentIndex] = {}
+
+    def _index_file(self, segment: str) -> str:
+        return os.path.join(self.index_dir, os.path.basename(segment) + ".idx")
+
+    def refresh(self) -> None:
+        """Brings every segment's index up to date, indexing only new bytes."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        segments = list_segments(self.log_path)
+        for segment in segments:
+            index = self._indexes.get(segment) or self._load(segment)
+            stat = os.stat(segment)
+            if index.compressed:
+                if index.inode != stat.st_ino:
+                    index = SegmentIndex(segment)
+                    index.inode = stat.st_ino
+                    with self._mapped(segment) as data:
+                        index.extend(data, 0)
+                    self._save(index)
+            else:
+                if index.inode != stat.st_ino or stat.st_size < index.size:
+                    index = SegmentIndex(segment)  # replaced or truncated
+                    index.inode = stat.st_ino
+                if stat.st_size > index.size:
+                    with self._mapped(segment) as data:
+                        index.extend(data, index.size)
+                    self._save(index)
+            self._indexes[segment] = index
+        for stale in set(self._indexes) - set(segments):
+            del self._indexes[stale]
+
+    def _load(self, segment: str) -> SegmentIndex:
+        for candidate in (self._index_file(segment), self._index_file(self.log_path)):
+            try:
+                index = read_index(candidate, segment)
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if candidate == self._index_file(segment):
+                return index
+            # A freshly rotated segment is the former live file: same inode.
+            if segment != self.log_path and not segment.endswith(".gz"):
+                if os.stat(segment).st_ino == index.inode:
+                    index.blocks = 0  # written out whole under the segment's name
+                    self._save(index)
+                    return index
+        return SegmentIndex(segment)
+
+    def _save(self, index: SegmentIndex) -> None:
+        """Appends the lines indexed since the last save, or rewrites the file when it is new or fragmented."""
+        target = self._index_file(index.segment)
+        if index.blocks and index.saved_lines == len(index.offsets):
+            return
+        if 0 < index.blocks < _MAX_BLOCKS:
+            block = index.encode_block(index.saved_lines)
+            try:
+                with open(target, "r+b") as f:
+                    f.seek(index.saved_bytes)
+                    f.truncate()
+                    f.write(block)
+            except FileNotFoundError:
+                pass
+            else:
+                index.saved_bytes += len(block)
+                index.saved_lines = len(index.offsets)
+                index.blocks += 1
+                return
+        data = _FILE_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, index.inode) + index.encode_block(0)
+        temp = f"{target}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, target)
+        index.saved_bytes = len(data)
+        index.saved_lines = len(index.offsets)
+        index.blocks = 1
+
+    @contextmanager
+    def _mapped(self, segment: str) -> Iterator[Any]:
+        if segment.endswith(".gz"):
+            with open(segment, "rb") as f:
+                yield gzip.decompress(f.read())
+            return
+        with open(segment, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+
+    def _candidates(self, index: SegmentIndex, filters: Dict[str, Any]) -> Optional[List[int]]:
+        """Line numbers satisfying the indexed filters, or ``None`` for "all lines"."""
+        selected: List[Sequence[int]] = []
+        for name in ("role", "status", "tool"):
+            if filters.get(name) is not None:
+                selected.append(index.postings[name].get(filters[name], ()))
+        if filters.get("violation") is not None:
+            needle = filters["violation"]
+            matched = set()
+            for value, lines in index.postings["violation"].items():
+                if needle in value:
+                    matched.update(lines)
+            selected.append(sorted(matched))
+        since, until = _hour(filters.get("since")), _hour(filters.get("until"))
+        if since or until:
+            matched = set()
+            for hour, lines in index.postings["hour"].items():
+                if (since is None or hour >= since) and (until is None or hour <= until):
+                    matched.update(lines)
+            selected.append(sorted(matched))
+        if filters.get("task_id") is not None:
+            selected.append(index.task_buckets.get(_task_bucket(filters["task_id"]), ()))
+        if not selected:
+            return None
+        selected.sort(key=len)
+        result = set(selected[0])
+        for lines in selected[1:]:
+            if not result:
+                break
+            result.intersection_update(lines)
+        return sorted(result)
+
+    def query(
+        self,
+        task_id: Optional[str] = None,
+        role: Optional[str] = None,
+        status: Optional[str] = None,
+        violation: Optional[str] = None,
+        tool: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        refresh: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields matching records oldest first.
+
+        ``violation`` matches any recorded violation containing the text (so
+        ``"pii"`` finds ``"Policy violation: pii detected"``). ``since`` and
+        ``until`` are ISO timestamps compared against ``started_at``.
+        """
+        if refresh:
+            self.refresh()
+        filters = {
+            "task_id": task_id, "role": role, "status": status, "violation": violation,
+            "tool": tool, "since": since, "until": until,
+        }
+        task_needle = json.dumps(task_id).encode("utf-8") if task_id is not None else None
+        for segment in list_segments(self.log_path):
+            index = self._indexes.get(segment)
+            if index is None:
+                continue
+            lines = self._candidates(index, filters)
+            if lines is None:
+                lines = range(len(index.offsets))
+            if not lines:
+                continue
+            with self._mapped(segment) as data:
+                for line in lines:
+                    raw = data[index.offsets[line]:index.line_end(line)]
+                    if task_needle is not None and task_needle not in raw:
+                        continue  # hash-bucket neighbour; skip without parsing
+                    record = json.loads(raw)
+                    if task_id is not None and record.get("task_id") != task_id:
+                        continue
+                    started_at = record.get("started_at") or ""
+                    if since is not None and started_at < since:
+                        continue
+                    if until is not None and started_at > until:
+                        continue
+                    yield record
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query an indexed JSON-lines audit log.")
+    parser.add_argument("--log", default=os.getenv("AUDIT_LOG_PATH"), help="Audit log path (default: $AUDIT_LOG_PATH)")
+    for name in ("task-id", "role", "status", "violation", "tool"):
+        parser.add_argument(f"--{name}")
+    parser.add_argument("--since", help="ISO date or timestamp (inclusive)")
+    parser.add_argument("--until", help="ISO date or timestamp (inclusive)")
+    parser.add_argument("--count", action="store_true", help="Print only the number of matches")
+    args = parser.parse_args(argv)
+    if not args.log:
+        parser.error("--log is required when AUDIT_LOG_PATH is not set")
+
+    until = args.until
+    if until and len(until) == 10:
+        until = datetime.fromisoformat(until).strftime("%Y-%m-%dT23:59:59.999999")
+    matches = AuditLogIndex(args.log).query(
+        task_id=args.task_id, role=args.role, status=args.status, violation=args.violation,
+        tool=args.tool, since=args.since, until=until,
+    )
+    if args.count:
+        print(sum(1 for _ in matches))
+        return
+    for record in matches:
+        print(json.dumps(record))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Bounded in-memory store for completed audit records.
+
+Completed records are serialized once into a slotted ``CompactRecord`` holding
+the JSON text, kept in a ring buffer of the most recent ``max_records``, and
+optionally spilled to a SQLite file on eviction so lookups by task id keep
+working without unbounded memory growth.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional
+
+
+class CompactRecord:
+    """A completed audit record kept as its serialized JSON text."""
+
+    __slots__ = ("task_id", "role", "status", "payload")
+
+    def __init__(self, task_id: str, role: str, status: Optional[str], payload: str) -> None:
+        self.task_id = task_id
+        self.role = role
+        self.status = status
+        self.payload = payload
+
+    @classmethod
+    def from_entry(cls, entry: Dict[str, Any], payload: Optional[str] = None) -> "CompactRecord":
+        return cls(entry["task_id"], entry["role"], entry.get("status"), payload or json.dumps(entry))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return json.loads(self.payload)
+
+    def size_bytes(self) -> int:
+        """Approximate memory held by this record."""
+        return sys.getsizeof(self) + sys.getsizeof(self.payload)
+
+
+class AuditRecordStore:
+    """Ring buffer of recent audit records with an optional on-disk spill index.
+
+    Indexing and iteration return plain dicts so the store can stand in for
+    the list ``AuditLogger.records`` used to be.
+    """
+
+    def __init__(self, max_records: int = 10_000, spill_path: Optional[str] = None) -> None:
+        if max_records < 1:
+            raise ValueError("max_records must be at least 1")
+        self.max_records = max_records
+        self.spill_path = spill_path
+        self._ring: Deque[CompactRecord] = deque()
+        self._by_task: Dict[str, CompactRecord] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._spill: Optional[sqlite3.Connection] = None
+        if spill_path:
+            self._spill = sqlite3.connect(spill_path, check_same_thread=False)
+            self._spill.execute(
+                "CREATE TABLE IF NOT EXISTS records (task_id TEXT PRIMARY KEY, payload TEXT NOT NULL)"
+            )
+
+    def add(self, record: CompactRecord) -> None:
+        with self._lock:
+            self._ring.append(record)
+            self._by_task[record.task_id] = record
+            self._bytes += record.size_bytes()
+            if len(self._ring) > self.max_records:
+                self._evict(self._ring.popleft())
+
+    def _evict(self, record: CompactRecord) -> None:
+        self._bytes -= record.size_bytes()
+        if self._by_task.get(record.task_id) is record:
+            del self._by_task[record.task_id]
+        if self._spill is not None:
+            with self._spill:
+                self._spill.execute(
+                    "INSERT OR REPLACE INTO records (task_id, payload) VALUES (?, ?)",
+                    (record.task_id, record.payload),
+                )
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the most recent record for ``task_id`` from memory or the spill index."""
+        with self._lock:
+            record = self._by_task.get(task_id)
+            if record is not None:
+                return record.to_dict()
+            if self._spill is None:
+                return None
+            row = self._spill.execute(
+                "SELECT payload FROM records WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._ring[-1] if self._ring else None
+        return record.to_dict() if record is not None else None
+
+    def memory_usage(self) -> Dict[str, float]:
+        """Reports bytes held by retained records, in total and per record."""
+        with self._lock:
+            count = len(self._ring)
+            total = self._bytes
+        return {
+            "records": count,
+            "bytes_total": total,
+            "bytes_per_record": total / count if count else 0.0,
+        }
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def __bool__(self) -> bool:
+        return bool(self._ring)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return self._ring[index].to_dict()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for record in list(self._ring):
+            yield record.to_dict()
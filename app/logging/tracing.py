@@ -0,0 +1,398 @@
+"""Per-phase tracing spans and opt-in per-task profiling.
+
+The orchestrator times each phase of a step (planner, guardrail screening,
+input/output validation, tool run, audit write) with ``perf_counter_ns`` and
+records them as ``Span``s on a ``TaskTrace``. ``Tracer`` samples which tasks
+are traced; unsampled tasks get ``NULL_TRACE``, whose methods do nothing, so
+tracing can stay on in production. Spans end up on ``StepResult.spans`` and,
+with an exporter, in OpenTelemetry's OTLP/JSON encoding:
+
+* ``OTLPFileExporter`` appends one ``ExportTraceServiceRequest`` per batch
+  as a line (the collector's file exporter format);
+* ``OTLPHttpExporter`` posts batches to an OTLP/HTTP ``/v1/traces`` endpoint.
+
+Both encode on a background thread; the task thread only enqueues.
+
+``python -m app.logging.tracing --port 4318 --output spans.jsonl`` runs a
+stub collector that accepts those posts and writes them to a file.
+
+``TaskProfiler`` runs a sampled fraction of tasks under cProfile and/or
+tracemalloc and writes one report per task.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import pstats
+import queue
+import random
+import threading
+import time
+import tracemalloc
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from app.agent.types import Span
+
+SERVICE_NAME = "guardrailed-llm-agent"
+_SCOPE = {"name": "app.agent.orchestrator"}
+# Maps perf_counter_ns readings to Unix time for export.
+_EPOCH_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+_STOP = object()
+# How often a blocked flush or close checks that the exporter thread is alive.
+_POLL_SECONDS = 0.1
+
+
+class TaskTrace:
+    """Spans of one traced task."""
+
+    def __init__(self, task_id: str, exporter: Optional["SpanExporter"] = None) -> None:
+        self.task_id = task_id
+        self.exporter = exporter
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.start_ns = time.perf_counter_ns()
+        self.spans: List[Span] = []
+
+    def add(self, name: str, start_ns: int, end_ns: int, step: Optional[int] = None, **attributes: Any) -> None:
+        self.spans.append(Span(name, start_ns, end_ns, step, attributes))
+
+    def step_spans(self, step: int) -> List[Span]:
+        return [span for span in self.spans if span.step == step]
+
+    def finish(self, **attributes: Any) -> None:
+        """Closes the root ``task`` span and hands the trace to the exporter."""
+        self.add("task", self.start_ns, time.perf_counter_ns(), task_id=self.task_id, **attributes)
+        if self.exporter is not None:
+            self.exporter.export(self)
+
+
+class _NullTrace(TaskTrace):
+    """Stand-in for unsampled tasks: records nothing."""
+
+    def __init__(self) -> None:
+        self.task_id = ""
+        self.exporter = None
+        self.spans = []
+
+    def add(self, name: str, start_ns: int, end_ns: int, step: Optional[int] = None, **attributes: Any) -> None:
+        pass
+
+    def step_spans(self, step: int) -> List[Span]:
+        return []
+
+    def finish(self, **attributes: Any) -> None:
+        pass
+
+
+NULL_TRACE: TaskTrace = _NullTrace()
+
+
+class Tracer:
+    """Decides per task whether to trace it (``sample_rate`` in [0, 1])."""
+
+    def __init__(self, sample_rate: float = 1.0, exporter: Optional["SpanExporter"] = None) -> None:
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self._random = random.random
+
+    def start(self, task_id: str) -> TaskTrace:
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and self._random() >= self.sample_rate):
+            return NULL_TRACE
+        return TaskTrace(task_id, self.exporter)
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    try:
+        return _cached_attribute(key, value)
+    except TypeError:  # unhashable value
+        return _encode_attribute(key, value)
+
+
+def _encode_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded: Dict[str, Any] = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    elif isinstance(value, (list, tuple)):
+        encoded = {"arrayValue": {"values": [_attribute("", item)["value"] for item in value]}}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+# Span attributes repeat heavily (check lists, tool names, step numbers), so
+# their encodings are shared; json.dumps only reads them.
+# typed: True, 1 and 1.0 encode differently, so they must not share an entry.
+_cached_attribute = functools.lru_cache(maxsize=4096, typed=True)(_encode_attribute)
+
+
+def otlp_spans(trace: TaskTrace) -> List[Dict[str, Any]]:
+    """The trace's spans in OTLP/JSON form; step spans are children of the root ``task`` span."""
+    span_ids = [f"{random.getrandbits(64):016x}" for _ in trace.spans]
+    root_id = next((span_ids[i] for i, span in enumerate(trace.spans) if span.name == "task"), None)
+    encoded = []
+    for span, span_id in zip(trace.spans, span_ids):
+        attributes = dict(span.attributes)
+        if span.step is not None:
+            attributes["agent.step"] = span.step
+        item = {
+            "traceId": trace.trace_id,
+            "spanId": span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns + _EPOCH_OFFSET_NS),
+            "endTimeUnixNano": str(span.end_ns + _EPOCH_OFFSET_NS),
+            "attributes": [_attribute(key, value) for key, value in attributes.items()],
+        }
+        if span_id != root_id and root_id is not None:
+            item["parentSpanId"] = root_id
+        encoded.append(item)
+    return encoded
+
+
+def otlp_request(traces: Sequence[TaskTrace], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """An ``ExportTraceServiceRequest`` holding ``traces``."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_attribute("service.name", service_name)]},
+                "scopeSpans": [{"scope": _SCOPE, "spans": [item for trace in traces for item in otlp_spans(trace)]}],
+            }
+        ]
+    }
+
+
+class SpanExporter:
+    """Receives finished traces; implementations must not block the task."""
+
+    def export(self, trace: TaskTrace) -> None:
+        raise NotImplementedError
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        pass
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        pass
+
+
+class _BatchExporter(SpanExporter):
+    """Queues traces and encodes and emits them in batches on a background thread.
+
+    Traces are dropped (and counted in ``dropped``) when the queue is full or
+    emitting fails, so a slow sink never stalls tasks.
+    """
+
+    def __init__(
+        self,
+        service_name: str = SERVICE_NAME,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+    ) -> None:
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.exported = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def export(self, trace: TaskTrace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _emit(self, body: bytes) -> None:
+        raise NotImplementedError
+
+    def _run(self) -> None:
+        batch: List[TaskTrace] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if isinstance(item, TaskTrace):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+            self._send(batch)
+            batch, deadline = [], None
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                return
+
+    def _send(self, batch: List[TaskTrace]) -> None:
+        if not batch:
+            return
+        try:
+            body = json.dumps(otlp_request(batch, self.service_name), separators=(",", ":"))
+            self._emit(body.encode("utf-8"))
+        except Exception:  # noqa: BLE001 - any failure (e.g. a bad collector response) drops the batch
+            self.dropped += len(batch)
+        else:
+            self.exported += len(batch)
+
+    def _put(self, item: Any, deadline: Optional[float]) -> bool:
+        """Queues a control item, giving up if the thread has died or ``deadline`` passes."""
+        while self._thread.is_alive():
+            try:
+                self._queue.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+        return False
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Blocks until every trace exported so far has been emitted, or ``timeout`` seconds pass."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        if not self._put(done, deadline):
+            return
+        while not done.wait(_POLL_SECONDS):
+            if not self._thread.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                return
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self._put(_STOP, deadline):
+            self._thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+
+class OTLPFileExporter(_BatchExporter):
+    """Appends OTLP/JSON requests (one per batch of traces) to a JSON-lines file."""
+
+    def __init__(self, path: str, **options: Any) -> None:
+        self.path = path
+        self._file = open(path, "ab")
+        super().__init__(**options)
+
+    def _emit(self, body: bytes) -> None:
+        self._file.write(body + b"\n")
+        self._file.flush()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        super().close(timeout)
+        self._file.close()
+
+
+class OTLPHttpExporter(_BatchExporter):
+    """Posts OTLP/JSON requests to an OTLP/HTTP collector's ``/v1/traces``."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0, **options: Any) -> None:
+        endpoint = endpoint.rstrip("/")
+        self.endpoint = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.timeout = timeout
+        super().__init__(**options)
+
+    def _emit(self, body: bytes) -> None:
+        request = urllib.request.Request(
+            self.endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class TaskProfiler:
+    """Profiles a sampled fraction of tasks and writes a report per task.
+
+    ``mode`` is ``"cpu"`` (cProfile; ``<task_id>.prof`` plus a text summary),
+    ``"memory"`` (tracemalloc; top allocation sites) or ``"both"``. cProfile
+    follows only the thread that runs the task. tracemalloc is process-wide,
+    so only one task is memory-profiled at a time and its report includes
+    allocations made concurrently by other threads.
+    """
+
+    def __init__(self, directory: str, sample_rate: float = 0.01, mode: str = "cpu", top: int = 25) -> None:
+        if mode not in ("cpu", "memory", "both"):
+            raise ValueError(f"Unknown profiling mode '{mode}'")
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.top = top
+        self._memory_busy = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @contextlib.contextmanager
+    def profile(self, task_id: str) -> Iterator[None]:
+        if random.random() >= self.sample_rate:
+            yield
+            return
+        stem = os.path.join(self.directory, "".join(c if c.isalnum() or c in "-_." else "_" for c in task_id))
+        cpu = cProfile.Profile() if self.mode in ("cpu", "both") else None
+        memory = self.mode in ("memory", "both") and self._memory_busy.acquire(blocking=False)
+        if memory:
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+        if cpu is not None:
+            cpu.enable()
+        try:
+            yield
+        finally:
+            if cpu is not None:
+                cpu.disable()
+            if memory:
+                # Snapshot before writing any report, so reporting is not measured.
+                after = tracemalloc.take_snapshot()
+                _current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self._memory_busy.release()
+                with open(f"{stem}.memory.txt", "w", encoding="utf-8") as handle:
+                    handle.write(f"peak traced memory: {peak} bytes\n")
+                    for stat in after.compare_to(before, "lineno")[: self.top]:
+                        handle.write(f"{stat}\n")
+            if cpu is not None:
+                cpu.dump_stats(f"{stem}.prof")
+                with open(f"{stem}.cpu.txt", "w", encoding="utf-8") as handle:
+                    pstats.Stats(cpu, stream=handle).sort_stats("cumulative").print_stats(self.top)
+
+
+def serve_collector(port: int, output: str) -> None:
+    """Stub OTLP/HTTP collector: appends every posted request body as one line of ``output``."""
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock, open(output, "ab") as handle:
+                handle.write(json.dumps(json.loads(body)).encode("utf-8") + b"\n")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a stub OTLP/HTTP trace collector.")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", required=True, help="JSON-lines file for received requests")
+    args = parser.parse_args(argv)
+    serve_collector(args.port, args.output)
+
+
+if __name__ == "__main__":
+    main()
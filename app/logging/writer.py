@@ -0,0 +1,245 @@
+"""Background JSON-lines writer for audit records.
+
+Records are queued by the request thread and written in batches by a single
+writer thread that keeps one file handle open, so tasks never pay for
+``open``/``close`` or disk latency on their own thread.
+"""
+from __future__ import annotations
+
+import atexit
+import contextlib
+import glob
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Union
+
+from app.logging.frames import MAGIC, FrameError, complete_length, encode_frame
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("never", "batch", "interval")
+LOG_FORMATS = ("jsonl", "frames")
+
+_STOP = object()
+
+
+def list_segments(log_path: str) -> List[str]:
+    """Returns rotated segments of ``log_path`` oldest first, then the live file."""
+    # Rotated names start with their timestamp, so they sort chronologically.
+    segments = sorted(
+        path for path in glob.glob(glob.escape(log_path) + ".[0-9]*") if not path.endswith(".tmp")
+    )
+    if os.path.exists(log_path):
+        segments.append(log_path)
+    return segments
+
+
+def _stamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+class AuditLogWriter:
+    """Appends lines to a JSON-lines file from a background thread.
+
+    Lines are flushed when ``batch_size`` are pending or ``flush_interval``
+    seconds after the oldest pending line arrived. The file is rotated once it
+    reaches ``max_bytes`` or has been open ``rotate_seconds``; rotated segments
+    are renamed to ``<log_path>.<UTC timestamp>`` and optionally gzipped.
+
+    With ``log_format="frames"`` each line is stored as one binary frame
+    (``app.logging.frames``) instead, compressed on the writer thread. When
+    the file is reopened, a frame torn by a crash is truncated first.
+    """
+
+    def __init__(
+        self,
+        log_path: str,
+        batch_size: int = 256,
+        flush_interval: float = 0.2,
+        fsync: str = "never",
+        fsync_interval: float = 1.0,
+        max_bytes: Optional[int] = None,
+        rotate_seconds: Optional[float] = None,
+        compress: bool = False,
+        max_queue: int = 10_000,
+        log_format: str = "jsonl",
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {FSYNC_POLICIES}")
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Unknown audit log format '{log_format}', expected one of {LOG_FORMATS}")
+        self.log_path = log_path
+        self.log_format = log_format
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compress = compress
+        self.last_error: Optional[BaseException] = None
+        self.lines_written = 0
+        self.lines_dropped = 0
+        # Bounded so a stalled disk applies backpressure instead of growing memory.
+        self._queue: "queue.Queue[Union[str, threading.Event, object]]" = queue.Queue(max_queue)
+        self._file = None
+        self._opened_at = 0.0
+        self._last_fsync = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, line: str) -> None:
+        """Queues one serialized line (including its trailing newline)."""
+        if self._closed:
+            raise RuntimeError("AuditLogWriter is closed")
+        self._queue.put(line)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Blocks until every line queued so far has been written.
+
+        Raises the last write error since the previous ``flush``, once. Lines
+        of a batch that failed are dropped and counted in ``lines_dropped``.
+        """
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+        error, self.last_error = self.last_error, None
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """Flushes pending lines, stops the writer thread and closes the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        pending: List[str] = []
+        first_pending_at = 0.0
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, first_pending_at + self.flush_interval - time.monotonic())
+            elif self.rotate_seconds and self._file is not None:
+                timeout = max(0.0, self._opened_at + self.rotate_seconds - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, str):
+                if not pending:
+                    first_pending_at = time.monotonic()
+                pending.append(item)
+                if (
+                    len(pending) < self.batch_size
+                    and time.monotonic() - first_pending_at < self.flush_interval
+                ):
+                    continue
+
+            self._write_batch(pending)
+            pending = []
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                self._close_file()
+                return
+
+    def _write_batch(self, lines: List[str]) -> None:
+        try:
+            if self._file is not None and self._should_rotate():
+                self._rotate()
+            if not lines:
+                return
+            if self._file is None:
+                self._open()
+            if self.log_format == "frames":
+                self._file.write(b"".join(encode_frame(line.rstrip("\n").encode("utf-8")) for line in lines))
+            else:
+                self._file.write("".join(lines))
+            self._file.flush()
+            self.lines_written += len(lines)
+            if self.fsync == "batch" or (
+                self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval
+            ):
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.monotonic()
+        except OSError as exc:
+            self.last_error = exc
+            self.lines_dropped += len(lines)
+            # Reopen for the next batch: the handle may be what failed.
+            if self._file is not None:
+                with contextlib.suppress(OSError):
+                    self._file.close()
+                self._file = None
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        if self.log_format == "frames":
+            self._open_frames()
+        else:
+            self._file = open(self.log_path, "a", encoding="utf-8")
+        self._opened_at = time.monotonic()
+
+    def _open_frames(self) -> None:
+        # "a+b": writes always append, but the existing tail can be checked.
+        handle = open(self.log_path, "a+b")
+        try:
+            length = complete_length(handle)
+        except FrameError:
+            handle.close()
+            aside = f"{self.log_path}.invalid-{_stamp()}"
+            logger.warning("%s is not an audit frame log; moved it to %s", self.log_path, aside)
+            os.replace(self.log_path, aside)
+            handle = open(self.log_path, "a+b")
+            length = 0
+        size = handle.seek(0, os.SEEK_END)
+        if length < size:
+            # A frame torn by a crash: appending after it would hide the next frames.
+            logger.warning("Truncating %d bytes of torn frames from %s", size - length, self.log_path)
+            handle.truncate(length)
+        if length == 0:
+            handle.write(MAGIC)
+        self._file = handle
+
+    def _close_file(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+            self._file.close()
+        except OSError as exc:
+            self.last_error = exc
+        self._file = None
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.monotonic() - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self) -> None:
+        self._close_file()
+        if not os.path.exists(self.log_path) or os.path.getsize(self.log_path) == 0:
+            return
+        target = f"{self.log_path}.{_stamp()}"
+        os.replace(self.log_path, target)
+        if self.compress:
+            with open(target, "rb") as src, gzip.open(target + ".gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(target + ".gz.tmp", target + ".gz")
+            os.remove(target)
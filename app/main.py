@@ -1,30 +1,109 @@
 """Entrypoint wiring together the orchestrator and components."""
 from __future__ import annotations
 
+import os
+from typing import Optional, Union
+
 from app.agent.orchestrator import AgentOrchestrator
+from app.agent.scheduler import TaskScheduler, parse_limits
 from app.agent.types import Task
+from app.evaluation.aggregator import MetricsAggregator
 from app.evaluation.metrics import EvaluationTracker
+from app.guardrails.cache import VerdictCache
 from app.guardrails.policy import GuardrailEngine
 from app.logging.audit import AuditLogger
+from app.logging.store import AuditRecordStore
+from app.logging.tracing import OTLPFileExporter, OTLPHttpExporter, SpanExporter, TaskProfiler, Tracer
+from app.logging.writer import AuditLogWriter
 from app.tools.base import DataLookupTool
+from app.tools.cache import ToolResultCache
 from app.utils.config import EnvironmentConfig
 from app.guardrails.manager import PolicyManager
+from app.guardrails.registry import PolicyRegistry
+
 
+def load_policies(path: str) -> Union[PolicyManager, PolicyRegistry]:
+    """A ``PolicyManager`` for a policy file, a ``PolicyRegistry`` for a directory of tenant policies."""
+    if os.path.isdir(path):
+        config = EnvironmentConfig.from_env()
+        return PolicyRegistry(path, dictionary_cache_dir=config.guardrail_dictionary_cache_dir)
+    return PolicyManager(path)
 
-def build_orchestrator(policy_manager: PolicyManager) -> AgentOrchestrator:
+
+def build_orchestrator(policy_manager: Union[PolicyManager, PolicyRegistry]) -> AgentOrchestrator:
     config = EnvironmentConfig.from_env()
     tools = {"data_lookup": DataLookupTool()}
+    if config.policy_poll_seconds > 0:
+        policy_manager.start_watching(config.policy_poll_seconds)
     
-    guardrails = GuardrailEngine(policy_manager=policy_manager)
+    verdict_cache = VerdictCache(config.guardrail_cache_bytes) if config.guardrail_cache_bytes > 0 else None
+    guardrails = GuardrailEngine(
+        policy_manager=policy_manager,
+        verdict_cache=verdict_cache,
+        stream_overlap=config.guardrail_stream_overlap,
+        max_payload_depth=config.guardrail_max_payload_depth,
+        max_payload_chars=config.guardrail_max_payload_chars,
+    )
     
-    audit_logger = AuditLogger(log_path=config.audit_log_path)
-    evaluation_tracker = EvaluationTracker()
+    writer = None
+    if config.audit_log_path:
+        writer = AuditLogWriter(
+            config.audit_log_path,
+            fsync=config.audit_log_fsync,
+            max_bytes=config.audit_log_max_bytes or None,
+            rotate_seconds=config.audit_log_rotate_seconds or None,
+            compress=config.audit_log_compress,
+            log_format=config.audit_log_format,
+        )
+    store = AuditRecordStore(
+        max_records=config.audit_max_records, spill_path=config.audit_spill_path
+    )
+    audit_logger = AuditLogger(writer=writer, store=store)
+    evaluation_tracker = EvaluationTracker(aggregator=MetricsAggregator())
+    tool_cache = None
+    if config.tool_cache_bytes > 0:
+        tool_cache = ToolResultCache(
+            max_bytes=config.tool_cache_bytes, ttl_seconds=config.tool_cache_ttl_seconds
+        )
+    tracer = None
+    if config.trace_sample_rate > 0:
+        exporter: Optional[SpanExporter] = None
+        if config.trace_collector_url:
+            exporter = OTLPHttpExporter(config.trace_collector_url)
+        elif config.trace_export_path:
+            exporter = OTLPFileExporter(config.trace_export_path)
+        tracer = Tracer(sample_rate=config.trace_sample_rate, exporter=exporter)
+    profiler = None
+    if config.profile_sample_rate > 0:
+        profiler = TaskProfiler(
+            config.profile_dir, sample_rate=config.profile_sample_rate, mode=config.profile_mode
+        )
     return AgentOrchestrator(
         tools=tools,
         guardrail_engine=guardrails,
         audit_logger=audit_logger,
         evaluation_tracker=evaluation_tracker,
         config=config,
+        tool_cache=tool_cache,
+        tracer=tracer,
+        profiler=profiler,
+    )
+
+
+def build_scheduler(orchestrator: AgentOrchestrator) -> Optional[TaskScheduler]:
+    """Admission control in front of ``orchestrator``; None when SCHEDULER_WORKERS is 0."""
+    config = orchestrator.config
+    if config.scheduler_workers <= 0:
+        return None
+    default_limit = parse_limits(f"*={config.default_role_rate_limit}")["*"] if config.default_role_rate_limit else None
+    return TaskScheduler(
+        orchestrator,
+        workers=config.scheduler_workers,
+        max_queue=config.scheduler_max_queue,
+        latency_target_ms=config.scheduler_latency_target_ms,
+        role_limits=parse_limits(config.role_rate_limits),
+        default_role_limit=default_limit,
+        tool_limits=parse_limits(config.tool_rate_limits),
     )
 
 
@@ -66,7 +145,8 @@ def demo() -> None:
         
     # 3. Reload policy
     print("\n[Step 3] Hot Reloading Policy...")
-    policy_manager.reload()
+    snapshot = policy_manager.reload()
+    print(f"Published policy snapshot {snapshot.version} in {snapshot.reload_latency_ms:.2f} ms")
     
     # 4. Run task again - should pass now
     print("\n[Step 4] Re-running Task Check:")
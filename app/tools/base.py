@@ -1,12 +1,12 @@
 """Tool base class with strict input/output validation."""
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional
 
-
-class ToolValidationError(Exception):
-    """Raised when tool validation fails."""
+from app.tools.index import ColumnStore, TrigramIndex
+from app.tools.schema import SchemaValidator, ToolValidationError, compile_schema
 
 
 class Tool(ABC):
@@ -14,37 +14,146 @@ class Tool(ABC):
     description: str
     input_schema: Dict[str, Any]
     output_schema: Dict[str, Any]
+    # Read-only tools whose output depends only on their input may set this;
+    # the orchestrator then reuses results through its ToolResultCache.
+    cacheable: bool = False
+    # Overrides the cache's default TTL for this tool.
+    cache_ttl: Optional[float] = None
+    # With a step deadline the synchronous path runs tools on a watchdog
+    # thread and abandons them when it passes. Tools known never to block
+    # may set this to run on the calling thread instead; they are failed
+    # once they return if they overran.
+    inline: bool = False
+
+    # Compiled from the schemas when the class is defined (see app.tools.schema).
+    _input_validator: Optional[SchemaValidator] = None
+    _output_validator: Optional[SchemaValidator] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if "input_schema" in cls.__dict__:
+            cls._input_validator = compile_schema(cls.input_schema, "input")
+        if "output_schema" in cls.__dict__:
+            cls._output_validator = compile_schema(cls.output_schema, "output")
 
     def validate_input(self, payload: Dict[str, Any]) -> None:
-        missing = [field for field, required in self.input_schema.items() if required and field not in payload]
-        if missing:
-            raise ToolValidationError(f"Missing required input fields: {missing}")
+        validator = self._input_validator
+        if validator is None or validator.schema is not self.input_schema:
+            validator = self.input_validator()
+        validator.validate(payload)
 
     def validate_output(self, payload: Dict[str, Any]) -> None:
-        missing = [field for field, required in self.output_schema.items() if required and field not in payload]
-        if missing:
-            raise ToolValidationError(f"Tool produced incomplete output: {missing}")
+        validator = self._output_validator
+        if validator is None or validator.schema is not self.output_schema:
+            validator = self.output_validator()
+        validator.validate(payload)
+
+    def input_validator(self) -> SchemaValidator:
+        validator = self._input_validator
+        if validator is None or validator.schema is not self.input_schema:
+            # Schema assigned per instance (or replaced): compile it once here.
+            validator = self._input_validator = compile_schema(self.input_schema, "input")
+        return validator
+
+    def output_validator(self) -> SchemaValidator:
+        validator = self._output_validator
+        if validator is None or validator.schema is not self.output_schema:
+            validator = self._output_validator = compile_schema(self.output_schema, "output")
+        return validator
 
     @abstractmethod
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the tool with validated input."""
 
 
+class AsyncTool(Tool):
+    """Tool whose work is I/O-bound and implemented as a coroutine.
+
+    ``AgentOrchestrator.arun_task`` awaits ``arun`` directly. ``run`` lets the
+    tool still be used from the synchronous path, outside any running loop.
+    """
+
+    @abstractmethod
+    async def arun(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the tool with validated input."""
+
+    def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return asyncio.run(self.arun(payload))
+
+
+class StreamingTool(Tool):
+    """Tool that produces its text output incrementally.
+
+    ``AgentOrchestrator`` consumes ``stream`` through a streaming guardrail
+    inspector, releasing screened chunks as they arrive. ``run`` collects the
+    whole stream for callers that want a single result. Streamed calls are
+    never served from the tool result cache.
+    """
+
+    output_field = "text"
+
+    @abstractmethod
+    def stream(self, payload: Dict[str, Any]) -> Iterator[str]:
+        """Yield the tool's output text in chunks."""
+
+    def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self.result("".join(self.stream(payload)))
+
+    def result(self, text: str, **extra: Any) -> Dict[str, Any]:
+        """Builds the tool output around the (possibly screened) streamed text."""
+        return {self.output_field: text, **extra, "complete": True}
+
+
 class DataLookupTool(Tool):
-    """Example read-only data lookup tool."""
+    """Example read-only data lookup tool.
+
+    Rows are indexed once at construction: queries match case-insensitive
+    substrings of ``name`` or ``id`` through a trigram index instead of a
+    scan. Optional ``limit``/``offset`` inputs paginate the results, and
+    ``columnar=True`` stores rows column-wise to save memory on large tables.
+    A ``MappedDataset`` (see ``app.tools.columnar.load_dataset``) brings its
+    own prebuilt index, so nothing is parsed or indexed at startup. The
+    dataset must not be mutated after the tool is built.
+    """
 
     name = "data_lookup"
     description = "Returns synthetic records for demonstration purposes."
-    input_schema = {"query": True}
-    output_schema = {"results": True, "complete": True}
+    input_schema = {
+        "query": {"required": True, "type": "string"},
+        "limit": {"type": ("integer", "null"), "minimum": 0},
+        "offset": {"type": ("integer", "null"), "minimum": 0},
+    }
+    output_schema = {
+        "results": {"required": True, "type": "array"},
+        "complete": {"required": True, "type": "boolean"},
+    }
+    search_columns = ("name", "id")
+    cacheable = True
 
-    def __init__(self, dataset: List[Dict[str, Any]] | None = None) -> None:
-        self.dataset = dataset or [
+    def __init__(self, dataset: List[Dict[str, Any]] | None = None, columnar: bool = False) -> None:
+        rows = dataset or [
             {"id": "user-1", "name": "Alice", "status": "active"},
             {"id": "user-2", "name": "Bob", "status": "suspended"},
         ]
+        prebuilt = getattr(rows, "index", None)
+        if isinstance(prebuilt, TrigramIndex) and prebuilt.columns == self.search_columns:
+            self.index = prebuilt
+            self.dataset = rows
+            return
+        self.index = TrigramIndex(rows, self.search_columns)
+        self.dataset = ColumnStore(rows) if columnar else rows
 
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        query = payload.get("query", "").lower()
-        matched = [row for row in self.dataset if query in row.get("name", "").lower() or query in row.get("id", "").lower()]
-        return {"results": matched, "complete": True}
+        matches = self.index.search(payload.get("query", ""))
+        limit = payload.get("limit")
+        if limit is None:
+            return {"results": [self.dataset[i] for i in matches], "complete": True}
+        offset = int(payload.get("offset") or 0)
+        page = matches[offset:offset + int(limit)]
+        next_offset = offset + len(page)
+        return {
+            "results": [self.dataset[i] for i in page],
+            "total": len(matches),
+            "next_offset": next_offset if next_offset < len(matches) else None,
+            "complete": True,
+        }
@@ -0,0 +1,183 @@
+"""Shared result cache for read-only tools.
+
+Tools opt in with ``cacheable = True``. ``ToolResultCache`` keeps their
+outputs for a TTL in an LRU bounded by (approximate) bytes and entries, and
+coalesces identical calls that are already running: the first caller
+executes the tool, concurrent callers with the same input wait for its
+result instead of running it again.
+
+Cached outputs are shared between tasks and must be treated as read-only.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+Output = Dict[str, Any]
+
+# Rough per-entry bookkeeping cost (OrderedDict node, key, entry tuple).
+_ENTRY_OVERHEAD = 200
+
+
+class CoalescedCallFailed(Exception):
+    """Raised to waiters when the call they were coalesced onto was abandoned."""
+
+
+def cache_key(tool_name: str, tool_input: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Canonical key for a call, or None when the input cannot be keyed."""
+    try:
+        return tool_name, json.dumps(tool_input, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ToolResultCache:
+    """Thread-safe TTL + LRU cache of tool outputs with in-flight coalescing."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: Optional[int] = None,
+        ttl_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._bytes = 0
+        # key -> (output, size, expires_at)
+        self._entries: "OrderedDict[Hashable, Tuple[Output, int, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Output]:
+        """The live cached output for ``key``, if any (counts as a hit)."""
+        with self._lock:
+            output = self._lookup(key)
+            if output is not None:
+                self.hits += 1
+            return output
+
+    def call(self, key: Hashable, run: Callable[[], Output], ttl: Optional[float] = None) -> Tuple[Output, bool]:
+        """Returns ``(output, shared)``; ``shared`` is False only for the caller that ran ``run``."""
+        output, future, owner = self._claim(key)
+        if output is not None:
+            return output, True
+        if not owner:
+            return dict(future.result()), True
+        try:
+            result = run()
+        except BaseException as exc:
+            self._fail(key, future, exc)
+            raise
+        self._complete(key, future, result, ttl)
+        return dict(result), False
+
+    async def acall(
+        self, key: Hashable, run: Callable[[], Awaitable[Output]], ttl: Optional[float] = None
+    ) -> Tuple[Output, bool]:
+        """Coroutine counterpart of ``call``; waits without blocking the event loop."""
+        output, future, owner = self._claim(key)
+        if output is not None:
+            return output, True
+        if not owner:
+            return dict(await asyncio.wrap_future(future)), True
+        try:
+            result = await run()
+        except BaseException as exc:
+            self._fail(key, future, exc)
+            raise
+        self._complete(key, future, result, ttl)
+        return dict(result), False
+
+    def _claim(self, key: Hashable) -> Tuple[Optional[Output], Future, bool]:
+        with self._lock:
+            output = self._lookup(key)
+            if output is not None:
+                self.hits += 1
+                return output, None, False  # type: ignore[return-value]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, future, False
+            self.misses += 1
+            future = self._inflight[key] = Future()
+            return None, future, True
+
+    def _complete(self, key: Hashable, future: Future, output: Output, ttl: Optional[float]) -> None:
+        size = _size(output)
+        with self._lock:
+            self._inflight.pop(key, None)
+            if size <= self.max_bytes:
+                self._store(key, output, size, ttl)
+        future.set_result(output)
+
+    def _fail(self, key: Hashable, future: Future, exc: BaseException) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        if not isinstance(exc, Exception):  # e.g. cancellation: not the waiters' error
+            exc = CoalescedCallFailed(f"coalesced call ended with {type(exc).__name__}")
+        future.set_exception(exc)
+
+    def _lookup(self, key: Hashable) -> Optional[Output]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        output, size, expires_at = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self._bytes -= size
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return dict(output)
+
+    def _store(self, key: Hashable, output: Output, size: int, ttl: Optional[float]) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        expires_at = self.clock() + (self.ttl_seconds if ttl is None else ttl)
+        self._entries[key] = (output, size, expires_at)
+        self._bytes += size
+        while self._entries and (
+            self._bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            _key, (_output, evicted, _expires) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+def _size(output: Output) -> int:
+    # Serialized length is a stable, cheap-enough proxy for the retained size.
+    return len(json.dumps(output, default=str)) + _ENTRY_OVERHEAD
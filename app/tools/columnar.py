@@ -0,0 +1,255 @@
+"""Memory-mapped columnar datasets for lookup tools.
+
+``build_columnar`` converts a CSV or JSON-lines file once into a compact
+column file that also embeds the trigram index ``DataLookupTool`` searches.
+``load_dataset`` memory-maps that file, so every worker process shares the same
+pages through the OS cache and starts without parsing rows or rebuilding the
+index::
+
+    tool = DataLookupTool(dataset=load_dataset("reference/customers.csv"))
+
+The file uses native byte order and is meant to be built on the host that
+reads it.
+"""
+from __future__ import annotations
+
+import contextlib
+import csv
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.tools.index import _SEPARATOR, TrigramIndex
+
+MAGIC = b"DLCOL001"
+_ALIGN = 8
+_TRIGRAM_WIDTH = 12  # three characters, UTF-32-LE
+_MISSING = b""  # JSON-encoded values are never empty
+
+
+def _read_rows(source: str) -> List[Dict[str, Any]]:
+    with open(source, "r", encoding="utf-8", newline="") as f:
+        if source.endswith(".csv"):
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_columnar(
+    source: str, target: Optional[str] = None, search_columns: Sequence[str] = ("name", "id")
+) -> str:
+    """Writes ``source`` (CSV or JSON lines) as a column file and returns its path."""
+    target = target or f"{source}.cols"
+    rows = _read_rows(source)
+    names: List[str] = list(dict.fromkeys(name for row in rows for name in row))
+    sections: List[Tuple[str, bytes]] = []
+    columns: Dict[str, str] = {}
+
+    for name in names:
+        values = [row.get(name) for row in rows]
+        plain = all(isinstance(value, str) for value in values)
+        columns[name] = "str" if plain else "json"
+        encoded = [
+            value.encode("utf-8") if plain
+            else (_MISSING if name not in row else json.dumps(value).encode("utf-8"))
+            for row, value in zip(rows, values)
+        ]
+        sections.append((f"col:{name}:offsets", _offsets(encoded, 0).tobytes()))
+        sections.append((f"col:{name}:data", b"".join(encoded)))
+
+    index = TrigramIndex(rows, search_columns)
+    keys = [key.encode("utf-8") for key in index.keys]
+    sections.append(("keys:offsets", _offsets(keys, 1).tobytes()))
+    sections.append(("keys:data", b"".join(key + b"\x00" for key in keys)))
+
+    trigrams = sorted((t.encode("utf-32-le"), lines) for t, lines in index.postings.items())
+    sections.append(("tri:keys", b"".join(encoded for encoded, _ in trigrams)))
+    sections.append(("tri:offsets", _offsets([lines for _, lines in trigrams], 0).tobytes()))
+    sections.append(("tri:postings", b"".join(lines.tobytes() for _, lines in trigrams)))
+
+    _write(target, sections, {"rows": len(rows), "columns": columns, "search_columns": list(search_columns)})
+    return target
+
+
+def _offsets(chunks: Sequence[Any], extra: int) -> array:
+    offsets = array("Q", [0])
+    total = 0
+    for chunk in chunks:
+        total += len(chunk) + extra
+        offsets.append(total)
+    return offsets
+
+
+def _write(target: str, sections: List[Tuple[str, bytes]], header: Dict[str, Any]) -> None:
+    # Lay sections out first so the header can record their offsets.
+    layout: Dict[str, List[int]] = {}
+    position = 0
+    for name, data in sections:
+        layout[name] = [position, len(data)]
+        position += len(data) + (-len(data) % _ALIGN)
+    header_bytes = json.dumps({**header, "sections": layout}).encode("utf-8")
+    header_bytes += b" " * (-(len(MAGIC) + 8 + len(header_bytes)) % _ALIGN)
+    # Writers racing to build the same file (e.g. ingest worker processes)
+    # each fill their own temp file; the last rename wins, intact.
+    temp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            for _name, data in sections:
+                f.write(data)
+                f.write(b"\x00" * (-len(data) % _ALIGN))
+        os.replace(temp, target)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp)
+        raise
+
+
+class _MappedPostings:
+    """``dict.get``-style trigram lookup by binary search over the mapped table."""
+
+    def __init__(self, keys: memoryview, offsets: memoryview, postings: memoryview) -> None:
+        self._keys = keys
+        self._offsets = offsets
+        self._postings = postings
+        self._count = len(offsets) - 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> bytes:
+        start = position * _TRIGRAM_WIDTH
+        return bytes(self._keys[start:start + _TRIGRAM_WIDTH])
+
+    def get(self, trigram: str) -> Optional[memoryview]:
+        encoded = trigram.encode("utf-32-le")
+        position = bisect_left(self, encoded)
+        if position == self._count or self[position] != encoded:
+            return None
+        return self._postings[self._offsets[position]:self._offsets[position + 1]]
+
+
+class _MappedKeys:
+    """Sequence of lowercased row keys stored back to back, each followed by NUL."""
+
+    def __init__(self, offsets: memoryview, data: memoryview) -> None:
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, number: int) -> str:
+        return bytes(self.data[self.offsets[number]:self.offsets[number + 1] - 1]).decode("utf-8")
+
+
+class MappedTrigramIndex(TrigramIndex):
+    """``TrigramIndex`` whose keys and postings live in a memory-mapped file."""
+
+    def __init__(self, dataset: "MappedDataset") -> None:
+        # Deliberately skips TrigramIndex.__init__: nothing is built in memory.
+        self.columns = tuple(dataset.search_columns)
+        self.keys = _MappedKeys(dataset.section("keys:offsets", "Q"), dataset.section("keys:data"))
+        self.postings = _MappedPostings(
+            dataset.section("tri:keys"), dataset.section("tri:offsets", "Q"), dataset.section("tri:postings", "I")
+        )
+        self._blob = dataset.raw_section("keys:data")
+
+    def _scan(self, needle: str) -> List[int]:
+        if not needle or _SEPARATOR in needle:
+            return super()._scan(needle)
+        # Search the key blob directly; NUL terminators keep matches inside a row.
+        encoded = needle.encode("utf-8")
+        offsets = self.keys.offsets
+        matches: List[int] = []
+        position = self._blob.find(encoded)
+        while position != -1:
+            number = bisect_right(offsets, position) - 1
+            matches.append(number)
+            position = self._blob.find(encoded, offsets[number + 1])
+        return matches
+
+
+class MappedDataset:
+    """Read-only, memory-mapped rows; behaves like the list ``DataLookupTool`` expects."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a columnar dataset")
+        (header_length,) = struct.unpack_from("<Q", self._map, len(MAGIC))
+        self._base = len(MAGIC) + 8 + header_length
+        header = json.loads(self._map[len(MAGIC) + 8:self._base])
+        self._sections: Dict[str, List[int]] = header["sections"]
+        self._length: int = header["rows"]
+        self.search_columns: List[str] = header["search_columns"]
+        self._view = memoryview(self._map)
+        self._columns = [
+            (name, kind, self.section(f"col:{name}:offsets", "Q"), self.section(f"col:{name}:data"))
+            for name, kind in header["columns"].items()
+        ]
+        self.index = MappedTrigramIndex(self)
+
+    def raw_section(self, name: str) -> "_Window":
+        """A searchable window over a section that, unlike a slice, copies nothing."""
+        start, length = self._sections[name]
+        return _Window(self._map, self._base + start, length)
+
+    def section(self, name: str, fmt: Optional[str] = None) -> memoryview:
+        start, length = self._sections[name]
+        view = self._view[self._base + start:self._base + start + length]
+        return view.cast(fmt) if fmt else view
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, number: int) -> Dict[str, Any]:
+        if number < 0:
+            number += self._length
+        row: Dict[str, Any] = {}
+        for name, kind, offsets, data in self._columns:
+            raw = bytes(data[offsets[number]:offsets[number + 1]])
+            if kind == "str":
+                row[name] = raw.decode("utf-8")
+            elif raw != _MISSING:
+                row[name] = json.loads(raw)
+        return row
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for number in range(self._length):
+            yield self[number]
+
+
+class _Window:
+    """``find`` over a byte range of an mmap without copying it."""
+
+    def __init__(self, mapped: mmap.mmap, start: int, length: int) -> None:
+        self._map = mapped
+        self._start = start
+        self._end = start + length
+
+    def find(self, needle: bytes, position: int = 0) -> int:
+        found = self._map.find(needle, self._start + position, self._end)
+        return -1 if found == -1 else found - self._start
+
+
+def load_dataset(path: str, search_columns: Sequence[str] = ("name", "id")) -> MappedDataset:
+    """Memory-maps a column file, building it first from CSV/JSON lines when needed.
+
+    The column file for ``data.csv`` is ``data.csv.cols`` and is rebuilt when
+    the source is newer.
+    """
+    if path.endswith(".cols"):
+        return MappedDataset(path)
+    target = f"{path}.cols"
+    if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(path):
+        build_columnar(path, target, search_columns)
+    return MappedDataset(target)
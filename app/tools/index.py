@@ -0,0 +1,109 @@
+"""Prebuilt search structures for lookup tools.
+
+``TrigramIndex`` answers case-insensitive substring queries over a few text
+columns without scanning every row, and ``ColumnStore`` keeps rows as parallel
+column lists instead of one dict per row.
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+_MISSING = object()
+# Separates indexed columns inside one row key so no trigram spans two columns
+# that a real query could match.
+_SEPARATOR = "\x00"
+# Intersecting more posting lists than this rarely shrinks the candidate set
+# enough to beat simply verifying the candidates.
+_MAX_INTERSECTIONS = 3
+
+
+class ColumnStore:
+    """Array-backed row storage: one list per column instead of one dict per row."""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self.columns: Dict[str, List[Any]] = {}
+        self._length = 0
+        for row in rows:
+            for name in row:
+                if name not in self.columns:
+                    self.columns[name] = [_MISSING] * self._length
+            for name, values in self.columns.items():
+                values.append(row.get(name, _MISSING))
+            self._length += 1
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        row = {}
+        for name, values in self.columns.items():
+            value = values[index]
+            if value is not _MISSING:
+                row[name] = value
+        return row
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(self._length):
+            yield self[index]
+
+
+class TrigramIndex:
+    """Inverted index from lowercase trigrams to row numbers.
+
+    ``search(query)`` returns, in row order, every row where the lowercased
+    query is a substring of one of the indexed columns - the same result as a
+    linear ``query in value.lower()`` scan.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], columns: Sequence[str]) -> None:
+        self.columns = tuple(columns)
+        self.keys: List[str] = []
+        postings: Dict[str, array] = {}
+        for number, row in enumerate(rows):
+            key = _SEPARATOR.join(str(row.get(column, "")).lower() for column in self.columns)
+            self.keys.append(key)
+            for trigram in {key[i:i + 3] for i in range(len(key) - 2)}:
+                lines = postings.get(trigram)
+                if lines is None:
+                    lines = postings[trigram] = array("I")
+                lines.append(number)
+        self.postings = postings
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, query: str) -> List[int]:
+        needle = query.lower()
+        if len(needle) < 3 or _SEPARATOR in needle:
+            return self._scan(needle)
+        trigrams = {needle[i:i + 3] for i in range(len(needle) - 2)}
+        lists = []
+        for trigram in trigrams:
+            lines = self.postings.get(trigram)
+            if lines is None:
+                return []
+            lists.append(lines)
+        lists.sort(key=len)
+        if len(needle) == 3:
+            return list(lists[0])  # exact: postings are already in row order
+        candidates = set(lists[0])
+        for lines in lists[1:_MAX_INTERSECTIONS]:
+            candidates.intersection_update(lines)
+            if not candidates:
+                return []
+        keys = self.keys
+        return sorted(number for number in candidates if needle in keys[number])
+
+    def _scan(self, needle: str) -> List[int]:
+        # Too short for trigrams (or crosses columns); keys are pre-lowercased.
+        if not needle:
+            return list(range(len(self.keys)))
+        if _SEPARATOR in needle:
+            return [
+                number
+                for number, key in enumerate(self.keys)
+                if any(needle in part for part in key.split(_SEPARATOR))
+            ]
+        return [number for number, key in enumerate(self.keys) if needle in key]
+
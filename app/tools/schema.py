@@ -0,0 +1,251 @@
+"""Compiled validators for tool input and output schemas.
+
+A schema maps field names to either a bool (the legacy "required" flag) or a
+spec dict::
+
+    input_schema = {
+        "query": {"required": True, "type": "string", "max_length": 512},
+        "limit": {"type": "integer", "minimum": 1},
+        "filters": {"type": "object", "fields": {"status": {"type": "string"}}},
+        "ids": {"type": "array", "max_length": 100, "items": {"type": "string"}},
+    }
+
+Supported spec keys are ``required``, ``type`` (a name or tuple of names from
+``TYPES``), ``max_length`` (for strings, arrays and objects), ``minimum`` (for
+numbers), ``items`` (spec for each array element) and ``fields`` (schema for a
+nested object).
+``compile_schema`` turns a schema into a ``SchemaValidator`` once; ``Tool``
+does this per class, so a call only runs the precomputed checks.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+TYPES: Dict[str, Tuple[type, ...]] = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list, tuple),
+    "object": (dict,),
+    "null": (type(None),),
+}
+_SIZED = (str, list, tuple, dict)
+_NUMBERS = (int, float)
+_SPEC_KEYS = frozenset({"required", "type", "max_length", "minimum", "items", "fields"})
+_MISSING_MESSAGES = {
+    "input": "Missing required input fields: {}",
+    "output": "Tool produced incomplete output: {}",
+}
+
+Spec = Union[bool, Mapping[str, Any]]
+_ABSENT = object()
+
+
+class ToolValidationError(Exception):
+    """Raised when tool validation fails."""
+
+
+class SchemaError(ValueError):
+    """Raised when a schema itself is malformed."""
+
+
+class _ValueCheck:
+    """Precompiled type, size and shape checks for one value."""
+
+    __slots__ = ("types", "type_names", "allow_bool", "max_length", "minimum", "items", "fields")
+
+    def __init__(self, spec: Mapping[str, Any], where: str) -> None:
+        unknown = set(spec) - _SPEC_KEYS
+        if unknown:
+            raise SchemaError(f"{where}: unknown schema keys {sorted(unknown)}")
+        names = spec.get("type")
+        if isinstance(names, str):
+            names = (names,)
+        self.types: Optional[Tuple[type, ...]] = None
+        self.type_names = ""
+        self.allow_bool = True
+        if names:
+            try:
+                self.types = tuple(t for name in names for t in TYPES[name])
+            except KeyError as exc:
+                raise SchemaError(f"{where}: unknown type {exc.args[0]!r}") from None
+            self.type_names = " or ".join(names)
+            # bool is an int subclass; only accept it where booleans are allowed.
+            self.allow_bool = "boolean" in names
+        self.max_length: Optional[int] = spec.get("max_length")
+        # Bounds are written into generated source (see ``_Emitter.value``).
+        if self.max_length is not None and (
+            type(self.max_length) is not int or self.max_length < 0
+        ):
+            raise SchemaError(f"{where}: max_length must be a non-negative int, got {self.max_length!r}")
+        self.minimum: Optional[Union[int, float]] = spec.get("minimum")
+        if self.minimum is not None and (
+            self.minimum.__class__ not in _NUMBERS or not math.isfinite(self.minimum)
+        ):
+            raise SchemaError(f"{where}: minimum must be a finite number, got {self.minimum!r}")
+        items = spec.get("items")
+        self.items = _ValueCheck(items, f"{where}[]") if items is not None else None
+        fields = spec.get("fields")
+        self.fields = SchemaValidator(fields, where=where) if fields is not None else None
+
+    def check(self, value: Any, path: str, errors: Optional[List[str]]) -> None:
+        if self.types is not None and (
+            not isinstance(value, self.types) or (value.__class__ is bool and not self.allow_bool)
+        ):
+            _fail(f"{path} must be {self.type_names}, got {type(value).__name__}", errors)
+            return
+        if self.max_length is not None and isinstance(value, _SIZED) and len(value) > self.max_length:
+            _fail(f"{path} exceeds max length {self.max_length} ({len(value)})", errors)
+            return
+        if self.minimum is not None and isinstance(value, _NUMBERS) and value < self.minimum:
+            _fail(f"{path} must be at least {self.minimum}, got {value}", errors)
+            return
+        if self.fields is not None:
+            self.fields.check(value, path, errors)
+        if self.items is not None:
+            if not isinstance(value, (list, tuple)):
+                _fail(f"{path} must be array, got {type(value).__name__}", errors)
+                return
+            for index, item in enumerate(value):
+                self.items.check(item, f"{path}[{index}]", errors)
+
+
+def _fail(message: str, errors: Optional[List[str]]) -> None:
+    if errors is None:
+        raise ToolValidationError(message)
+    errors.append(message)
+
+
+class SchemaValidator:
+    """Validates payloads against one compiled schema.
+
+    ``validate`` raises ``ToolValidationError`` on the first problem;
+    ``errors`` returns every problem found.
+    """
+
+    __slots__ = ("schema", "kind", "where", "ok", "_required", "_ordered_required", "_checks")
+
+    def __init__(self, schema: Mapping[str, Spec], kind: str = "input", where: str = "$") -> None:
+        self.schema = schema
+        self.kind = kind
+        self.where = where
+        required = []
+        checks = []
+        for name, spec in schema.items():
+            if isinstance(spec, bool):
+                if spec:
+                    required.append(name)
+                continue
+            if not isinstance(spec, Mapping):
+                raise SchemaError(f"{where}.{name}: spec must be a bool or a dict")
+            if spec.get("required", False):
+                required.append(name)
+            check = _ValueCheck(spec, f"{where}.{name}")
+            if any(part is not None for part in (check.types, check.max_length, check.minimum, check.items, check.fields)):
+                checks.append((name, f"{where}.{name}", check))
+        self._ordered_required = tuple(required)
+        self._required = frozenset(required)
+        self._checks = tuple(checks)
+        # True when a payload is valid: the per-call fast path, generated as
+        # straight-line code that builds no paths or messages.
+        self.ok: Callable[[Any], bool] = _generate(self)
+
+    def validate(self, payload: Any) -> None:
+        # Only invalid payloads pay for building paths and messages.
+        if not self.ok(payload):
+            self.check(payload, "$", None)
+
+    def errors(self, payload: Any) -> List[str]:
+        found: List[str] = []
+        self.check(payload, "$", found)
+        return found
+
+    def check(self, payload: Any, path: str, errors: Optional[List[str]]) -> None:
+        if not isinstance(payload, dict):
+            _fail(f"{path} must be object, got {type(payload).__name__}", errors)
+            return
+        if not self._required <= payload.keys():
+            missing = [name for name in self._ordered_required if name not in payload]
+            if path == "$" and self.where == "$":
+                _fail(_MISSING_MESSAGES.get(self.kind, "Missing required fields: {}").format(missing), errors)
+            else:
+                _fail(f"{path} is missing required fields: {missing}", errors)
+        for name, field_path, check in self._checks:
+            value = payload.get(name, _ABSENT)
+            if value is not _ABSENT:
+                check.check(value, field_path if path == self.where else f"{path}.{name}", errors)
+
+
+def compile_schema(schema: Mapping[str, Spec], kind: str = "input") -> SchemaValidator:
+    """Compiles ``schema`` once into a reusable validator."""
+    return SchemaValidator(schema, kind=kind)
+
+
+class _Emitter:
+    """Emits the source of one predicate function for a compiled schema."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {"_ABSENT": _ABSENT, "_SIZED": _SIZED, "_NUMBERS": _NUMBERS}
+        self._names = 0
+
+    def name(self, prefix: str) -> str:
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def constant(self, value: Any) -> str:
+        name = self.name("_c")
+        self.constants[name] = value
+        return name
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def object(self, validator: "SchemaValidator", var: str, indent: int) -> None:
+        self.emit(indent, f"if not isinstance({var}, dict): return False")
+        if validator._required:
+            self.emit(indent, f"if not {self.constant(validator._required)} <= {var}.keys(): return False")
+        for name, _path, check in validator._checks:
+            value = self.name("v")
+            self.emit(indent, f"{value} = {var}.get({name!r}, _ABSENT)")
+            self.emit(indent, f"if {value} is not _ABSENT:")
+            self.value(check, value, indent + 1)
+
+    def value(self, check: _ValueCheck, var: str, indent: int) -> None:
+        start = len(self.lines)
+        if check.types is not None:
+            self.emit(indent, f"if not isinstance({var}, {self.constant(check.types)}): return False")
+            if not check.allow_bool and int in check.types:
+                self.emit(indent, f"if {var}.__class__ is bool: return False")
+        if check.max_length is not None:
+            sized = check.types is not None and all(issubclass(t, _SIZED) for t in check.types)
+            guard = "" if sized else f"isinstance({var}, _SIZED) and "
+            self.emit(indent, f"if {guard}len({var}) > {check.max_length}: return False")
+        if check.minimum is not None:
+            numeric = check.types is not None and all(issubclass(t, _NUMBERS) for t in check.types)
+            guard = "" if numeric else f"isinstance({var}, _NUMBERS) and "
+            self.emit(indent, f"if {guard}{var} < {check.minimum!r}: return False")
+        if check.fields is not None:
+            self.object(check.fields, var, indent)
+        if check.items is not None:
+            item = self.name("i")
+            self.emit(indent, f"if not isinstance({var}, (list, tuple)): return False")
+            self.emit(indent, f"for {item} in {var}:")
+            self.value(check.items, item, indent + 1)
+        if len(self.lines) == start:
+            self.emit(indent, "pass")
+
+
+def _generate(validator: "SchemaValidator") -> Callable[[Any], bool]:
+    emitter = _Emitter()
+    emitter.object(validator, "payload", 1)
+    emitter.emit(1, "return True")
+    # Constants and builtins become default arguments, i.e. fast locals.
+    constants = {**emitter.constants, "isinstance": isinstance, "len": len, "dict": dict, "list": list, "tuple": tuple, "bool": bool}
+    signature = ", ".join(f"{name}={name}" for name in constants)
+    source = f"def ok(payload, {signature}):\n" + "\n".join(emitter.lines)
+    namespace = dict(constants)
+    exec(source, namespace)  # noqa: S102 - source is generated above
+    return namespace["ok"]
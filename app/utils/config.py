@@ -17,7 +17,35 @@ class EnvironmentConfig:
 
     max_steps: int = 6
     step_timeout_seconds: int = 20
+    task_timeout_seconds: int = 120
     audit_log_path: Optional[str] = os.getenv("AUDIT_LOG_PATH")
+    audit_log_fsync: str = "never"
+    audit_log_max_bytes: int = 0
+    audit_log_rotate_seconds: int = 0
+    audit_log_compress: bool = False
+    audit_log_format: str = "jsonl"
+    audit_max_records: int = 10_000
+    audit_spill_path: Optional[str] = None
+    policy_poll_seconds: int = 0
+    guardrail_cache_bytes: int = 0
+    guardrail_stream_overlap: int = 256
+    guardrail_max_payload_depth: int = 64
+    guardrail_max_payload_chars: int = 16 * 1024 * 1024
+    guardrail_dictionary_cache_dir: Optional[str] = None
+    tool_cache_bytes: int = 0
+    tool_cache_ttl_seconds: float = 60.0
+    scheduler_workers: int = 0
+    scheduler_max_queue: int = 1000
+    scheduler_latency_target_ms: float = 2000.0
+    role_rate_limits: str = ""
+    default_role_rate_limit: str = ""
+    tool_rate_limits: str = ""
+    trace_sample_rate: float = 0.0
+    trace_export_path: Optional[str] = None
+    trace_collector_url: Optional[str] = None
+    profile_sample_rate: float = 0.0
+    profile_dir: str = "profiles"
+    profile_mode: str = "cpu"
     environment: str = os.getenv("APP_ENV", "development")
 
     @classmethod
@@ -27,6 +55,44 @@ class EnvironmentConfig:
             step_timeout_seconds=int(
                 os.getenv("AGENT_STEP_TIMEOUT_SECONDS", cls.step_timeout_seconds)
             ),
+            task_timeout_seconds=int(
+                os.getenv("AGENT_TASK_TIMEOUT_SECONDS", cls.task_timeout_seconds)
+            ),
             audit_log_path=os.getenv("AUDIT_LOG_PATH"),
+            audit_log_fsync=os.getenv("AUDIT_LOG_FSYNC", cls.audit_log_fsync),
+            audit_log_max_bytes=int(os.getenv("AUDIT_LOG_MAX_BYTES", cls.audit_log_max_bytes)),
+            audit_log_rotate_seconds=int(
+                os.getenv("AUDIT_LOG_ROTATE_SECONDS", cls.audit_log_rotate_seconds)
+            ),
+            audit_log_compress=os.getenv("AUDIT_LOG_COMPRESS", "").lower() in ("1", "true", "yes"),
+            audit_log_format=os.getenv("AUDIT_LOG_FORMAT", cls.audit_log_format),
+            audit_max_records=int(os.getenv("AUDIT_MAX_RECORDS", cls.audit_max_records)),
+            audit_spill_path=os.getenv("AUDIT_SPILL_PATH"),
+            policy_poll_seconds=int(os.getenv("POLICY_POLL_SECONDS", cls.policy_poll_seconds)),
+            guardrail_cache_bytes=int(os.getenv("GUARDRAIL_CACHE_BYTES", cls.guardrail_cache_bytes)),
+            guardrail_stream_overlap=int(os.getenv("GUARDRAIL_STREAM_OVERLAP", cls.guardrail_stream_overlap)),
+            guardrail_max_payload_depth=int(
+                os.getenv("GUARDRAIL_MAX_PAYLOAD_DEPTH", cls.guardrail_max_payload_depth)
+            ),
+            guardrail_max_payload_chars=int(
+                os.getenv("GUARDRAIL_MAX_PAYLOAD_CHARS", cls.guardrail_max_payload_chars)
+            ),
+            guardrail_dictionary_cache_dir=os.getenv("GUARDRAIL_DICTIONARY_CACHE_DIR"),
+            tool_cache_bytes=int(os.getenv("TOOL_CACHE_BYTES", cls.tool_cache_bytes)),
+            tool_cache_ttl_seconds=float(os.getenv("TOOL_CACHE_TTL_SECONDS", cls.tool_cache_ttl_seconds)),
+            scheduler_workers=int(os.getenv("SCHEDULER_WORKERS", cls.scheduler_workers)),
+            scheduler_max_queue=int(os.getenv("SCHEDULER_MAX_QUEUE", cls.scheduler_max_queue)),
+            scheduler_latency_target_ms=float(
+                os.getenv("SCHEDULER_LATENCY_TARGET_MS", cls.scheduler_latency_target_ms)
+            ),
+            role_rate_limits=os.getenv("ROLE_RATE_LIMITS", cls.role_rate_limits),
+            default_role_rate_limit=os.getenv("DEFAULT_ROLE_RATE_LIMIT", cls.default_role_rate_limit),
+            tool_rate_limits=os.getenv("TOOL_RATE_LIMITS", cls.tool_rate_limits),
+            trace_sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", cls.trace_sample_rate)),
+            trace_export_path=os.getenv("TRACE_EXPORT_PATH"),
+            trace_collector_url=os.getenv("TRACE_COLLECTOR_URL"),
+            profile_sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", cls.profile_sample_rate)),
+            profile_dir=os.getenv("PROFILE_DIR", cls.profile_dir),
+            profile_mode=os.getenv("PROFILE_MODE", cls.profile_mode),
             environment=os.getenv("APP_ENV", "development"),
         )
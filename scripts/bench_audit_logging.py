@@ -0,0 +1,62 @@
+"""Benchmark: orchestrator tasks/sec with audit logging off and on.
+
+Run from the repository root::
+
+    python -m scripts.bench_audit_logging --tasks 20000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Optional
+
+from app.agent.orchestrator import AgentOrchestrator
+from app.agent.types import Task
+from app.evaluation.metrics import EvaluationTracker
+from app.guardrails.manager import PolicyManager
+from app.guardrails.policy import GuardrailEngine
+from app.logging.audit import AuditLogger
+from app.logging.writer import AuditLogWriter
+from app.tools.base import DataLookupTool
+from app.utils.config import EnvironmentConfig
+
+
+def _orchestrator(writer: Optional[AuditLogWriter]) -> AgentOrchestrator:
+    return AgentOrchestrator(
+        tools={"data_lookup": DataLookupTool()},
+        guardrail_engine=GuardrailEngine(PolicyManager("policies/default.yaml")),
+        audit_logger=AuditLogger(writer=writer),
+        evaluation_tracker=EvaluationTracker(),
+        # Deadlines off: measure logging, not the watchdog hand-off.
+        config=EnvironmentConfig(step_timeout_seconds=0, task_timeout_seconds=0),
+    )
+
+
+def _run(label: str, writer: Optional[AuditLogWriter], count: int) -> None:
+    orchestrator = _orchestrator(writer)
+    start = time.perf_counter()
+    for i in range(count):
+        orchestrator.run_task(Task(task_id=f"bench-{i}", description="lookup alice", role="analyst"))
+    submitted = time.perf_counter() - start
+    orchestrator.audit_logger.flush()
+    drained = time.perf_counter() - start
+    orchestrator.audit_logger.close()
+    print(f"{label:<22} {count / submitted:>12.0f} {count / drained:>14.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<22} {'tasks/s':>12} {'incl. flush':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        _run("logging off", None, args.tasks)
+        _run("buffered writer", AuditLogWriter(os.path.join(tmp, "a.jsonl")), args.tasks)
+        _run("buffered + fsync", AuditLogWriter(os.path.join(tmp, "b.jsonl"), fsync="batch"), args.tasks)
+
+
+if __name__ == "__main__":
+    main()
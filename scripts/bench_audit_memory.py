@@ -0,0 +1,78 @@
+"""Reports memory held per retained audit record.
+
+Compares the previous unbounded list of nested dicts with the bounded
+``AuditRecordStore`` of compact, pre-serialized records. Run from the
+repository root::
+
+    python -m scripts.bench_audit_memory --tasks 20000
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import gc
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from app.agent.orchestrator import AgentOrchestrator
+from app.agent.types import Task
+from app.evaluation.metrics import EvaluationTracker
+from app.guardrails.manager import PolicyManager
+from app.guardrails.policy import GuardrailEngine
+from app.logging.audit import AuditLogger
+from app.logging.store import AuditRecordStore, CompactRecord
+from app.tools.base import DataLookupTool
+from app.utils.config import EnvironmentConfig
+
+
+def _sample_records(count: int) -> List[Dict[str, Any]]:
+    logger = AuditLogger(store=AuditRecordStore(max_records=count))
+    orchestrator = AgentOrchestrator(
+        tools={"data_lookup": DataLookupTool()},
+        guardrail_engine=GuardrailEngine(PolicyManager("policies/default.yaml")),
+        audit_logger=logger,
+        evaluation_tracker=EvaluationTracker(),
+        config=EnvironmentConfig(step_timeout_seconds=0, task_timeout_seconds=0),
+    )
+    for i in range(count):
+        orchestrator.run_task(Task(task_id=f"mem-{i}", description="lookup alice", role="analyst"))
+    return list(logger.records)
+
+
+def _measure(build: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--cap", type=int, default=5_000)
+    args = parser.parse_args()
+
+    records = _sample_records(args.tasks)
+
+    def as_dicts() -> List[Dict[str, Any]]:
+        return copy.deepcopy(records)
+
+    def as_store() -> AuditRecordStore:
+        store = AuditRecordStore(max_records=args.cap)
+        for entry in records:
+            store.add(CompactRecord.from_entry(entry))
+        return store
+
+    dict_bytes = _measure(as_dicts)
+    store_bytes = _measure(as_store)
+    retained = min(args.cap, args.tasks)
+    print(f"{'representation':<28} {'records':>8} {'bytes/record':>13}")
+    print(f"{'list of dicts (unbounded)':<28} {args.tasks:>8} {dict_bytes / args.tasks:>13.0f}")
+    print(f"{'AuditRecordStore (capped)':<28} {retained:>8} {store_bytes / retained:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
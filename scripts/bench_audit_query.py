@@ -0,0 +1,106 @@
+"""Benchmark: indexed audit queries vs. a full ``json.loads`` scan.
+
+Generates a synthetic JSON-lines audit log, builds the sidecar index, then times
+a compliance-style query both ways. Run from the repository root::
+
+    python -m scripts.bench_audit_query --records 3000000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from app.logging.query import AuditLogIndex
+
+ROLES = ["analyst", "viewer", "admin", "support"]
+TOOLS = ["data_lookup", "report", "ticket"]
+VIOLATIONS = [None] * 17 + ["Policy violation: pii detected", "Policy violation: tone detected", "step_timeout"]
+
+
+def _record(i: int, rng: random.Random, start: datetime) -> Dict[str, Any]:
+    violation = rng.choice(VIOLATIONS)
+    started = start + timedelta(seconds=i * 2)
+    return {
+        "task_id": f"task-{i}",
+        "role": rng.choice(ROLES),
+        "description": "lookup account history",
+        "parameters": {},
+        "started_at": started.isoformat(),
+        "steps": [
+            {
+                "step": 1, "rationale": "synthetic", "tool": rng.choice(TOOLS),
+                "tool_input": {"query": "abc"}, "tool_output": None, "latency_ms": 1.0,
+                "blocked": violation is not None, "violation": violation,
+            }
+        ],
+        "completed_at": started.isoformat(),
+        "status": "blocked" if violation else "completed",
+        "summary": "synthetic", "safety_score": 0.9 if violation else 1.0, "metrics": {},
+    }
+
+
+def _full_scan(path: str, role: str, needle: str, since: str, until: str) -> int:
+    count = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            record = json.loads(raw)
+            if record["role"] != role or record["status"] != "blocked":
+                continue
+            if not since <= record["started_at"] <= until:
+                continue
+            if any(needle in (s.get("violation") or "") for s in record["steps"]):
+                count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=3_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    start = datetime(2026, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "audit.jsonl")
+        t0 = time.perf_counter()
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(args.records):
+                f.write(json.dumps(_record(i, rng, start)) + "\n")
+        print(f"generated {args.records} records ({os.path.getsize(path) / 1e6:.0f} MB) in {time.perf_counter() - t0:.1f}s")
+
+        index = AuditLogIndex(path)
+        t0 = time.perf_counter()
+        index.refresh()
+        print(f"initial index build: {time.perf_counter() - t0:.2f}s")
+
+        middle = start + timedelta(seconds=args.records)
+        since, until = middle.isoformat(), (middle + timedelta(days=1)).isoformat()
+        query = dict(role="analyst", status="blocked", violation="pii", since=since, until=until)
+
+        t0 = time.perf_counter()
+        indexed = sum(1 for _ in AuditLogIndex(path).query(**query))
+        t_indexed = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        scanned = _full_scan(path, "analyst", "pii", since, until)
+        t_scan = time.perf_counter() - t0
+        assert indexed == scanned, (indexed, scanned)
+        print(f"query matches: {indexed}")
+        print(f"indexed query (cold index load): {t_indexed * 1000:.1f} ms")
+        print(f"full json.loads scan:            {t_scan * 1000:.1f} ms  ({t_scan / t_indexed:.0f}x slower)")
+
+        with open(path, "a", encoding="utf-8") as f:
+            for i in range(args.records, args.records + 1000):
+                f.write(json.dumps(_record(i, rng, start)) + "\n")
+        t0 = time.perf_counter()
+        index.refresh()
+        print(f"incremental refresh (+1000 lines): {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark: policy backtest throughput and worker memory as the audit log grows.
+
+Records an audit log by running a seeded workload through the orchestrator
+under the default policy, then replicates it to each ``--sizes-mb`` and
+backtests a candidate without the ``pii`` check with every ``--processes``
+count. Each backtest runs in a fresh process; the peak RSS column is the
+largest of that process and its workers, so it should stay flat as the log
+grows.
+
+Run from the repository root::
+
+    python -m scripts.bench_backtest --sizes-mb 16 64 256 --processes 1 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from app.guardrails.manager import PolicyManager
+from app.logging.audit import AuditLogger
+from app.main import build_orchestrator
+from scripts.workload import WorkloadSpec, generate_tasks
+
+CANDIDATE = """policy:
+  name: candidate
+  checks: [hallucination, tone]
+  fail_action: redact
+"""
+
+
+def _record(path: Path, tasks: int) -> None:
+    orchestrator = build_orchestrator(PolicyManager("policies/default.yaml"))
+    orchestrator.audit_logger = AuditLogger(str(path))
+    for task in generate_tasks(WorkloadSpec(tasks=tasks, pii_rate=0.1, toxicity_rate=0.05)):
+        orchestrator.run_task(task)
+    orchestrator.audit_logger.close()
+
+
+def _replicate(source: Path, target: Path, size: int) -> None:
+    data = source.read_bytes()
+    with open(target, "wb") as handle:
+        written = 0
+        while written < size:
+            handle.write(data)
+            written += len(data)
+
+
+def _backtest(log: Path, policy: Path, output: Path, processes: int, chunk_mb: int) -> dict:
+    command = [
+        sys.executable, "-m", "app.backtest", "--log", str(log), "--policy", str(policy),
+        "--output", str(output), "--processes", str(processes), "--chunk-mb", str(chunk_mb),
+    ]
+    done = subprocess.run(command, check=True, capture_output=True, text=True)
+    return json.loads(done.stderr.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--chunk-mb", type=int, default=16)
+    parser.add_argument("--tasks", type=int, default=2_000, help="Tasks recorded before replication")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        directory = Path(workdir)
+        recorded = directory / "recorded.jsonl"
+        _record(recorded, args.tasks)
+        policy = directory / "candidate.yaml"
+        policy.write_text(CANDIDATE)
+        print(f"{'log MB':>7} {'processes':>9} {'GB/s':>7} {'records':>9} {'diffs':>7} {'peak RSS MB':>12}")
+        # ru_maxrss of children only grows, so sizes run smallest first.
+        for size_mb in sorted(args.sizes_mb):
+            log = directory / "audit.jsonl"
+            _replicate(recorded, log, size_mb << 20)
+            for processes in sorted(set(args.processes)):
+                stats = _backtest(log, policy, directory / "diff.jsonl", processes, args.chunk_mb)
+                peak_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+                print(
+                    f"{size_mb:>7} {processes:>9} {stats['gb_per_second']:>7.3f}"
+                    f" {stats['records']:>9} {stats['diffs']:>7} {peak_mb:>12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
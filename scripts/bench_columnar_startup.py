@@ -0,0 +1,84 @@
+"""Benchmark: worker cold start and memory, JSON-lines rows vs. memory-mapped columns.
+
+Each worker process builds a ``DataLookupTool`` and answers one query, then
+reports its startup time, RSS and PSS (proportional set size, which splits
+shared pages between processes). Run from the repository root::
+
+    python -m scripts.bench_columnar_startup --rows 200000 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from app.tools.base import DataLookupTool
+from app.tools.columnar import build_columnar, load_dataset
+from scripts.bench_data_lookup import _rows
+
+
+def _memory_kb() -> Dict[str, int]:
+    usage = {"rss": 0, "pss": 0}
+    try:
+        with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                field, value = line.split(":", 1)
+                if field in ("Rss", "Pss"):
+                    usage[field.lower()] = int(value.split()[0])
+    except OSError:  # not Linux: fall back to peak RSS
+        import resource
+
+        usage["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+
+def _worker(args: tuple) -> Dict[str, float]:
+    mode, path = args
+    start = time.perf_counter()
+    if mode == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            tool = DataLookupTool([json.loads(line) for line in f])
+    else:
+        tool = DataLookupTool(dataset=load_dataset(path))
+    tool.run({"query": "smith"})
+    return {"startup_s": time.perf_counter() - start, **_memory_kb()}
+
+
+def _report(label: str, results: List[Dict[str, float]]) -> None:
+    n = len(results)
+    print(
+        f"{label:<16} {sum(r['startup_s'] for r in results) / n:>10.3f}"
+        f" {sum(r['rss'] for r in results) / n / 1024:>9.1f}"
+        f" {sum(r['pss'] for r in results) / n / 1024:>9.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "rows.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            for row in _rows(args.rows):
+                f.write(json.dumps(row) + "\n")
+        start = time.perf_counter()
+        columns = build_columnar(source)
+        print(f"one-time column build: {time.perf_counter() - start:.2f}s "
+              f"({os.path.getsize(columns) / 1e6:.1f} MB on disk)")
+
+        context = multiprocessing.get_context("spawn")
+        print(f"{'mode':<16} {'startup s':>10} {'RSS MB':>9} {'PSS MB':>9}")
+        for label, mode, path in (("jsonl + index", "jsonl", source), ("mmap columns", "cols", columns)):
+            with context.Pool(args.workers) as pool:
+                _report(label, pool.map(_worker, [(mode, path)] * args.workers))
+
+
+if __name__ == "__main__":
+    main()
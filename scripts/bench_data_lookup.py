@@ -0,0 +1,74 @@
+"""Benchmark: indexed ``DataLookupTool`` vs. the previous linear scan.
+
+Run from the repository root::
+
+    python -m scripts.bench_data_lookup --sizes 10000 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+from typing import Any, Callable, Dict, List
+
+from app.tools.base import DataLookupTool
+
+QUERIES = ["ali", "user-4242", "smith", "zq", "nomatchhere"]
+
+
+def _rows(count: int, seed: int = 3) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    first = ["Alice", "Bob", "Carol", "Dave", "Erin", "Frank", "Grace", "Heidi"]
+    last = ["Smith", "Jones", "Ng", "Garcia", "Kowalski", "Okafor", "Tanaka"]
+    rows = []
+    for i in range(count):
+        suffix = "".join(rng.choice(string.ascii_lowercase) for _ in range(4))
+        rows.append({
+            "id": f"user-{i}",
+            "name": f"{rng.choice(first)} {rng.choice(last)}-{suffix}",
+            "status": rng.choice(["active", "suspended"]),
+        })
+    return rows
+
+
+def _scan(rows: List[Dict[str, Any]]) -> Callable[[str], List[Dict[str, Any]]]:
+    def run(query: str) -> List[Dict[str, Any]]:
+        query = query.lower()
+        return [r for r in rows if query in r.get("name", "").lower() or query in r.get("id", "").lower()]
+
+    return run
+
+
+def _per_call_ms(fn: Callable[[str], object], min_seconds: float = 0.3) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        for query in QUERIES:
+            fn(query)
+        calls += len(QUERIES)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'build s':>8} {'scan ms':>9} {'index ms':>9} {'limit=20 ms':>12} {'speedup':>8}")
+    for size in args.sizes:
+        rows = _rows(size)
+        start = time.perf_counter()
+        tool = DataLookupTool(rows)
+        build = time.perf_counter() - start
+        scan = _scan(rows)
+        for query in QUERIES:
+            assert tool.run({"query": query})["results"] == scan(query), query
+        scan_ms = _per_call_ms(scan)
+        index_ms = _per_call_ms(lambda q: tool.run({"query": q}))
+        limit_ms = _per_call_ms(lambda q: tool.run({"query": q, "limit": 20}))
+        print(f"{size:>9} {build:>8.2f} {scan_ms:>9.3f} {index_ms:>9.3f} {limit_ms:>12.3f} {scan_ms / index_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Micro-benchmark: dictionary checks as a regex alternation vs. the Aho-Corasick automaton.
+
+For growing term lists it reports the one-off cost of each approach (regex
+compile, automaton build, load from the on-disk cache) and scan throughput on
+a clean payload and on one with a few hits. Automaton throughput should stay
+flat as the dictionary grows; the regex alternation's does not.
+
+Run from the repository root::
+
+    python -m scripts.bench_dictionary
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import string
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+from app.guardrails.dictionary import DictionaryMatcher, DictionarySpec, build_matchers, digest_specs
+
+SIZES = (100, 1_000, 10_000, 50_000)
+PAYLOAD_CHARS = 256 * 1024
+
+
+def _terms(count: int, seed: int = 3) -> List[str]:
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < count:
+        words = rng.choice((1, 1, 1, 2, 3))
+        terms.add(" ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9))) for _ in range(words)))
+    return sorted(terms)
+
+
+def _payload(chars: int, hits: List[str], seed: int = 7) -> str:
+    rng = random.Random(seed)
+    # Short common words: real text, with tokens that are never terms.
+    vocabulary = ["the", "and", "for", "with", "client", "account", "report", "quarter", "rate", "fund"]
+    words: List[str] = []
+    size = 0
+    while size < chars:
+        word = rng.choice(vocabulary)
+        words.append(word)
+        size += len(word) + 1
+    for term in hits:
+        words.insert(rng.randrange(len(words)), term.upper())
+    return " ".join(words)
+
+
+def _regex(terms: List[str]) -> "re.Pattern[str]":
+    alternatives = (r"\W+".join(map(re.escape, term.split())) for term in terms)
+    return re.compile(rf"(?i)\b(?:{'|'.join(alternatives)})\b")
+
+
+def _mbps(fn: Callable[[str], object], text: str, min_seconds: float) -> float:
+    iterations = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_seconds:
+        fn(text)
+        iterations += 1
+        elapsed = time.perf_counter() - start
+    return iterations * len(text) / elapsed / 1e6
+
+
+def _timed(fn: Callable[[], object]) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--payload-chars", type=int, default=PAYLOAD_CHARS)
+    args = parser.parse_args()
+
+    print(
+        f"{'terms':>7} {'regex ms':>9} {'build ms':>9} {'cached ms':>10}"
+        f" {'regex MB/s':>11} {'ac MB/s':>8} {'regex hit MB/s':>15} {'ac hit MB/s':>12}"
+    )
+    for size in args.sizes:
+        terms = _terms(size)
+        spec = DictionarySpec("terms", tuple(terms))
+        clean = _payload(args.payload_chars, [])
+        hits = _payload(args.payload_chars, terms[:: max(1, size // 5)])
+
+        pattern, regex_ms = _timed(lambda: _regex(terms))
+        matcher, build_ms = _timed(lambda: DictionaryMatcher.build([spec], digest_specs([spec])))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            build_matchers([spec], cache_dir=cache_dir)
+            _, cached_ms = _timed(lambda: build_matchers([spec], cache_dir=cache_dir))
+
+        assert {m.start() for m in pattern.finditer(hits)} == {start for start, _end, _check in matcher.matches(hits)}
+        assert not matcher.found_checks(clean) and pattern.search(clean) is None
+
+        regex_clean = _mbps(pattern.search, clean, args.min_seconds)
+        ac_clean = _mbps(matcher.found_checks, clean, args.min_seconds)
+        regex_hits = _mbps(lambda text: list(pattern.finditer(text)), hits, args.min_seconds)
+        ac_hits = _mbps(matcher.matches, hits, args.min_seconds)
+        print(
+            f"{size:>7} {regex_ms:>9.0f} {build_ms:>9.0f} {cached_ms:>10.0f}"
+            f" {regex_clean:>11.1f} {ac_clean:>8.1f} {regex_hits:>15.1f} {ac_hits:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Micro-benchmark: compiled single-pass scanner vs. the per-check regex loop.
+
+Run from the repository root::
+
+    python -m scripts.bench_guardrail_scanner
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import string
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.guardrails.models import PolicyDefinition
+from app.guardrails.scanner import CompiledScanner
+
+PATTERNS: Dict[str, str] = {
+    "pii": r"\b\d{3}-\d{2}-\d{4}\b",
+    "hallucination": r"(?i)confidence: low",
+    "tone": r"(?i)shutup|idiot",
+}
+SIZES = {"1KB": 1024, "64KB": 64 * 1024, "1MB": 1024 * 1024}
+
+
+def _payload(size: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + "     .,-:"
+    return "".join(rng.choice(alphabet) for _ in range(size))
+
+
+def _per_check_loop(policy: PolicyDefinition) -> Callable[[str], List[str]]:
+    def scan(text: str) -> List[str]:
+        return [c for c in policy.checks if c in PATTERNS and re.search(PATTERNS[c], text)]
+
+    return scan
+
+
+def _time(fn: Callable[[str], object], text: str, min_seconds: float) -> Tuple[int, float]:
+    iterations = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_seconds:
+        fn(text)
+        iterations += 1
+        elapsed = time.perf_counter() - start
+    return iterations, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    policy = PolicyDefinition(
+        name="bench", allowed_models=[], checks=list(PATTERNS), fail_action="block"
+    )
+    scanner = CompiledScanner(PATTERNS, policy.checks)
+    baseline = _per_check_loop(policy)
+
+    print(f"{'payload':>8} {'per-check MB/s':>15} {'compiled MB/s':>14} {'speedup':>8}")
+    for label, size in SIZES.items():
+        text = _payload(size)
+        assert sorted(baseline(text)) == sorted(scanner.scan(text))
+        n_old, t_old = _time(baseline, text, args.min_seconds)
+        n_new, t_new = _time(scanner.scan, text, args.min_seconds)
+        mbps_old = n_old * size / t_old / 1e6
+        mbps_new = n_new * size / t_new / 1e6
+        print(f"{label:>8} {mbps_old:>15.1f} {mbps_new:>14.1f} {mbps_new / mbps_old:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: flattened single-pass payload scanning vs. per-leaf recursion.
+
+The baseline recurses through the payload and runs every enabled check's
+regex on each string leaf. The walker flattens all leaves into one buffer and
+scans it once with the compiled scanner.
+
+Run from the repository root::
+
+    python -m scripts.bench_payload_walker --depth 40 --width 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import string
+import time
+from typing import Any, Callable, List
+
+from app.guardrails.scanner import DEFAULT_PATTERNS, CompiledScanner
+from app.guardrails.walker import flatten
+
+
+def _document(depth: int, width: int, leaf_chars: int, rng: random.Random) -> Any:
+    """A tree ``depth`` levels deep whose every level holds ``width`` records."""
+    alphabet = string.ascii_letters + string.digits + "     .,-:"
+
+    def text() -> str:
+        return "".join(rng.choice(alphabet) for _ in range(leaf_chars))
+
+    root: dict = {}
+    node = root
+    for level in range(depth):
+        node["records"] = [{"id": f"r{level}-{i}", "notes": text(), "tags": [text()[:12], text()[:12]]} for i in range(width)]
+        node["child"] = {}
+        node = node["child"]
+    node["notes"] = "last word: 123-45-6789"
+    return root
+
+
+def _per_leaf(patterns: List["re.Pattern[str]"]) -> Callable[[Any], List[int]]:
+    def walk(value: Any, found: List[int]) -> None:
+        if isinstance(value, str):
+            found.extend(i for i, pattern in enumerate(patterns) if pattern.search(value))
+        elif isinstance(value, dict):
+            for child in value.values():
+                walk(child, found)
+        elif isinstance(value, (list, tuple)):
+            for child in value:
+                walk(child, found)
+
+    def scan(payload: Any) -> List[int]:
+        found: List[int] = []
+        walk(payload, found)
+        return found
+
+    return scan
+
+
+def _rate(fn: Callable[[Any], object], payload: Any, min_seconds: float) -> float:
+    iterations = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        fn(payload)
+        iterations += 1
+    return iterations / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=40)
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--leaf-chars", type=int, nargs="+", default=[32, 256])
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    scanner = CompiledScanner(DEFAULT_PATTERNS, DEFAULT_PATTERNS)
+    baseline = _per_leaf([re.compile(DEFAULT_PATTERNS[check]) for check in scanner.checks])
+
+    def walker(payload: Any) -> object:
+        return flatten(payload).scan(scanner)
+
+    print(f"{'leaf chars':>10} {'leaves':>7} {'KB':>7} {'per-leaf/s':>11} {'walker/s':>9} {'MB/s':>7} {'speedup':>8}")
+    for leaf_chars in args.leaf_chars:
+        payload = _document(args.depth, args.width, leaf_chars, random.Random(3))
+        flat = flatten(payload)
+        size_kb = len(json.dumps(payload)) / 1024
+        slow = _rate(baseline, payload, args.min_seconds)
+        fast = _rate(walker, payload, args.min_seconds)
+        print(
+            f"{leaf_chars:>10} {len(flat):>7} {size_kb:>7.0f} {slow:>11.0f} {fast:>9.0f}"
+            f" {fast * size_kb / 1024:>7.1f} {fast / slow:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Micro-benchmark: dict + ``json.dumps`` serialization vs. the direct encoders and slotted types.
+
+Runs a seeded workload through the orchestrator once, then replays the
+resulting steps through the previous audit path (a dict per step, the nested
+record through ``json.dumps``) and through ``AuditLogger``'s direct encoder,
+and serializes the responses the way ``app.ingest`` did and does now. It
+reports throughput, the peak memory allocated per task and the size of each
+result object with and without slots, then compares writing and reading the
+audit log as JSON lines and as binary frames.
+
+Run from the repository root::
+
+    python -m scripts.bench_result_encoding --tasks 2000
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from app.agent.types import AgentResponse, StepResult, Task
+from app.guardrails.manager import PolicyManager
+from app.logging.audit import AuditLogger
+from app.logging.encoding import encode_response
+from app.logging.frames import read_frames
+from app.logging.store import AuditRecordStore, CompactRecord
+from app.logging.writer import AuditLogWriter
+from app.main import build_orchestrator
+from scripts.workload import WorkloadSpec, generate_tasks
+
+Trace = Tuple[Task, AgentResponse]
+
+
+def _dict_audit(store: AuditRecordStore, task: Task, response: AgentResponse, policy: Dict[str, Any]) -> str:
+    """The previous ``AuditLogger`` path: start_task, log_step per step, end_task."""
+    entry: Dict[str, Any] = {
+        "task_id": task.task_id,
+        "role": task.role,
+        "description": task.description,
+        "parameters": task.parameters,
+        "started_at": datetime.utcnow().isoformat(),
+        "steps": [],
+    }
+    entry["policy"] = policy
+    for result in response.steps:
+        step = {
+            "step": result.step,
+            "rationale": result.rationale,
+            "tool": result.tool_used,
+            "tool_input": result.tool_input,
+            "tool_output": result.tool_output,
+            "latency_ms": result.latency_ms,
+            "blocked": result.blocked,
+            "violation": result.violation,
+        }
+        if result.findings:
+            step["findings"] = result.findings
+        if result.cached:
+            step["cached"] = True
+        entry["steps"].append(step)
+    entry.update(
+        {
+            "completed_at": response.completed_at.isoformat(),
+            "status": response.status,
+            "summary": response.summary,
+            "safety_score": response.safety_score,
+            "metrics": response.metrics,
+        }
+    )
+    payload = json.dumps(entry)
+    store.add(CompactRecord.from_entry(entry, payload))
+    return payload
+
+
+def _encoded_audit(audit: AuditLogger, task: Task, response: AgentResponse, policy: Dict[str, Any]) -> None:
+    record = audit.start_task(task, policy=policy)
+    for step in response.steps:
+        audit.log_step(step, record=record)
+    audit.end_task(response, record=record)
+
+
+def _dict_response(response: AgentResponse) -> bytes:
+    """The previous ``app.ingest`` path: the response as dicts, then ``json.dumps``."""
+    record = {
+        "task_id": response.task_id,
+        "status": response.status,
+        "summary": response.summary,
+        "safety_score": response.safety_score,
+        "metrics": response.metrics,
+        "completed_at": response.completed_at.isoformat(),
+        "steps": [
+            {**{f.name: getattr(step, f.name) for f in dataclasses.fields(step)}, "spans": []}
+            for step in response.steps
+        ],
+    }
+    return (json.dumps(record, default=str) + "\n").encode("utf-8")
+
+
+def _measure(fn: Callable[[Trace], Any], traces: Sequence[Trace], rounds: int) -> Tuple[float, float]:
+    """(tasks per second, mean peak KB allocated per task)."""
+    best = float("inf")
+    for _ in range(rounds):
+        began = time.perf_counter()
+        for trace in traces:
+            fn(trace)
+        best = min(best, time.perf_counter() - began)
+    tracemalloc.start()
+    peaks = 0
+    for trace in traces[:500]:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn(trace)
+        peaks += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return len(traces) / best, peaks / min(len(traces), 500) / 1024
+
+
+def _unslotted(cls: type) -> type:
+    """``cls`` as a plain (dict-backed) dataclass, for size comparison."""
+    spec = []
+    for f in dataclasses.fields(cls):
+        if f.default_factory is not dataclasses.MISSING:
+            spec.append((f.name, f.type, dataclasses.field(default_factory=f.default_factory)))
+        elif f.default is not dataclasses.MISSING:
+            spec.append((f.name, f.type, dataclasses.field(default=f.default)))
+        else:
+            spec.append((f.name, f.type))
+    return dataclasses.make_dataclass(f"Plain{cls.__name__}", spec)
+
+
+def _size(obj: Any) -> int:
+    return sys.getsizeof(obj) + (sys.getsizeof(vars(obj)) if hasattr(obj, "__dict__") else 0)
+
+
+def _write(path: str, payloads: List[str], log_format: str) -> float:
+    writer = AuditLogWriter(path, log_format=log_format, batch_size=1024)
+    began = time.perf_counter()
+    for payload in payloads:
+        writer.write(payload + "\n")
+    writer.close()
+    return time.perf_counter() - began
+
+
+def _read(path: str, log_format: str) -> Tuple[int, float]:
+    began = time.perf_counter()
+    with open(path, "rb") as handle:
+        lines = read_frames(handle) if log_format == "frames" else handle
+        count = sum(1 for line in lines if json.loads(line))
+    return count, time.perf_counter() - began
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    policy_manager = PolicyManager("policies/default.yaml")
+    orchestrator = build_orchestrator(policy_manager)
+    spec = WorkloadSpec(tasks=args.tasks, pii_rate=0.1, toxicity_rate=0.05)
+    traces = [(task, orchestrator.run_task(task)) for task in generate_tasks(spec)]
+    policy = policy_manager.snapshot().describe()
+    steps = sum(len(response.steps) for _task, response in traces)
+    print(f"{len(traces)} tasks, {steps} steps")
+
+    dict_store = AuditRecordStore(max_records=len(traces))
+    audit = AuditLogger(store=AuditRecordStore(max_records=len(traces)))
+    rows = [
+        ("audit: dict + json.dumps", lambda trace: _dict_audit(dict_store, *trace, policy)),
+        ("audit: direct encoder", lambda trace: _encoded_audit(audit, *trace, policy)),
+        ("response: dict + json.dumps", lambda trace: _dict_response(trace[1])),
+        ("response: direct encoder", lambda trace: encode_response(trace[1])),
+    ]
+    print(f"{'serialization':<30} {'tasks/s':>9} {'peak KB/task':>13}")
+    for name, fn in rows:
+        rate, peak_kb = _measure(fn, traces, args.rounds)
+        print(f"{name:<30} {rate:>9.0f} {peak_kb:>13.2f}")
+
+    task, response = next((task, response) for task, response in traces if response.steps)
+    print(f"{'object':<30} {'plain B':>9} {'slotted B':>10}")
+    for obj in (task, response.steps[0], response):
+        plain = _unslotted(type(obj))(**{f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)})
+        print(f"{type(obj).__name__:<30} {_size(plain):>9} {_size(obj):>10}")
+
+    payloads = [json.dumps(record) for record in audit.records]
+    megabytes = sum(map(len, payloads)) / 1e6
+    print(f"{'audit log format':<30} {'write MB/s':>10} {'read MB/s':>10} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for log_format in ("jsonl", "frames"):
+            path = os.path.join(workdir, f"audit.{log_format}")
+            write_seconds = _write(path, payloads, log_format)
+            count, read_seconds = _read(path, log_format)
+            assert count == len(payloads)
+            print(
+                f"{log_format:<30} {megabytes / write_seconds:>10.1f} {megabytes / read_seconds:>10.1f}"
+                f" {os.path.getsize(path) / 1e6:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark: tail latency under overload, unbounded FIFO pool vs. TaskScheduler.
+
+Tasks arrive open-loop at ``--load`` times the capacity of a fixed worker pool
+(each task runs a lookup tool that sleeps ``--latency-ms``). The FIFO baseline
+queues everything, so latency grows for as long as the overload lasts; the
+scheduler sheds what it cannot serve within the latency target and keeps the
+latency of admitted tasks bounded.
+
+Run from the repository root::
+
+    python -m scripts.bench_scheduler --workers 4 --latency-ms 10 --load 2 --seconds 3
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.agent.orchestrator import AgentOrchestrator
+from app.agent.scheduler import AdmissionRejected, TaskScheduler
+from app.agent.types import Task
+from app.evaluation.metrics import EvaluationTracker
+from app.evaluation.sketch import DDSketch
+from app.guardrails.manager import PolicyManager
+from app.guardrails.policy import GuardrailEngine
+from app.logging.audit import AuditLogger
+from app.tools.base import DataLookupTool
+from app.utils.config import EnvironmentConfig
+
+
+class SleepyLookupTool(DataLookupTool):
+    """``DataLookupTool`` with simulated backend latency."""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__([{"id": f"user-{i}", "name": f"customer {i}"} for i in range(100)])
+        self.latency = latency
+
+    def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return super().run(payload)
+
+
+def _orchestrator(latency: float) -> AgentOrchestrator:
+    return AgentOrchestrator(
+        tools={"data_lookup": SleepyLookupTool(latency)},
+        guardrail_engine=GuardrailEngine(PolicyManager("policies/default.yaml")),
+        audit_logger=AuditLogger(),
+        evaluation_tracker=EvaluationTracker(),
+        config=EnvironmentConfig(step_timeout_seconds=0, task_timeout_seconds=0),
+    )
+
+
+def _drive(tasks: List[Task], rate: float, submit: Callable[[Task], "Future[Any]"]) -> Tuple[DDSketch, int]:
+    """Submits ``tasks`` at ``rate`` per second; returns admitted latencies and rejections."""
+    done: List[float] = []
+    pending: List[Tuple[float, "Future[Any]"]] = []
+    rejected = 0
+    start = time.perf_counter()
+    for index, task in enumerate(tasks):
+        due = start + index / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            future = submit(task)
+        except AdmissionRejected:
+            rejected += 1
+            continue
+        arrived = time.perf_counter()
+        # list.append is atomic, so worker threads can record completions directly.
+        future.add_done_callback(
+            lambda f, arrived=arrived: f.exception() is None and done.append((time.perf_counter() - arrived) * 1000)
+        )
+        pending.append((arrived, future))
+    for _arrived, future in pending:
+        try:
+            future.result()
+        except AdmissionRejected:
+            rejected += 1
+    latencies = DDSketch()
+    for value in done:
+        latencies.add(value)
+    return latencies, rejected
+
+
+def _report(label: str, latencies: DDSketch, rejected: int, total: int) -> None:
+    print(
+        f"{label:>10} {latencies.count:>8} {rejected / total:>9.1%}"
+        f" {latencies.quantile(0.5):>8.0f} {latencies.quantile(0.99):>8.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--load", type=float, default=2.0, help="arrival rate as a multiple of capacity")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--latency-target-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    rate = args.load * args.workers / latency
+    tasks = [
+        Task(task_id=f"t{i}", description="lookup", role="analyst",
+             parameters={"tool": "data_lookup", "query": "customer 7", "limit": 5})
+        for i in range(int(rate * args.seconds))
+    ]
+    print(f"{len(tasks)} tasks at {rate:.0f}/s ({args.load:.1f}x capacity)")
+    print(f"{'':>10} {'served':>8} {'rejected':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    orchestrator = _orchestrator(latency)
+    _report("fifo", *_drive(tasks, rate, lambda task: pool.submit(orchestrator.run_task, task)), len(tasks))
+    pool.shutdown()
+
+    scheduler = TaskScheduler(
+        _orchestrator(latency), workers=args.workers, latency_target_ms=args.latency_target_ms
+    )
+    _report("scheduler", *_drive(tasks, rate, scheduler.submit), len(tasks))
+    scheduler.close()
+    print({key: value for key, value in scheduler.stats().items() if key != "rejected"})
+    print("rejected:", {reason: count for reason, count in scheduler.stats()["rejected"].items() if count})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark: compiled schema validators vs. the per-call list comprehension.
+
+Compares the previous presence-only check with compiled validators for the
+same presence-only schema and for a stricter typed, nested schema.
+
+Run from the repository root::
+
+    python -m scripts.bench_schema_validation
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable, Dict
+
+from app.tools.base import DataLookupTool
+from app.tools.schema import compile_schema
+
+PRESENCE = {"query": True, "limit": False, "offset": False, "tool": False, "filters": False}
+TYPED = {
+    "query": {"required": True, "type": "string", "max_length": 1024},
+    "limit": {"type": ("integer", "null")},
+    "offset": {"type": ("integer", "null")},
+    "tool": {"type": "string"},
+    "filters": {
+        "type": "object",
+        "fields": {"status": {"type": "string"}, "ids": {"type": "array", "max_length": 16, "items": {"type": "string"}}},
+    },
+}
+PAYLOAD: Dict[str, Any] = {
+    "tool": "data_lookup",
+    "query": "customer 42",
+    "limit": 20,
+    "offset": 0,
+    "filters": {"status": "active", "ids": ["user-1", "user-2", "user-3"]},
+}
+
+
+def _legacy(schema: Dict[str, bool]) -> Callable[[Dict[str, Any]], None]:
+    def validate(payload: Dict[str, Any]) -> None:
+        missing = [field for field, required in schema.items() if required and field not in payload]
+        if missing:
+            raise ValueError(missing)
+
+    return validate
+
+
+def _rate(fn: Callable[[Dict[str, Any]], None], min_seconds: float) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(10_000):
+            fn(PAYLOAD)
+        calls += 10_000
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    lookup_presence = {"query": True, "limit": False, "offset": False}
+    cases = [
+        ("legacy presence", _legacy(PRESENCE)),
+        ("compiled presence", compile_schema(PRESENCE).validate),
+        ("compiled typed+nested", compile_schema(TYPED).validate),
+        ("legacy data_lookup", _legacy(lookup_presence)),
+        ("compiled data_lookup", DataLookupTool().validate_input),
+    ]
+    baseline = 0.0
+    print(f"{'validator':>22} {'calls/s':>12} {'ns/call':>9} {'vs legacy':>10}")
+    for name, fn in cases:
+        rate = _rate(fn, args.min_seconds)
+        if name.startswith("legacy"):
+            baseline = rate
+        print(f"{name:>22} {rate:>12,.0f} {1e9 / rate:>9.0f} {rate / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
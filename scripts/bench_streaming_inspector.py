@@ -0,0 +1,86 @@
+"""Benchmark: streaming output inspection vs. whole-buffer redaction.
+
+Simulates a tool producing a large output in chunks. The whole-buffer path
+collects every chunk before redacting; the streaming path screens and
+releases chunks as they arrive. Reports throughput, time to first released
+byte and peak memory of each.
+
+Run from the repository root::
+
+    python -m scripts.bench_streaming_inspector --megabytes 8
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+import tracemalloc
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from app.guardrails.scanner import DEFAULT_PATTERNS, CompiledScanner
+from app.guardrails.stream import REPLACEMENT, StreamingInspector, redact
+
+
+def _chunks(total: int, chunk_size: int, seed: int = 11) -> Iterator[str]:
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + "     .,-:"
+    block = "".join(rng.choice(alphabet) for _ in range(chunk_size))
+    for produced in range(0, total, chunk_size):
+        # A sprinkling of matches, some straddling chunk boundaries.
+        cut = rng.randrange(chunk_size)
+        if produced // chunk_size % 20 == 0:
+            yield block[:cut] + " 123-4"
+            yield "5-6789 " + block[cut:]
+        else:
+            yield block
+
+
+def _whole_buffer(scanner: CompiledScanner, chunks: Iterator[str], sink: Callable[[str], None]) -> None:
+    text = "".join(chunks)
+    sink(redact(text, scanner.spans(text), REPLACEMENT))
+
+
+def _streaming(scanner: CompiledScanner, chunks: Iterator[str], sink: Callable[[str], None]) -> None:
+    for released in StreamingInspector(scanner).inspect(chunks):
+        sink(released)
+
+
+def _measure(run: Callable, scanner: CompiledScanner, total: int, chunk_size: int) -> Tuple[float, float, int, int]:
+    first: List[Optional[float]] = [None]
+    released = [0]
+
+    def sink(text: str) -> None:
+        if first[0] is None:
+            first[0] = time.perf_counter()
+        released[0] += len(text)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    run(scanner, _chunks(total, chunk_size), sink)
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, (first[0] or start) - start, peak, released[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=8)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[4096, 65536])
+    args = parser.parse_args()
+
+    scanner = CompiledScanner(DEFAULT_PATTERNS, DEFAULT_PATTERNS)
+    total = int(args.megabytes * 1024 * 1024)
+    print(f"{'mode':>10} {'chunk':>7} {'MB/s':>8} {'first byte ms':>14} {'peak MB':>8}")
+    for chunk_size in args.chunk_sizes:
+        for name, run in (("whole", _whole_buffer), ("streaming", _streaming)):
+            elapsed, first, peak, released = _measure(run, scanner, total, chunk_size)
+            print(
+                f"{name:>10} {chunk_size:>7} {released / elapsed / 1e6:>8.1f}"
+                f" {first * 1000:>14.2f} {peak / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
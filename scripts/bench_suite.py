@@ -0,0 +1,229 @@
+"""Benchmark suite for the agent pipeline with baseline regression checks.
+
+Runs each stage on the same synthetic workload (``scripts.workload``) and
+reports throughput (best of ``--rounds``), per-operation latency percentiles
+(p50/p95/p99, in microseconds) and memory: the tracemalloc peak while running
+a sample and the bytes still held per operation afterwards.
+
+* ``guardrails.scan`` - ``GuardrailEngine.scan`` on each task's payload text
+* ``guardrails.screen_tool_request`` - request screening of each tool input
+* ``tools.validate_input`` - ``DataLookupTool.validate_input``
+* ``audit.persist`` - ``AuditLogger`` start/step/end with a JSON-lines writer
+* ``evaluation.summarize`` - ``EvaluationTracker`` with a ``MetricsAggregator``
+* ``orchestrator.run_task`` - end to end
+
+Results are written as JSON with ``--output``. With ``--baseline`` every
+benchmark is compared with a stored result and the run exits with status 1
+when throughput drops by more than ``--threshold``. Only throughput is gated:
+it is the best of several rounds, while single-pass latency percentiles vary
+too much between runs on shared machines and are reported for context.
+Baselines are machine-specific; regenerate ``scripts/baselines/bench_suite.json``
+on the machine that runs the check::
+
+    python -m scripts.bench_suite --output scripts/baselines/bench_suite.json
+    python -m scripts.bench_suite --baseline scripts/baselines/bench_suite.json
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.agent.orchestrator import AgentOrchestrator
+from app.agent.types import AgentResponse, StepResult, Task
+from app.evaluation.aggregator import MetricsAggregator
+from app.evaluation.metrics import EvaluationTracker
+from app.evaluation.sketch import DDSketch
+from app.guardrails.manager import PolicyManager
+from app.guardrails.policy import GuardrailEngine
+from app.logging.audit import AuditLogger
+from app.logging.writer import AuditLogWriter
+from app.tools.base import DataLookupTool
+from app.utils.config import EnvironmentConfig
+from scripts.workload import WorkloadSpec, generate_tasks, tool_inputs
+
+Bench = Callable[[Any], object]
+# Operations traced for the memory columns (tracemalloc slows them down).
+_TRACED_OPS = 500
+
+
+def measure(
+    fn: Bench, items: Sequence[Any], rounds: int = 3, min_round_seconds: float = 0.2, warmup: int = 100
+) -> Dict[str, float]:
+    """Throughput of the fastest round, then per-operation latencies over one pass.
+
+    Throughput rounds run untimed loops over ``items`` (repeated until
+    ``min_round_seconds``) so clock overhead does not count against
+    microsecond-scale operations.
+    """
+    for item in items[:warmup]:
+        fn(item)
+    clock = time.perf_counter_ns
+    ops_per_sec = 0.0
+    for _ in range(rounds):
+        ops = 0
+        began = clock()
+        while True:
+            for item in items:
+                fn(item)
+            ops += len(items)
+            elapsed = (clock() - began) / 1e9
+            if elapsed >= min_round_seconds:
+                break
+        ops_per_sec = max(ops_per_sec, ops / elapsed)
+
+    latencies = DDSketch()
+    for item in items:
+        start = clock()
+        fn(item)
+        latencies.add((clock() - start) / 1000)
+
+    sample = items[:_TRACED_OPS]
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for item in sample:
+        fn(item)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ops_per_sec": round(ops_per_sec, 1),
+        "p50_us": round(latencies.quantile(0.5), 2),
+        "p95_us": round(latencies.quantile(0.95), 2),
+        "p99_us": round(latencies.quantile(0.99), 2),
+        "peak_kb": round((peak - before) / 1024, 1),
+        "retained_bytes_per_op": round((after - before) / len(sample), 1),
+    }
+
+
+def _orchestrator(audit_logger: Optional[AuditLogger] = None) -> AgentOrchestrator:
+    return AgentOrchestrator(
+        tools={"data_lookup": DataLookupTool()},
+        guardrail_engine=GuardrailEngine(PolicyManager("policies/default.yaml")),
+        audit_logger=audit_logger or AuditLogger(),
+        evaluation_tracker=EvaluationTracker(aggregator=MetricsAggregator()),
+        config=EnvironmentConfig(step_timeout_seconds=0, task_timeout_seconds=0),
+    )
+
+
+def build_benchmarks(
+    spec: WorkloadSpec, workdir: str, cleanup: contextlib.ExitStack
+) -> Dict[str, "tuple[Bench, List[Any]]"]:
+    """Benchmarks by name; resources they hold are released by ``cleanup``."""
+    tasks = list(generate_tasks(spec))
+    inputs = list(tool_inputs(spec))
+    engine = GuardrailEngine(PolicyManager("policies/default.yaml"))
+    snapshot = engine.policy_manager.snapshot()
+    tool = DataLookupTool()
+
+    # Realistic traces for the audit and evaluation stages.
+    traced = _orchestrator()
+    responses = [traced.run_task(task) for task in tasks]
+    traces = [(task, response.steps) for task, response in zip(tasks, responses)]
+
+    audit = AuditLogger(writer=AuditLogWriter(os.path.join(workdir, "audit.jsonl")))
+    # Stop the writer thread before the directory it writes to is removed.
+    cleanup.callback(audit.close)
+
+    def persist(trace: "tuple[Task, List[StepResult]]") -> None:
+        task, steps = trace
+        record = audit.start_task(task, policy=snapshot.describe())
+        for step in steps:
+            audit.log_step(step, record=record)
+        audit.end_task(
+            AgentResponse(task_id=task.task_id, status="completed", summary="", steps=steps, metrics={}, safety_score=1.0),
+            record=record,
+        )
+
+    tracker = EvaluationTracker(aggregator=MetricsAggregator())
+    orchestrator = _orchestrator()
+    return {
+        "guardrails.scan": (lambda payload: engine.scan(payload["notes"], snapshot), inputs),
+        "guardrails.screen_tool_request": (lambda payload: engine.screen_tool_request(payload, snapshot), inputs),
+        "tools.validate_input": (tool.validate_input, inputs),
+        "audit.persist": (persist, traces),
+        "evaluation.summarize": (lambda trace: tracker.summarize(*trace), traces),
+        "orchestrator.run_task": (orchestrator.run_task, tasks),
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {result['ops_per_sec']:.0f}/s vs baseline {base['ops_per_sec']:.0f}/s")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    defaults = WorkloadSpec(tasks=5_000)
+    parser.add_argument("--tasks", type=int, default=defaults.tasks)
+    parser.add_argument("--payload-chars", type=int, default=defaults.payload_chars)
+    parser.add_argument("--pii-rate", type=float, default=0.02)
+    parser.add_argument("--toxicity-rate", type=float, default=0.01)
+    parser.add_argument("--key-skew", type=float, default=defaults.key_skew)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="Benchmark names (or prefixes) to run")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare with results stored by --output")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    spec = WorkloadSpec(
+        tasks=args.tasks, payload_chars=args.payload_chars, pii_rate=args.pii_rate,
+        toxicity_rate=args.toxicity_rate, key_skew=args.key_skew,
+    )
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'benchmark':<32} {'ops/s':>10} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'peak KB':>8} {'B/op':>8}")
+    with tempfile.TemporaryDirectory() as workdir, contextlib.ExitStack() as cleanup:
+        for name, (fn, items) in build_benchmarks(spec, workdir, cleanup).items():
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            result = results[name] = measure(fn, items, rounds=args.rounds)
+            print(
+                f"{name:<32} {result['ops_per_sec']:>10.0f} {result['p50_us']:>9.1f} {result['p95_us']:>9.1f}"
+                f" {result['p99_us']:>9.1f} {result['peak_kb']:>8.0f} {result['retained_bytes_per_op']:>8.0f}"
+            )
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "workload": asdict(spec),
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+            handle.write("\n")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            stored = json.load(handle)
+        if stored["meta"]["workload"] != report["meta"]["workload"]:
+            print("warning: baseline was recorded with a different workload", file=sys.stderr)
+        regressions = compare(results, stored["results"], args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: tool result cache and in-flight coalescing under a concurrent batch.
+
+A slow cacheable lookup tool serves a batch of tasks drawing queries from a
+small, skewed set. Reports tool executions and wall time with the cache off
+and on.
+
+Run from the repository root::
+
+    python -m scripts.bench_tool_cache --tasks 2000 --queries 50 --workers 32
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.agent.orchestrator import AgentOrchestrator
+from app.agent.types import Task
+from app.evaluation.metrics import EvaluationTracker
+from app.guardrails.manager import PolicyManager
+from app.guardrails.policy import GuardrailEngine
+from app.logging.audit import AuditLogger
+from app.tools.base import DataLookupTool
+from app.tools.cache import ToolResultCache
+from app.utils.config import EnvironmentConfig
+
+
+class SlowLookupTool(DataLookupTool):
+    """``DataLookupTool`` with simulated backend latency and an execution counter."""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__([{"id": f"user-{i}", "name": f"customer {i}"} for i in range(5_000)])
+        self.latency = latency
+        self.executions = 0
+        self._lock = threading.Lock()
+
+    def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.executions += 1
+        time.sleep(self.latency)
+        return super().run(payload)
+
+
+def _run(tasks: List[Task], latency: float, workers: int, cache: Optional[ToolResultCache]) -> None:
+    tool = SlowLookupTool(latency)
+    orchestrator = AgentOrchestrator(
+        tools={"data_lookup": tool},
+        guardrail_engine=GuardrailEngine(PolicyManager("policies/default.yaml")),
+        audit_logger=AuditLogger(),
+        evaluation_tracker=EvaluationTracker(),
+        config=EnvironmentConfig(step_timeout_seconds=0, task_timeout_seconds=0),
+        tool_cache=cache,
+    )
+    start = time.perf_counter()
+    responses = orchestrator.run_batch(tasks, max_workers=workers)
+    elapsed = time.perf_counter() - start
+    cached = sum(step.cached for response in responses for step in response.steps)
+    label = "on" if cache is not None else "off"
+    print(f"{label:>6} {tool.executions:>11} {cached:>13} {elapsed:>9.2f} {len(tasks) / elapsed:>9.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = random.Random(23)
+    weights = [1 / rank for rank in range(1, args.queries + 1)]
+    queries = rng.choices(range(args.queries), weights=weights, k=args.tasks)
+    tasks = [
+        Task(task_id=f"t{i}", description="lookup", role="analyst",
+             parameters={"tool": "data_lookup", "query": f"customer {q}", "limit": 20})
+        for i, q in enumerate(queries)
+    ]
+    print(f"{'cache':>6} {'executions':>11} {'cached steps':>13} {'seconds':>9} {'tasks/s':>9}")
+    _run(tasks, args.latency_ms / 1000, args.workers, None)
+    _run(tasks, args.latency_ms / 1000, args.workers, ToolResultCache())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark: guardrail verdict cache on a skewed (Zipfian) workload.
+
+Run from the repository root::
+
+    python -m scripts.bench_verdict_cache --distinct 50000 --requests 300000
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import itertools
+import random
+import string
+import time
+from typing import List, Optional
+
+from app.guardrails.cache import VerdictCache
+from app.guardrails.manager import PolicyManager
+from app.guardrails.policy import GuardrailEngine
+
+
+def _payloads(count: int, rng: random.Random) -> List[str]:
+    payloads = []
+    for i in range(count):
+        size = rng.choice([40, 200, 2_000, 20_000])
+        body = "".join(rng.choice(string.ascii_letters + " ") for _ in range(64))
+        text = (body * (size // 64 + 1))[:size] + f" #{i}"
+        if i % 50 == 0:
+            text += " ssn 123-45-6789"
+        payloads.append(text)
+    return payloads
+
+
+def _zipf_stream(count: int, distinct: int, skew: float, rng: random.Random) -> List[int]:
+    weights = [1 / (rank ** skew) for rank in range(1, distinct + 1)]
+    cumulative = list(itertools.accumulate(weights))
+    total = cumulative[-1]
+    return [bisect.bisect_left(cumulative, rng.random() * total) for _ in range(count)]
+
+
+def _run(engine: GuardrailEngine, payloads: List[str], stream: List[int]) -> float:
+    start = time.perf_counter()
+    for index in stream:
+        engine.scan(payloads[index])
+    return len(stream) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--distinct", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=300_000)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--cache-mb", type=float, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    rng = random.Random(17)
+    payloads = _payloads(args.distinct, rng)
+    stream = _zipf_stream(args.requests, args.distinct, args.skew, rng)
+    manager = PolicyManager("policies/default.yaml")
+
+    print(f"{'cache':>10} {'scans/s':>12} {'hit rate':>9} {'entries':>9} {'speedup':>8}")
+    baseline = _run(GuardrailEngine(manager), payloads, stream)
+    print(f"{'off':>10} {baseline:>12.0f} {'-':>9} {'-':>9} {'1.00x':>8}")
+    for megabytes in args.cache_mb:
+        cache: Optional[VerdictCache] = VerdictCache(max_bytes=int(megabytes * 1024 * 1024))
+        rate = _run(GuardrailEngine(manager, verdict_cache=cache), payloads, stream)
+        stats = cache.stats()
+        print(f"{megabytes:>8.0f}MB {rate:>12.0f} {stats['hit_rate']:>9.1%} {stats['entries']:>9} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Synthetic task workloads for benchmarks and load tests.
+
+``WorkloadSpec`` controls the size of each task's free-text payload, how often
+it contains PII or toxic language (which the default policy blocks), the mix
+of requested tools and how skewed lookup keys are (Zipf exponent ``key_skew``
+over ``keys`` distinct queries; 0 is uniform). Generation is seeded and
+deterministic.
+
+Writing a feed for ``python -m app.ingest``::
+
+    python -m scripts.workload --tasks 10000 --pii-rate 0.05 > tasks.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import string
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator
+
+from app.agent.types import Task
+
+# Strings that trip the default policy's ``pii`` and ``tone`` checks.
+PII_SAMPLES = ("123-45-6789", "987-65-4321", "555-12-3456")
+TOXIC_SAMPLES = ("shutup", "idiot")
+NO_TOOL = "none"
+_ALPHABET = string.ascii_lowercase + "      .,"
+
+
+@dataclass
+class WorkloadSpec:
+    tasks: int = 1_000
+    payload_chars: int = 256
+    pii_rate: float = 0.0
+    toxicity_rate: float = 0.0
+    # Requested tool -> weight; ``NO_TOOL`` tasks finish without a tool call.
+    tool_mix: Dict[str, float] = field(default_factory=lambda: {"data_lookup": 0.8, NO_TOOL: 0.2})
+    keys: int = 1_000
+    key_skew: float = 1.1
+    role: str = "analyst"
+    seed: int = 7
+
+
+class _Text:
+    """Cheap filler text: slices of one pre-generated random block."""
+
+    def __init__(self, rng: random.Random, size: int = 1 << 16) -> None:
+        self.rng = rng
+        self.block = "".join(rng.choice(_ALPHABET) for _ in range(size))
+
+    def __call__(self, chars: int) -> str:
+        if chars <= 0:
+            return ""
+        repeats = chars // len(self.block) + 1
+        start = self.rng.randrange(len(self.block))
+        return (self.block[start:] + self.block * repeats)[:chars]
+
+
+def tool_inputs(spec: WorkloadSpec) -> Iterator[Dict[str, Any]]:
+    """``data_lookup`` inputs: a skewed query, a page size and a ``notes`` payload."""
+    rng = random.Random(spec.seed)
+    text = _Text(rng)
+    weights = [1 / rank**spec.key_skew for rank in range(1, spec.keys + 1)]
+    keys = rng.choices(range(spec.keys), weights=weights, k=spec.tasks)
+    for key in keys:
+        notes = text(spec.payload_chars)
+        roll = rng.random()
+        if roll < spec.pii_rate:
+            notes = _inject(notes, rng.choice(PII_SAMPLES), rng)
+        elif roll < spec.pii_rate + spec.toxicity_rate:
+            notes = _inject(notes, rng.choice(TOXIC_SAMPLES), rng)
+        yield {"query": f"customer {key}", "limit": 20, "notes": notes}
+
+
+def _inject(text: str, needle: str, rng: random.Random) -> str:
+    at = rng.randrange(len(text) + 1)
+    return f"{text[:at]} {needle} {text[at:]}"
+
+
+def generate_tasks(spec: WorkloadSpec) -> Iterator[Task]:
+    rng = random.Random(spec.seed + 1)
+    tools = list(spec.tool_mix)
+    choices = rng.choices(tools, weights=[spec.tool_mix[tool] for tool in tools], k=spec.tasks)
+    for index, (tool, parameters) in enumerate(zip(choices, tool_inputs(spec))):
+        if tool == NO_TOOL:
+            yield Task(task_id=f"w{index}", description=f"summarize {parameters['query']}", role=spec.role)
+        else:
+            yield Task(
+                task_id=f"w{index}",
+                description=f"lookup {parameters['query']}",
+                role=spec.role,
+                parameters={"tool": tool, **parameters},
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic JSON-lines task feed to stdout.")
+    defaults = WorkloadSpec()
+    parser.add_argument("--tasks", type=int, default=defaults.tasks)
+    parser.add_argument("--payload-chars", type=int, default=defaults.payload_chars)
+    parser.add_argument("--pii-rate", type=float, default=defaults.pii_rate)
+    parser.add_argument("--toxicity-rate", type=float, default=defaults.toxicity_rate)
+    parser.add_argument("--tool-mix", default="data_lookup=0.8,none=0.2", help="tool=weight pairs")
+    parser.add_argument("--keys", type=int, default=defaults.keys)
+    parser.add_argument("--key-skew", type=float, default=defaults.key_skew)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+    mix = {name: float(weight) for name, _, weight in (item.partition("=") for item in args.tool_mix.split(","))}
+    spec = WorkloadSpec(
+        tasks=args.tasks, payload_chars=args.payload_chars, pii_rate=args.pii_rate,
+        toxicity_rate=args.toxicity_rate, tool_mix=mix, keys=args.keys, key_skew=args.key_skew,
+        seed=args.seed,
+    )
+    out = sys.stdout
+    for task in generate_tasks(spec):
+        record: Dict[str, Any] = {key: value for key, value in asdict(task).items() if key != "created_at"}
+        out.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
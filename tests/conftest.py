@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.agent.orchestrator import AgentOrchestrator
+from app.guardrails.manager import PolicyManager
+from app.main import build_orchestrator
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_POLICY = ROOT / "policies" / "default.yaml"
+
+
+@pytest.fixture
+def orchestrator() -> AgentOrchestrator:
+    agent = build_orchestrator(PolicyManager(str(DEFAULT_POLICY)))
+    yield agent
+    agent.audit_logger.close()
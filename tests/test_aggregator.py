@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from app.agent.types import StepResult, Task
+from app.evaluation.aggregator import MetricsAggregator, violation_code
+
+
+def _step(violation, findings=()):
+    return StepResult(1, "r", "data_lookup", {}, None, 1.0, blocked=True, violation=violation, findings=list(findings))
+
+
+def test_violations_are_keyed_by_check():
+    aggregator = MetricsAggregator()
+    task = Task("t", "d", "analyst")
+    aggregator.observe(task, [_step("Policy violation: pii detected", [{"check": "pii", "path": "$", "in": "input"}])])
+    aggregator.observe(task, [_step("pii (redacted)")])
+    aggregator.observe(task, [_step("step_timeout")])
+    assert sorted(aggregator.summary()["violation"]) == ["pii", "step_timeout"]
+    assert aggregator.summary()["violation"]["pii"]["count"] == 2
+
+
+def test_violation_code():
+    assert violation_code("tone violation") == "tone"
+    assert violation_code("pii (redaction required)") == "pii"
+    assert violation_code("admission:queue_full") == "admission:queue_full"
+
+
+def test_dimension_cardinality_is_bounded():
+    aggregator = MetricsAggregator(max_keys=3)
+    for index in range(50):
+        aggregator.observe(Task("t", "d", f"role-{index}"), [])
+    roles = aggregator.summary()["role"]
+    assert len(roles) == 4
+    assert roles["other"]["count"] == 47
+    merged = MetricsAggregator(max_keys=3)
+    merged.merge(aggregator.snapshot())
+    assert merged.summary()["role"] == roles
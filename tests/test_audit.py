@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from app.agent.types import AgentResponse, Task
+from app.logging.audit import AuditLogger
+
+
+def _response(task_id: str, status: str) -> AgentResponse:
+    return AgentResponse(task_id=task_id, status=status, summary="", steps=[], metrics={}, safety_score=1.0)
+
+
+def test_latest_record_is_the_completed_one_after_end_task():
+    audit = AuditLogger()
+    audit.start_task(Task("first", "d", "analyst"))
+    assert audit.latest_record()["task_id"] == "first"
+    assert "status" not in audit.latest_record()
+
+    audit.end_task(_response("first", "completed"))
+    latest = audit.latest_record()
+    assert latest["task_id"] == "first"
+    assert latest["status"] == "completed"
+
+    audit.log_rejection(Task("second", "d", "analyst"), "queue_full", "full")
+    assert audit.latest_record()["status"] == "rejected"
+    audit.close()
+
+
+def test_latest_record_follows_completion_order():
+    audit = AuditLogger()
+    first = audit.start_task(Task("first", "d", "analyst"))
+    second = audit.start_task(Task("second", "d", "analyst"))
+    audit.end_task(_response("second", "completed"), record=second)
+    audit.end_task(_response("first", "completed"), record=first)
+
+    assert audit.latest_record()["task_id"] == "first"
+    audit.close()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict
+
+from app.backtest import BacktestCheckpoint, backtest, backtest_range, plan_ranges
+from app.guardrails.manager import PolicyManager
+from app.guardrails.policy import GuardrailEngine
+from tests.conftest import DEFAULT_POLICY
+
+POLICY = str(DEFAULT_POLICY)
+
+
+def _write_log(path, count=60):
+    with open(path, "w", encoding="utf-8") as handle:
+        for index in range(count):
+            query = f"ssn 123-45-{index:04d}" if index % 3 == 0 else f"ticker {index}"
+            step = {
+                "step": 1, "rationale": "lookup", "tool": "data_lookup", "tool_input": {"query": query},
+                "tool_output": {"rows": []}, "latency_ms": 1.0, "blocked": False, "violation": None,
+            }
+            record = {
+                "task_id": f"t{index}", "role": "analyst", "description": "look something up", "parameters": {},
+                "started_at": "2026-10-17T09:00:00", "steps": [step], "status": "completed",
+            }
+            handle.write(json.dumps(record) + "\n")
+
+
+def _lines(path):
+    with open(path, "r", encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+def test_parallel_ranges_merge_in_log_order(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    _write_log(log)
+    stats = backtest(str(log), POLICY, str(tmp_path / "diff.jsonl"), processes=2, chunk_bytes=2048)
+
+    diffs = _lines(tmp_path / "diff.jsonl")
+    assert len(plan_ranges(str(log), 2048)) > 2
+    assert [diff["task_id"] for diff in diffs] == [f"t{index}" for index in range(0, 60, 3)]
+    assert {diff["change"] for diff in diffs} == {"blocked"}
+    assert stats.records == 60 and stats.diffs == 20
+    assert not list(tmp_path.glob("diff.jsonl.part*"))
+
+
+def test_resume_continues_without_losing_or_repeating(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    _write_log(log)
+    reference = backtest(str(log), POLICY, str(tmp_path / "reference.jsonl"), chunk_bytes=2048)
+
+    # Interrupt a run: range 0 merged, range 1 half evaluated, output with a torn tail.
+    output = tmp_path / "diff.jsonl"
+    ranges = plan_ranges(str(log), 2048)
+    engine = GuardrailEngine(PolicyManager(POLICY))
+    first = backtest_range(*ranges[0], str(tmp_path / "part0.jsonl"), engine=engine)
+    merged = (tmp_path / "part0.jsonl").read_bytes()
+    output.write_bytes(merged + b'{"segment": "torn')
+    BacktestCheckpoint(
+        policy=POLICY, ranges=ranges, merged=1, output_offset=len(merged), stats=asdict(first)
+    ).save(f"{output}.ckpt")
+    segment, start, end = ranges[1]
+    with open(segment, "rb") as handle:
+        handle.seek(start)
+        middle = start + sum(len(handle.readline()) for _ in range(3))
+    backtest_range(segment, start, middle, f"{output}.part1", checkpoint_every=1, engine=engine)
+    with open(f"{output}.part1", "ab") as part:
+        part.write(b'{"torn": ')
+
+    resumed = backtest(str(log), POLICY, str(output), chunk_bytes=2048, resume=True)
+
+    assert output.read_bytes() == (tmp_path / "reference.jsonl").read_bytes()
+    assert (resumed.records, resumed.diffs, resumed.violations) == (
+        reference.records, reference.diffs, reference.violations
+    )
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.tools.columnar import MappedDataset, build_columnar
+
+
+def _rows(count):
+    return [{"id": f"user-{i}", "name": f"Name {i}", "status": "active"} for i in range(count)]
+
+
+def test_concurrent_builds_leave_an_intact_file(tmp_path):
+    source = tmp_path / "data.jsonl"
+    source.write_text("".join(json.dumps(row) + "\n" for row in _rows(5000)))
+    target = str(tmp_path / "data.jsonl.cols")
+    with ProcessPoolExecutor(4) as pool:
+        list(pool.map(build_columnar, [str(source)] * 8, [target] * 8))
+    dataset = MappedDataset(target)
+    assert len(dataset) == 5000
+    assert dataset[4999]["id"] == "user-4999"
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import random
+import re
+from typing import List, Pattern, Set, Tuple
+
+from app.guardrails.dictionary import DictionaryMatcher, DictionarySpec
+
+# A small alphabet so random terms and texts overlap often.
+LETTERS = "abAB"
+SEPARATORS = " -."
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(LETTERS) for _ in range(rng.randint(1, 3)))
+
+
+def _term(rng: random.Random, whole_words: bool) -> str:
+    if not whole_words:
+        return "".join(rng.choice(LETTERS + SEPARATORS) for _ in range(rng.randint(1, 4))).strip() or "a"
+    return rng.choice(SEPARATORS).join(_word(rng) for _ in range(rng.randint(1, 2)))
+
+
+def _oracle(term: str, case_sensitive: bool, whole_words: bool) -> Pattern[str]:
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if whole_words:
+        body = r"\W+".join(re.escape(word) for word in re.findall(r"\w+", term))
+        return re.compile(rf"(?<!\w)(?=({body})(?!\w))", flags)
+    return re.compile(f"(?=({re.escape(term)}))", flags)
+
+
+def _expected(text: str, pos: int, oracles: List[Tuple[str, Pattern[str]]]) -> List[Tuple[int, int, str]]:
+    found: Set[Tuple[int, int, str]] = set()
+    for check, pattern in oracles:
+        for match in pattern.finditer(text):
+            if match.start(1) >= pos:
+                found.add((match.start(1), match.end(1), check))
+    return sorted(found)
+
+
+def test_matches_agree_with_a_regex_oracle():
+    rng = random.Random(21)
+    cases = 0
+    for case_sensitive in (False, True):
+        for whole_words in (False, True):
+            for _ in range(25):
+                specs = [
+                    DictionarySpec(
+                        name=f"list{index}",
+                        terms=tuple(_term(rng, whole_words) for _ in range(rng.randint(1, 6))),
+                        case_sensitive=case_sensitive,
+                        whole_words=whole_words,
+                    )
+                    for index in range(rng.randint(1, 3))
+                ]
+                matcher = DictionaryMatcher.build(specs)
+                oracles = [
+                    (spec.name, _oracle(term, case_sensitive, whole_words))
+                    for spec in specs
+                    for term in set(spec.terms)
+                ]
+                for _ in range(30):
+                    text = "".join(rng.choice(LETTERS + SEPARATORS) for _ in range(rng.randint(0, 24)))
+                    pos = rng.randint(0, len(text))
+                    expected = _expected(text, pos, oracles)
+                    assert matcher.matches(text, pos) == expected, (specs, text, pos)
+                    assert matcher.found_checks(text) == {check for _s, _e, check in _expected(text, 0, oracles)}
+                    cases += 1
+    assert cases == 3000
+
+
+def test_serialized_matcher_matches_the_same():
+    spec = DictionarySpec(name="tickers", terms=("acme corp", "Globex"), case_sensitive=False, whole_words=True)
+    matcher = DictionaryMatcher.build([spec], digest="d")
+    restored = DictionaryMatcher.from_bytes(matcher.to_bytes(), "d")
+    text = "Sell ACME  Corp; buy globex, not globexes."
+    assert restored.matches(text) == matcher.matches(text) == [(5, 15, "tickers"), (21, 27, "tickers")]
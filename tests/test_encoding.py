@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+
+import pytest
+
+from app.agent.types import AgentResponse, Span, StepResult, Task
+from app.logging.encoding import (
+    encode_audit_record,
+    encode_audit_step,
+    encode_response,
+    encode_value,
+    utc_isoformat,
+)
+
+VALUES = [
+    None, True, False, 0, -7, 2**70, 0.1, -0.0, 1e300, 1.5e-7, float("nan"), float("inf"), float("-inf"),
+    "", "plain", "quote \" backslash \\ tab \t newline \n", "naïve café", "日本語", "emoji \U0001F600", "\x00\x1f",
+    [], {}, [1, [2, [3.25, None]]],
+    {"nested": {"list": [True, "ü", {"deep": -1.0}], "empty": {}}, "n": 3, "ß": "€"},
+]
+
+
+@pytest.mark.parametrize("value", VALUES, ids=repr)
+def test_encode_value_matches_json_dumps(value):
+    assert encode_value(value) == json.dumps(value)
+
+
+def _step(**overrides) -> StepResult:
+    fields = dict(
+        step=1,
+        rationale="Look up «Ünïcode» ticker",
+        tool_used="data_lookup",
+        tool_input={"query": "açaí", "limit": 3, "weights": [0.5, 1e-9]},
+        tool_output={"rows": [{"price": 101.25, "name": "東京"}], "total": None},
+        latency_ms=12.5,
+        blocked=True,
+        violation="pii",
+        findings=[{"check": "pii", "path": "rows[0].name", "in": "output"}],
+        cached=True,
+    )
+    fields.update(overrides)
+    return StepResult(**fields)
+
+
+@pytest.mark.parametrize("step", [_step(), _step(findings=[], cached=False, violation=None, tool_output=None)])
+def test_audit_step_matches_json_dumps(step):
+    expected = {
+        "step": step.step,
+        "rationale": step.rationale,
+        "tool": step.tool_used,
+        "tool_input": step.tool_input,
+        "tool_output": step.tool_output,
+        "latency_ms": step.latency_ms,
+        "blocked": step.blocked,
+        "violation": step.violation,
+    }
+    if step.findings:
+        expected["findings"] = step.findings
+    if step.cached:
+        expected["cached"] = True
+    assert encode_audit_step(step) == json.dumps(expected)
+
+
+def test_audit_record_matches_json_dumps():
+    task = Task("t-1", "Résumé of «holdings»", "analyst", parameters={"limit": 5, "x": [1.0, "é"]}, tenant="acme")
+    step = _step()
+    response = AgentResponse(
+        task_id="t-1", status="completed", summary="Fertig ✓", steps=[step], metrics={"p99": 0.25}, safety_score=0.5,
+        completed_at=datetime(2026, 10, 17, 9, 30, 1, 250),
+    )
+    text = encode_audit_record(task, "2026-10-17T09:30:00", [encode_audit_step(step)], {"name": "p"}, response)
+    expected = {
+        "task_id": "t-1",
+        "role": "analyst",
+        "description": task.description,
+        "parameters": task.parameters,
+        "started_at": "2026-10-17T09:30:00",
+        "steps": [json.loads(encode_audit_step(step))],
+        "tenant": "acme",
+        "policy": {"name": "p"},
+        "completed_at": response.completed_at.isoformat(),
+        "status": "completed",
+        "summary": "Fertig ✓",
+        "safety_score": 0.5,
+        "metrics": {"p99": 0.25},
+    }
+    assert text == json.dumps(expected)
+
+
+def test_response_matches_json_dumps_with_str_fallback():
+    when = datetime(2026, 10, 17, 9, 30)
+    step = _step(tool_output={"as_of": when, "prices": [1.5, float("inf")]})
+    step.spans = [Span("tool", 10, 20, 1, {"tool": "data_lookup", "at": when})]
+    response = AgentResponse(
+        task_id="t-2", status="blocked", summary="ü", steps=[step], metrics={"n": 1}, safety_score=0.0,
+        completed_at=when,
+    )
+    expected = {
+        "task_id": "t-2",
+        "status": "blocked",
+        "summary": "ü",
+        "safety_score": 0.0,
+        "metrics": {"n": 1},
+        "completed_at": when.isoformat(),
+        "steps": [
+            {
+                "step": step.step, "rationale": step.rationale, "tool_used": step.tool_used,
+                "tool_input": step.tool_input, "tool_output": step.tool_output, "latency_ms": step.latency_ms,
+                "blocked": step.blocked, "violation": step.violation, "findings": step.findings,
+                "cached": step.cached,
+                "spans": [
+                    {
+                        "name": "tool", "start_ns": 10, "end_ns": 20, "step": 1,
+                        "attributes": {"tool": "data_lookup", "at": when},
+                    }
+                ],
+            }
+        ],
+    }
+    assert encode_response(response) == (json.dumps(expected, default=str) + "\n").encode("ascii")
+
+
+@pytest.mark.parametrize("time_ns", [0, 1_700_000_000_000_000_000, 1_700_000_000_123_456_789, 1_700_000_001_000_999])
+def test_utc_isoformat_matches_datetime(time_ns):
+    assert utc_isoformat(time_ns) == datetime.utcfromtimestamp(time_ns // 1000 / 1e6).isoformat()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import io
+import json
+
+from app.logging.frames import MAGIC, complete_length, encode_frame, iter_records, read_frames
+from app.logging.writer import AuditLogWriter, list_segments
+
+
+def _records(count, start=0):
+    # Alternate short records with long ones, which are stored compressed.
+    return [{"task_id": f"t{i}", "text": "x" * (2000 if i % 2 else 10)} for i in range(start, start + count)]
+
+
+def _write(path, records, **kwargs):
+    writer = AuditLogWriter(str(path), log_format="frames", **kwargs)
+    for record in records:
+        writer.write(json.dumps(record) + "\n")
+    writer.close()
+
+
+def test_round_trip_with_rotation_and_gzip(tmp_path):
+    path = tmp_path / "audit.frames"
+    records = _records(300)
+    _write(path, records, batch_size=16, max_bytes=4096, compress=True)
+    segments = list_segments(str(path))
+    assert len(segments) > 1
+    assert [record for segment in segments for record in iter_records(segment)] == records
+
+
+def test_restart_after_torn_tail_keeps_later_records(tmp_path):
+    path = tmp_path / "audit.frames"
+    _write(path, _records(20))
+    with open(path, "r+b") as handle:
+        handle.truncate(handle.seek(0, 2) - 10)
+    _write(path, _records(20, start=20))
+    ids = [record["task_id"] for record in iter_records(str(path))]
+    assert ids == [f"t{i}" for i in range(19)] + [f"t{i}" for i in range(20, 40)]
+    with open(path, "rb") as handle:
+        assert complete_length(handle) == handle.seek(0, 2)
+
+
+def test_reader_skips_damaged_frames():
+    frames = [encode_frame(json.dumps(record).encode()) for record in _records(6)]
+    damaged = bytearray(frames[2])
+    damaged[-1] ^= 0xFF
+    data = MAGIC + b"".join(frames[:2]) + bytes(damaged) + b"".join(frames[3:]) + frames[5][:7]
+    ids = [json.loads(payload)["task_id"] for payload in read_frames(io.BytesIO(data))]
+    assert ids == ["t0", "t1", "t3", "t4", "t5"]
+
+
+def test_complete_length_of_partial_magic():
+    assert complete_length(io.BytesIO(MAGIC[:3])) == 0
+    assert complete_length(io.BytesIO(MAGIC)) == len(MAGIC)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+from app.tools.base import DataLookupTool
+from app.tools.index import TrigramIndex
+
+ALPHABET = "abAB-1 ÄäßẞİıΣσς東"
+
+
+def _linear(rows: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """The lookup before indexing: a substring scan of every row."""
+    query = query.lower()
+    return [row for row in rows if query in row.get("name", "").lower() or query in row.get("id", "").lower()]
+
+
+def _word(rng: random.Random, longest: int) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, longest)))
+
+
+def test_index_matches_a_linear_scan():
+    rng = random.Random(9)
+    rows = [{"id": f"user-{_word(rng, 3)}", "name": _word(rng, 8)} for _ in range(300)]
+    del rows[7]["name"]
+    index = TrigramIndex(rows, ("name", "id"))
+    tool = DataLookupTool(rows)
+    columnar = DataLookupTool(rows, columnar=True)
+    needles = [_word(rng, 5) for _ in range(400)] + ["", "a", "Σ", "ss", "user-", "\x00", "a\x00u", "er-\x00"]
+    for needle in needles:
+        expected = _linear(rows, needle)
+        assert [rows[number] for number in index.search(needle)] == expected, needle
+        assert tool.run({"query": needle})["results"] == expected, needle
+        assert columnar.run({"query": needle})["results"] == expected, needle
+
+
+def test_pages_follow_row_order():
+    rows = [{"id": f"user-{number}", "name": "Ann"} for number in range(5)]
+    tool = DataLookupTool(rows)
+    page = tool.run({"query": "ann", "limit": 2, "offset": 2})
+    assert page["results"] == rows[2:4]
+    assert (page["total"], page["next_offset"]) == (5, 4)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from app.ingest import ingest
+
+
+class _Interrupted(Exception):
+    pass
+
+
+class _CutStream(io.BytesIO):
+    """A feed that dies after ``cut`` lines, like a killed process."""
+
+    def __init__(self, data: bytes, cut: int) -> None:
+        super().__init__(data)
+        self.cut = cut
+
+    def __next__(self) -> bytes:
+        if self.cut == 0:
+            raise _Interrupted
+        self.cut -= 1
+        return super().__next__()
+
+
+def _feed(count: int) -> bytes:
+    lines = [
+        {"task_id": f"t{index}", "description": f"lookup customer {index}", "parameters": {"tool": "data_lookup"}}
+        for index in range(count)
+    ]
+    return b"".join(json.dumps(line).encode("utf-8") + b"\n" for line in lines)
+
+
+def _answered(path) -> list:
+    with open(path, "rb") as handle:
+        return [json.loads(line)["task_id"] for line in handle]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_resumed_ingest_neither_repeats_nor_loses_tasks(orchestrator, tmp_path, ordered):
+    feed = _feed(40)
+    output = str(tmp_path / "responses.jsonl")
+    options = {"workers": 3, "ordered": ordered, "checkpoint_every": 4}
+
+    with pytest.raises(_Interrupted):
+        ingest(orchestrator, _CutStream(feed, 23), output, **options)
+    assert 0 < len(_answered(output)) < 40
+
+    stats = ingest(orchestrator, io.BytesIO(feed), output, resume=True, **options)
+
+    answered = _answered(output)
+    expected = [f"t{index}" for index in range(40)]
+    assert (answered if ordered else sorted(answered, key=lambda task_id: int(task_id[1:]))) == expected
+    assert stats.resumed > 0 and stats.resumed + stats.tasks == 40
+
+
+def test_rejected_task_keeps_the_orchestrator_status(orchestrator, tmp_path):
+    feed = b'{"task_id": "t1", "description": "ssn 123-45-6789"}\n{"task_id": "t2"}\n'
+    output = tmp_path / "responses.jsonl"
+
+    stats = ingest(orchestrator, io.BytesIO(feed), str(output))
+
+    records = [json.loads(line) for line in output.read_bytes().splitlines()]
+    assert records[0] == {"task_id": "t1", "status": "rejected", "violation": "Task contains restricted PII"}
+    assert records[1]["status"] == "invalid"
+    assert stats.statuses == {"rejected": 1, "invalid": 1}
+    assert stats.errors == 1
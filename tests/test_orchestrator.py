@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import threading
+import time
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from app.agent.types import Task
+from app.tools.base import AsyncTool, StreamingTool, Tool
+
+
+class _SlowStream(StreamingTool):
+    name = "slow_stream"
+    description = "Streams chunks slowly."
+    input_schema: Dict[str, Any] = {}
+    output_schema = {"text": {"required": True}}
+
+    def __init__(self) -> None:
+        self.finished = threading.Event()
+
+    def stream(self, payload: Dict[str, Any]) -> Iterator[str]:
+        try:
+            for _ in range(20):
+                time.sleep(0.02)
+                yield "chunk " * 100
+        finally:
+            self.finished.set()
+
+
+class _InlineStream(_SlowStream):
+    name = "inline_stream"
+    inline = True
+
+
+class _SlowLookup(Tool):
+    name = "slow_lookup"
+    description = "Returns after a delay."
+    input_schema: Dict[str, Any] = {}
+    output_schema: Dict[str, Any] = {}
+    delay = 0.1
+
+    def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.thread = threading.current_thread()
+        time.sleep(self.delay)
+        return {"complete": True}
+
+
+class _InlineLookup(_SlowLookup):
+    name = "inline_lookup"
+    inline = True
+
+
+def test_timed_out_stream_stops_feeding_the_sink(orchestrator):
+    tool = _SlowStream()
+    orchestrator.tools[tool.name] = tool
+    orchestrator.config.step_timeout_seconds = 0.05
+    received = []
+    orchestrator.output_sink = lambda task_id, name, chunk: received.append(chunk)
+    response = orchestrator.run_task(Task("t", "stream", "analyst", parameters={"tool": tool.name}))
+    assert response.steps[0].violation == "step_timeout"
+    seen = len(received)
+    assert tool.finished.wait(1.0)
+    time.sleep(0.1)
+    assert len(received) == seen
+
+
+def test_inline_stream_stops_at_the_deadline(orchestrator):
+    tool = _InlineStream()
+    orchestrator.tools[tool.name] = tool
+    orchestrator.config.step_timeout_seconds = 0.05
+    received = []
+    orchestrator.output_sink = lambda task_id, name, chunk: received.append(chunk)
+    response = orchestrator.run_task(Task("t", "stream", "analyst", parameters={"tool": tool.name}))
+    assert response.steps[0].violation == "step_timeout"
+    assert tool.finished.is_set()
+    assert len(received) < 10
+
+
+def test_hung_tool_is_abandoned_at_the_deadline(orchestrator):
+    tool = _SlowLookup()
+    tool.delay = 2.0
+    orchestrator.tools[tool.name] = tool
+    orchestrator.config.step_timeout_seconds = 0.05
+    began = time.monotonic()
+    response = orchestrator.run_task(Task("t", "slow", "analyst", parameters={"tool": tool.name}))
+    assert response.steps[0].violation == "step_timeout"
+    assert time.monotonic() - began < 0.5
+    assert tool.thread is not threading.current_thread()
+
+
+def test_inline_tools_run_on_the_calling_thread(orchestrator):
+    tool = _InlineLookup()
+    orchestrator.tools[tool.name] = tool
+    response = orchestrator.run_task(Task("t", "slow", "analyst", parameters={"tool": tool.name}))
+    assert response.status == "completed"
+    assert tool.thread is threading.current_thread()
+    orchestrator.config.step_timeout_seconds = 0.05
+    response = orchestrator.run_task(Task("t2", "slow", "analyst", parameters={"tool": tool.name}))
+    assert response.steps[0].violation == "step_timeout"
+
+
+class _Echo(Tool):
+    name = "echo"
+    description = "Echoes its input after a delay."
+    input_schema: Dict[str, Any] = {}
+    output_schema: Dict[str, Any] = {}
+
+    def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(payload["delay"])
+        return {"n": payload["n"], "complete": False}
+
+
+def _echo_tasks(count: int) -> List[Task]:
+    # Later tasks finish first, so completion order is the reverse of input order.
+    return [
+        Task(f"t{n}", "echo", "analyst", parameters={"tool": "echo", "n": n, "delay": 0.002 * (count - n)})
+        for n in range(count)
+    ]
+
+
+def test_run_batch_keeps_input_order_and_per_task_audit_records(orchestrator):
+    orchestrator.tools["echo"] = _Echo()
+    orchestrator.config.max_steps = 3
+    tasks = _echo_tasks(12)
+
+    responses = orchestrator.run_batch(tasks, max_workers=6)
+
+    assert [response.task_id for response in responses] == [task.task_id for task in tasks]
+    for n, response in enumerate(responses):
+        assert [step.tool_output["n"] for step in response.steps] == [n] * 3
+        record = orchestrator.audit_logger.get_record(f"t{n}")
+        assert [step["tool_input"]["n"] for step in record["steps"]] == [n] * 3
+
+
+def test_stream_batch_yields_input_indexes_as_tasks_finish(orchestrator):
+    orchestrator.tools["echo"] = _Echo()
+    orchestrator.config.max_steps = 1
+    tasks = _echo_tasks(8)
+
+    finished = list(orchestrator.stream_batch(tasks, max_workers=8))
+
+    assert sorted(index for index, _response in finished) == list(range(8))
+    assert all(response.task_id == tasks[index].task_id for index, response in finished)
+
+
+class _AsyncQuote(AsyncTool):
+    name = "async_quote"
+    description = "Returns a quote after a delay."
+    input_schema: Dict[str, Any] = {}
+    output_schema = {"text": {"required": True}}
+
+    def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(payload["delay"])
+        return {"text": f"quote for {payload['who']}", "complete": True}
+
+    async def arun(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(payload["delay"])
+        return {"text": f"quote for {payload['who']}", "complete": True}
+
+
+def _comparable(value: Any) -> Any:
+    """``value`` without timings and task ids, which differ between two runs."""
+    if isinstance(value, dict):
+        return {
+            key: _comparable(item)
+            for key, item in value.items()
+            if "latency" not in key and key not in ("started_at", "completed_at", "task_id")
+        }
+    if isinstance(value, list):
+        return [_comparable(item) for item in value]
+    return value
+
+
+@pytest.mark.parametrize(
+    "who, delay, step_timeout",
+    [("alice", 0.0, 20), ("you idiot", 0.0, 20), ("alice", 1.0, 0.05)],
+    ids=["plain", "blocked", "timeout"],
+)
+def test_arun_task_matches_run_task(orchestrator, who, delay, step_timeout):
+    orchestrator.tools["async_quote"] = _AsyncQuote()
+    orchestrator.config.step_timeout_seconds = step_timeout
+    parameters = {"tool": "async_quote", "who": who, "delay": delay}
+
+    sync = orchestrator.run_task(Task("sync", "quote", "analyst", parameters=parameters))
+    began = time.monotonic()
+    asynchronous = asyncio.run(orchestrator.arun_task(Task("async", "quote", "analyst", parameters=parameters)))
+
+    assert time.monotonic() - began < 0.5
+    assert _comparable(dataclasses.asdict(asynchronous)) == _comparable(dataclasses.asdict(sync))
+    assert _comparable(orchestrator.audit_logger.get_record("async")) == _comparable(
+        orchestrator.audit_logger.get_record("sync")
+    )
+    if step_timeout < 1:
+        assert asynchronous.steps[0].violation == "step_timeout"
+
+
+class _SplitSecret(StreamingTool):
+    name = "split_secret"
+    description = "Streams an SSN split across chunks."
+    input_schema: Dict[str, Any] = {}
+    output_schema = {"text": {"required": True}}
+
+    def __init__(self) -> None:
+        self.pulled = 0
+
+    def stream(self, payload: Dict[str, Any]) -> Iterator[str]:
+        for chunk in ["call 123-4", "5-6789 ", "now " * 3000]:
+            self.pulled += 1
+            yield chunk
+
+
+def test_stream_without_a_sink_is_screened_chunk_by_chunk(orchestrator):
+    tool = _SplitSecret()
+    orchestrator.tools[tool.name] = tool
+    response = orchestrator.run_task(Task("t", "stream", "analyst", parameters={"tool": tool.name}))
+    output = response.steps[0].tool_output
+    assert output["text"] == "call [REDACTED:pii] " + "now " * 3000
+    assert "streamed_chars" not in output
+    assert tool.pulled == 3
+
+    received = []
+    orchestrator.output_sink = lambda task_id, name, chunk: received.append(chunk)
+    response = orchestrator.run_task(Task("t2", "stream", "analyst", parameters={"tool": tool.name}))
+    output = response.steps[0].tool_output
+    assert "".join(received).startswith(output["text"]) and len(output["text"]) == 4096
+    assert output["streamed_chars"] == len("".join(received))
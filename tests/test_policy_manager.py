@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import shutil
+from typing import Any, Dict
+
+import pytest
+import yaml
+
+from app.agent.types import Task
+from app.guardrails.manager import PolicyManager
+from app.main import build_orchestrator
+from app.tools.base import Tool
+from tests.conftest import DEFAULT_POLICY
+
+WITHOUT_TONE = DEFAULT_POLICY.read_text(encoding="utf-8").replace("    - tone\n", "")
+
+
+@pytest.fixture
+def policy_path(tmp_path):
+    path = tmp_path / "policy.yaml"
+    shutil.copy(DEFAULT_POLICY, path)
+    return path
+
+
+def test_poll_publishes_a_new_snapshot_when_the_file_changes(policy_path):
+    manager = PolicyManager(str(policy_path))
+    before = manager.snapshot()
+    assert manager.poll() is None
+
+    policy_path.write_text(WITHOUT_TONE, encoding="utf-8")
+    published = manager.poll()
+
+    assert published is manager.snapshot()
+    assert published.version == before.version + 1
+    assert "tone" not in published.checks
+    assert "tone" in before.checks and before.scanner.scan("you idiot") == ("tone",)
+
+
+def test_bad_edit_keeps_the_last_good_snapshot(policy_path):
+    manager = PolicyManager(str(policy_path))
+    before = manager.snapshot()
+
+    policy_path.write_text("policy: [unclosed\n", encoding="utf-8")
+    with pytest.raises(yaml.YAMLError):
+        manager.poll()
+    assert manager.snapshot() is before
+    # The broken state is remembered rather than re-parsed on every poll.
+    assert manager.poll() is None
+
+    policy_path.write_text(WITHOUT_TONE, encoding="utf-8")
+    assert manager.poll().version == before.version + 1
+
+
+def test_snapshot_policy_is_frozen(policy_path):
+    policy = PolicyManager(str(policy_path)).snapshot().config.policy
+    assert policy.checks == ("pii", "hallucination", "tone")
+    with pytest.raises(TypeError):
+        policy.roles["analyst"] = {}  # type: ignore[index]
+    with pytest.raises(AttributeError):
+        policy.checks = ()  # type: ignore[misc]
+
+
+class _ReloadingTool(Tool):
+    """Rewrites the policy mid-task, then returns text only the old policy flags."""
+
+    name = "reloading"
+    description = "Reloads the policy while running."
+    input_schema: Dict[str, Any] = {}
+    output_schema = {"text": {"required": True}}
+
+    def __init__(self, manager: PolicyManager) -> None:
+        self.manager = manager
+
+    def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.manager.policy_path.write_text(WITHOUT_TONE, encoding="utf-8")
+        self.manager.poll()
+        return {"text": "what an idiot", "complete": True}
+
+
+def test_in_flight_task_keeps_its_pinned_snapshot(policy_path):
+    manager = PolicyManager(str(policy_path))
+    orchestrator = build_orchestrator(manager)
+    orchestrator.tools["reloading"] = _ReloadingTool(manager)
+    try:
+        first = orchestrator.run_task(Task("t1", "reload", "analyst", parameters={"tool": "reloading"}))
+        assert first.steps[0].violation == "tone (redacted)"
+        assert orchestrator.audit_logger.get_record("t1")["policy"]["snapshot_version"] == 1
+        assert manager.snapshot().version == 2
+
+        second = orchestrator.run_task(Task("t2", "reload", "analyst", parameters={"tool": "reloading"}))
+        assert second.steps[0].violation is None
+        assert orchestrator.audit_logger.get_record("t2")["policy"]["snapshot_version"] == 2
+    finally:
+        orchestrator.audit_logger.close()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+import os
+
+from app.logging.query import AuditLogIndex
+
+
+def _append(path, start, count):
+    with open(path, "a") as f:
+        for i in range(start, start + count):
+            record = {
+                "task_id": f"t{i}",
+                "role": "analyst" if i % 2 else "admin",
+                "status": "blocked" if i % 3 == 0 else "completed",
+                "started_at": f"2026-10-13T{i % 24:02d}:00:00",
+                "steps": [{"tool": "data_lookup", "violation": "Policy violation: pii detected" if i % 3 == 0 else None}],
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def _ids(index, **filters):
+    return [record["task_id"] for record in index.query(**filters)]
+
+
+def test_incremental_refresh_appends_to_the_index(tmp_path):
+    log = str(tmp_path / "audit.jsonl")
+    _append(log, 0, 300)
+    index = AuditLogIndex(log)
+    assert len(_ids(index, role="analyst", violation="pii")) == 50
+    sidecar = os.path.join(index.index_dir, "audit.jsonl.idx")
+    with open(sidecar, "rb") as f:
+        before = f.read()
+    _append(log, 300, 30)
+    assert len(_ids(index, role="analyst", violation="pii")) == 55
+    with open(sidecar, "rb") as f:
+        after = f.read()
+    assert after.startswith(before) and len(after) - len(before) < len(before) / 4
+    # A new reader loads the appended blocks and agrees with a full scan.
+    fresh = AuditLogIndex(log)
+    assert _ids(fresh, status="blocked", since="2026-10-13T05", until="2026-10-13T09:59:59") == [
+        f"t{i}" for i in range(330) if i % 3 == 0 and 5 <= i % 24 <= 9
+    ]
+    assert _ids(fresh, task_id="t329") == ["t329"]
+
+
+def test_damaged_index_is_rebuilt(tmp_path):
+    log = str(tmp_path / "audit.jsonl")
+    _append(log, 0, 50)
+    index = AuditLogIndex(log)
+    expected = _ids(index, role="admin")
+    sidecar = os.path.join(index.index_dir, "audit.jsonl.idx")
+    with open(sidecar, "r+b") as f:
+        f.seek(40)
+        f.write(b"\xff" * 8)
+    assert _ids(AuditLogIndex(log), role="admin") == expected
+    with open(sidecar, "wb") as f:
+        f.write(b"\x80\x04 not an index")
+    assert _ids(AuditLogIndex(log), role="admin") == expected
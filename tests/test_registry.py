@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import shutil
+
+import pytest
+
+from app.agent.types import Task
+from app.guardrails.registry import PolicyRegistry, UnknownTenant
+from app.main import build_orchestrator
+from tests.conftest import DEFAULT_POLICY
+
+
+def _registry(tmp_path, *tenants):
+    for tenant in tenants:
+        shutil.copy(DEFAULT_POLICY, tmp_path / f"{tenant}.yaml")
+    return PolicyRegistry(str(tmp_path))
+
+
+def test_unknown_tenant_is_rejected_and_audited(tmp_path):
+    orchestrator = build_orchestrator(_registry(tmp_path, "acme"))
+    try:
+        for tenant in ("nope", None):
+            response = orchestrator.run_task(Task("t", "lookup alice", "analyst", tenant=tenant))
+            assert response.status == "rejected"
+            record = orchestrator.audit_logger.get_record("t")
+            assert record["status"] == "rejected"
+            assert record["steps"][0]["violation"] == "policy:unknown_tenant"
+    finally:
+        orchestrator.audit_logger.close()
+
+
+def test_poll_adds_changes_and_removes_tenants(tmp_path):
+    registry = _registry(tmp_path, "acme")
+    assert registry.poll() == {}
+
+    shutil.copy(DEFAULT_POLICY, tmp_path / "globex.yaml")
+    (tmp_path / "broken.yaml").write_text("policy: [unclosed\n", encoding="utf-8")
+    changed = registry.poll()
+    assert set(changed) == {"globex"}
+    assert registry.tenants == ["acme", "globex"]
+    assert "broken" in registry.errors
+    # A file that failed to load is not retried until it changes.
+    assert registry.poll() == {}
+
+    (tmp_path / "acme.yaml").write_text(
+        DEFAULT_POLICY.read_text(encoding="utf-8").replace("    - tone\n", ""), encoding="utf-8"
+    )
+    changed = registry.poll()
+    assert set(changed) == {"acme"}
+    assert "tone" not in registry.snapshot("acme").checks
+
+    (tmp_path / "globex.yaml").unlink()
+    (tmp_path / "broken.yaml").unlink()
+    assert registry.poll() == {"globex": None}
+    assert registry.errors == {}
+    with pytest.raises(UnknownTenant):
+        registry.snapshot("globex")
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import logging
+import random
+import re
+
+from app.guardrails.scanner import DEFAULT_PATTERNS, CompiledScanner
+
+PATTERNS = dict(
+    DEFAULT_PATTERNS,
+    account=r"\bacct[ -]?\d{6}\b",
+    promise=r"(?i)(?:guaranteed|risk-free) returns?",
+    iban=r"[A-Z]{2}\d{2}[A-Z0-9]{4}",
+    amount=r"\$\d+(?:\.\d\d)?",
+)
+FRAGMENTS = [
+    "123-45-6789", "12-345-6789", "Confidence: LOW", "confidence: high", "shutup", "Idiot", "acct 123456",
+    "acct-12345", "Guaranteed Return", "risk-free returns", "DE89ABCD", "de89abcd", "$12.50", "$7", " ", " ",
+    "the", "portfolio", "-", "9", "x", "\n",
+]
+
+
+def _text(rng: random.Random) -> str:
+    return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 12)))
+
+
+def test_prefiltered_scan_matches_per_check_search():
+    scanner = CompiledScanner(PATTERNS, list(PATTERNS))
+    assert scanner._combined is not None and scanner._combined.pattern.startswith("(?=")
+    singles = {check: re.compile(pattern) for check, pattern in PATTERNS.items()}
+    rng = random.Random(7)
+    for _ in range(3000):
+        text = _text(rng)
+        expected = tuple(check for check in PATTERNS if singles[check].search(text))
+        assert scanner.scan(text) == expected, text
+
+
+def test_unbounded_pattern_logs_the_fallback(caplog):
+    patterns = dict(DEFAULT_PATTERNS, anything=r".*secret")
+    with caplog.at_level(logging.DEBUG, logger="app.guardrails.scanner"):
+        scanner = CompiledScanner(patterns, list(patterns))
+
+    assert not scanner._combined.pattern.startswith("(?=")
+    assert "without a prefilter" in caplog.text
+    assert scanner.scan("top secret, idiot") == ("tone", "anything")
+
+
+def test_global_flags_keep_their_meaning_when_embedded():
+    patterns = dict(
+        DEFAULT_PATTERNS,
+        ascii_code=r"(?a)\bcode \d{3}\b",
+        verbose=r"(?x) secret \s \d+  # trailing comment",
+        stacked=r"(?i)(?s)begin.end",
+    )
+    scanner = CompiledScanner(patterns, list(patterns))
+    assert not scanner._fallbacks
+    for text in ("code ١٢٣", "code 123", "secret 42", "BEGIN\nEND", "idiot"):
+        expected = tuple(check for check, pattern in patterns.items() if re.search(pattern, text))
+        assert scanner.scan(text) == expected, text
+
+
+def test_backreferences_are_searched_standalone():
+    patterns = dict(
+        DEFAULT_PATTERNS,
+        stutter=r"(\w)\1{3}",
+        echo=r"(?P<word>\b\w{4,}\b) (?P=word)",
+        twice=r"(?i)(?P<word>\bsell\b) (?P=word)",
+    )
+    scanner = CompiledScanner(patterns, list(patterns))
+    assert set(scanner._fallbacks) == {"stutter", "echo", "twice"}
+    assert scanner.scan("aaaa") == ("stutter",)
+    assert scanner.scan("you idiot, buy buy now now") == ("tone",)
+    assert scanner.scan("idiot: sell Sell, close close") == ("tone", "echo", "twice")
+    assert scanner.spans("zzzz 123-45-6789") == [(0, 4, "stutter"), (5, 16, "pii")]
+    assert scanner.first_matches("xxxx idiot") == [(0, 4, "stutter"), (5, 10, "tone")]
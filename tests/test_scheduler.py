@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+
+from app.agent.scheduler import AdmissionRejected, TaskScheduler
+from app.agent.types import Task
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_expired_entries_do_not_fill_the_queue(orchestrator):
+    clock = _Clock()
+    # No workers, so nothing leaves the queue unless admission purges it.
+    scheduler = TaskScheduler(orchestrator, workers=0, max_queue=2, latency_target_ms=1000, clock=clock)
+    stale = [scheduler.submit(Task(f"stale-{i}", "d", "analyst")) for i in range(2)]
+    with pytest.raises(AdmissionRejected):
+        scheduler.submit(Task("early", "d", "analyst"))
+
+    clock.now = 5.0
+    fresh = scheduler.submit(Task("fresh", "d", "analyst"))
+
+    assert not fresh.done()
+    for future in stale:
+        assert future.exception().reason == "queue_timeout"
+    assert scheduler.stats()["queue_depth"] == 1
+    assert scheduler.rejected["queue_full"] == 1
+    assert scheduler.rejected["queue_timeout"] == 2
+    scheduler.close(wait=False)
+
+
+def test_role_buckets_are_bounded(orchestrator):
+    clock = _Clock()
+    scheduler = TaskScheduler(
+        orchestrator, workers=0, max_queue=1000, default_role_limit=(1, 1), clock=clock, max_role_buckets=8
+    )
+    for index in range(50):
+        scheduler.submit(Task(f"t{index}", "d", f"role-{index}"))
+
+    assert len(scheduler._role_buckets) <= 8
+    # The most recent role keeps its (empty) bucket.
+    with pytest.raises(AdmissionRejected) as rejected:
+        scheduler.submit(Task("again", "d", "role-49"))
+    assert rejected.value.reason == "rate_limited"
+    scheduler.close(wait=False)
+
+
+def test_roles_without_a_limit_get_no_bucket(orchestrator):
+    scheduler = TaskScheduler(orchestrator, workers=0, role_limits={"admin": (5, 5)})
+    for index in range(20):
+        scheduler.submit(Task(f"t{index}", "d", f"role-{index}"))
+
+    assert len(scheduler._role_buckets) == 0
+    scheduler.close(wait=False)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from app.agent.types import Task
+from app.tools.base import DataLookupTool
+from app.tools.schema import SchemaError, ToolValidationError, compile_schema
+
+
+def test_long_lookup_query_completes(orchestrator):
+    response = orchestrator.run_task(Task("t", "lookup " + "x" * 2000, "analyst"))
+    assert response.status == "completed"
+
+
+@pytest.mark.parametrize("bound", [-1, 1.5, "10", True, "0); import os; (0"])
+def test_max_length_must_be_a_non_negative_int(bound):
+    with pytest.raises(SchemaError):
+        compile_schema({"query": {"type": "string", "max_length": bound}})
+
+
+def test_generated_validator_matches_slow_path():
+    validator = compile_schema({
+        "query": {"required": True, "type": "string", "max_length": 4},
+        "ids": {"type": "array", "max_length": 2, "items": {"type": "integer"}},
+    })
+    for payload in ({"query": "abcd"}, {"query": "abcde"}, {"query": "a", "ids": [1, True]}, {"ids": []}):
+        assert validator.ok(payload) == (validator.errors(payload) == [])
+    with pytest.raises(ToolValidationError):
+        validator.validate({"query": "abcde"})
+
+
+@pytest.mark.parametrize("bound", [True, "0", float("inf"), float("nan")])
+def test_minimum_must_be_a_finite_number(bound):
+    with pytest.raises(SchemaError):
+        compile_schema({"limit": {"type": "integer", "minimum": bound}})
+
+
+def test_minimum_rejects_smaller_numbers():
+    validator = compile_schema({"limit": {"type": ("integer", "null"), "minimum": 0}, "any": {"minimum": 1.5}})
+    for payload in ({"limit": 0}, {"limit": None}, {"limit": -1}, {"any": 1}, {"any": "x"}, {"any": 2}):
+        assert validator.ok(payload) == (validator.errors(payload) == [])
+    assert validator.errors({"limit": -1}) == ["$.limit must be at least 0, got -1"]
+
+
+def test_lookup_rejects_negative_pages():
+    tool = DataLookupTool()
+    for page in ({"limit": -1}, {"limit": 1, "offset": -1}):
+        with pytest.raises(ToolValidationError):
+            tool.validate_input({"query": "a", **page})
+    tool.validate_input({"query": "a", "limit": 0, "offset": 0})
+
+
+def test_invalid_payload_runs_the_fast_check_once():
+    tool = DataLookupTool()
+    validator = tool.input_validator()
+    calls = []
+    fast = validator.ok
+    validator.ok = lambda payload: calls.append(payload) or fast(payload)
+    try:
+        with pytest.raises(ToolValidationError):
+            tool.validate_input({"query": 1})
+    finally:
+        validator.ok = fast
+    assert len(calls) == 1
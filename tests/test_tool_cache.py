@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from app.agent.types import Task
+from app.tools.base import Tool
+from app.tools.cache import ToolResultCache
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Quote(Tool):
+    name = "quote"
+    description = "Returns a quote after a delay."
+    input_schema: Dict[str, Any] = {"symbol": {"type": "string"}}
+    output_schema = {"text": {"required": True, "type": "string"}}
+    cacheable = True
+
+    def __init__(self) -> None:
+        self.runs = 0
+        self.validated = 0
+        self._lock = threading.Lock()
+
+    def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.runs += 1
+        time.sleep(0.05)
+        return {"text": "call 123-45-6789", "complete": True}
+
+    def validate_output(self, payload: Dict[str, Any]) -> None:
+        self.validated += 1
+        super().validate_output(payload)
+
+
+def test_concurrent_identical_calls_run_once():
+    cache = ToolResultCache()
+    runs = []
+
+    def run() -> Dict[str, Any]:
+        runs.append(1)
+        time.sleep(0.1)
+        return {"value": 1}
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: cache.call(("t", "{}"), run), range(8)))
+
+    assert len(runs) == 1
+    assert [output for output, _shared in results] == [{"value": 1}] * 8
+    assert sorted(shared for _output, shared in results) == [False] + [True] * 7
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_their_ttl():
+    clock = _Clock()
+    cache = ToolResultCache(ttl_seconds=10, clock=clock)
+    cache.call("short", lambda: {"v": 1}, ttl=1)
+    cache.call("long", lambda: {"v": 2})
+
+    clock.now = 5
+    assert cache.get("short") is None
+    assert cache.get("long") == {"v": 2}
+    clock.now = 11
+    assert cache.get("long") is None
+    assert cache.stats()["expirations"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ToolResultCache(max_entries=2)
+    cache.call("a", lambda: {"v": "a"})
+    cache.call("b", lambda: {"v": "b"})
+    cache.get("a")
+    cache.call("c", lambda: {"v": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": "a"} and cache.get("c") == {"v": "c"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cached_output_is_validated_screened_and_marked(orchestrator):
+    tool = _Quote()
+    orchestrator.tools[tool.name] = tool
+    orchestrator.tool_cache = ToolResultCache()
+    parameters = {"tool": tool.name, "symbol": "ACME"}
+
+    first = orchestrator.run_task(Task("t1", "quote", "analyst", parameters=parameters))
+    second = orchestrator.run_task(Task("t2", "quote", "analyst", parameters=parameters))
+
+    assert tool.runs == 1
+    assert tool.validated == 2
+    assert [first.steps[0].cached, second.steps[0].cached] == [False, True]
+    # The raw output is cached; the hit is redacted by the output screen again.
+    assert second.steps[0].tool_output["text"] == "call [REDACTED:pii]"
+    assert second.steps[0].violation == "pii (redacted)"
+    record = orchestrator.audit_logger.get_record("t2")
+    assert record["steps"][0]["cached"] is True
+    assert "cached" not in orchestrator.audit_logger.get_record("t1")["steps"][0]
+
+
+def test_concurrent_tasks_share_one_tool_run(orchestrator):
+    tool = _Quote()
+    orchestrator.tools[tool.name] = tool
+    orchestrator.tool_cache = ToolResultCache()
+    tasks = [Task(f"t{index}", "quote", "analyst", parameters={"tool": tool.name}) for index in range(6)]
+
+    with ThreadPoolExecutor(6) as pool:
+        responses = list(pool.map(orchestrator.run_task, tasks))
+
+    assert tool.runs == 1
+    assert sum(response.steps[0].cached for response in responses) == 5
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+from app.logging.tracing import OTLPHttpExporter, TaskTrace, _attribute
+
+
+def _bad_collector():
+    """A server that answers every request with a malformed status line."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                conn.recv(65536)
+                conn.sendall(b"garbage\r\n\r\n")
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server
+
+
+def test_exporter_survives_a_misbehaving_collector():
+    server = _bad_collector()
+    exporter = OTLPHttpExporter(f"http://127.0.0.1:{server.getsockname()[1]}", batch_size=1, timeout=1.0)
+    try:
+        for index in range(3):
+            trace = TaskTrace(f"t{index}", exporter)
+            trace.add("planner", 0, 1, 1)
+            trace.finish(status="completed")
+            exporter.flush(timeout=5)
+        began = time.monotonic()
+        exporter.flush(timeout=5)
+        assert time.monotonic() - began < 5
+        assert exporter.dropped == 3 and exporter.exported == 0
+    finally:
+        exporter.close(timeout=5)
+        server.close()
+
+
+def test_cached_attributes_keep_bool_int_and_float_apart():
+    assert _attribute("k", 1)["value"] == {"intValue": "1"}
+    assert _attribute("k", True)["value"] == {"boolValue": True}
+    assert _attribute("k", 1.0)["value"] == {"doubleValue": 1.0}
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import shutil
+
+from app.guardrails.cache import VerdictCache
+from app.guardrails.manager import PolicyManager
+from app.guardrails.policy import GuardrailEngine
+from tests.conftest import DEFAULT_POLICY
+
+
+def _engine(tmp_path):
+    path = tmp_path / "policy.yaml"
+    shutil.copy(DEFAULT_POLICY, path)
+    cache = VerdictCache()
+    return GuardrailEngine(PolicyManager(str(path)), verdict_cache=cache), cache
+
+
+def test_reload_with_new_patterns_stops_serving_cached_verdicts(tmp_path):
+    engine, cache = _engine(tmp_path)
+    text = "you numpty"
+    assert engine.scan(text) == ()
+    assert engine.scan(text) == ()
+    assert cache.hits == 1
+
+    engine.policy_manager.patterns["tone"] = r"(?i)numpty"
+    engine.policy_manager.reload()
+
+    assert engine.scan(text) == ("tone",)
+    assert cache.hits == 1
+
+
+def test_reload_with_new_checks_stops_serving_cached_verdicts(tmp_path):
+    engine, cache = _engine(tmp_path)
+    old = engine.policy_manager.snapshot()
+    assert engine.scan("you idiot") == ("tone",)
+
+    policy = engine.policy_manager.policy_path
+    policy.write_text(policy.read_text(encoding="utf-8").replace("    - tone\n", ""), encoding="utf-8")
+    engine.policy_manager.poll()
+
+    assert engine.scan("you idiot") == ()
+    # A task still pinned to the old snapshot keeps its own verdicts.
+    assert engine.scan("you idiot", old) == ("tone",)
+    assert cache.hits == 1
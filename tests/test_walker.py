@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pytest
+
+from app.guardrails.manager import PolicyManager
+from app.guardrails.policy import PAYLOAD_LIMIT_VIOLATION, GuardrailEngine
+from app.guardrails.walker import PayloadLimitExceeded, flatten
+from tests.conftest import DEFAULT_POLICY
+
+SSN = "123-45-6789"
+
+
+@pytest.fixture
+def engine():
+    return GuardrailEngine(PolicyManager(str(DEFAULT_POLICY)), max_payload_depth=8, max_payload_chars=1000)
+
+
+def test_hits_are_reported_with_their_json_path(engine):
+    payload = {
+        "customers": [
+            {"name": "Ann", "notes": "fine"},
+            {"name": "Bob", "notes": ["ok", f"ssn {SSN}"]},
+        ],
+        "odd key": ("x", {"deep": "you idiot"}),
+        "count": 3,
+        SSN: "keys are not scanned",
+    }
+    _flat, hits = engine.inspect_payload(payload)
+    assert [(hit.path, hit.check) for hit in hits] == [
+        ("$.customers[1].notes[1]", "pii"),
+        ("$['odd key'][1].deep", "tone"),
+    ]
+
+
+def test_redaction_rewrites_only_the_matching_leaves(engine):
+    payload = {"rows": [{"a": "clean"}, {"b": f"x {SSN}"}], "t": ("keep", f"{SSN}!")}
+    output, blocked, violation, hits = engine.screen_tool_output(payload)
+
+    assert not blocked and violation == "pii (redacted)"
+    assert output == {"rows": [{"a": "clean"}, {"b": "x [REDACTED:pii]"}], "t": ("keep", "[REDACTED:pii]!")}
+    assert output["rows"][0] is payload["rows"][0]
+    assert payload["rows"][1]["b"] == f"x {SSN}"
+    assert [hit.path for hit in hits] == ["$.rows[1].b", "$.t[1]"]
+
+
+def test_depth_limit_refuses_the_payload(engine):
+    deep = "leaf"
+    for _ in range(9):
+        deep = [deep]
+    with pytest.raises(PayloadLimitExceeded):
+        flatten(deep, max_depth=8)
+    assert engine.screen_tool_request({"q": deep}) == (True, PAYLOAD_LIMIT_VIOLATION, [])
+    assert engine.screen_tool_output({"q": deep})[1:3] == (True, PAYLOAD_LIMIT_VIOLATION)
+    # Deep documents do not exhaust the stack when the limit allows them.
+    very_deep = "leaf"
+    for _ in range(10_000):
+        very_deep = {"k": very_deep}
+    assert len(flatten(very_deep, max_depth=20_000)) == 1
+
+
+def test_size_limit_refuses_the_payload(engine):
+    assert engine.screen_tool_request({"rows": ["x" * 400] * 3})[:2] == (True, PAYLOAD_LIMIT_VIOLATION)
+    assert engine.screen_tool_request({"rows": ["x" * 400] * 2}) == (False, None, [])
+    with pytest.raises(PayloadLimitExceeded):
+        flatten(list(range(20)), max_nodes=10)
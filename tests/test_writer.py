@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from app.logging.writer import AuditLogWriter
+
+
+def test_write_error_is_raised_once_and_writing_recovers(tmp_path):
+    directory = tmp_path / "logs"
+    directory.mkdir()
+    writer = AuditLogWriter(str(directory / "audit.jsonl"), batch_size=1)
+    try:
+        writer.write("first\n")
+        writer.flush()
+        # Make the next open fail: the log path becomes a directory.
+        writer._file.close()
+        writer._file = None
+        os.remove(directory / "audit.jsonl")
+        os.mkdir(directory / "audit.jsonl")
+        writer.write("lost\n")
+        with pytest.raises(OSError):
+            writer.flush()
+        assert writer.lines_dropped == 1
+        os.rmdir(directory / "audit.jsonl")
+        writer.write("second\n")
+        writer.flush()
+    finally:
+        writer.close()
+    assert (directory / "audit.jsonl").read_text() == "second\n"